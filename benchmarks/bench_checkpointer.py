@@ -0,0 +1,231 @@
+"""
+Benchmark do DynamoDbCheckpointer: tamanho dos checkpoints e latência de put/get
+
+Uso:
+    python benchmarks/bench_checkpointer.py [--turns 30] [--tool-chars 3000]
+    python benchmarks/bench_checkpointer.py --endpoint-url http://localhost:8000
+
+Com --endpoint-url, usa um DynamoDB Local (a tabela é criada se não existir):
+    docker run -p 8000:8000 amazon/dynamodb-local
+Sem ele, usa uma tabela em memória (LocalTable) — mede só serialização,
+compressão e o algoritmo de delta, sem rede.
+
+Cada turno simula uma sessão do agente: mensagem do usuário, tool call,
+saída da tool e resposta, com o estado retomado do checkpoint anterior.
+A retomada é medida fria (memória do checkpointer limpa: GetItem + Query)
+e quente (SessionStore do processo).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from typing import Annotated, List, Optional, TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, ToolMessage  # noqa: E402
+from langgraph.graph import END, StateGraph  # noqa: E402
+
+from src.llm.context_window import append_window  # noqa: E402
+from src.repository.dynamodb.checkpointer import DynamoDbCheckpointer, thread_id_for  # noqa: E402
+from src.repository.dynamodb.dynamodb_service import DYNAMO_TABLE, DynamoDbService  # noqa: E402
+from src.utils.metrics import metrics  # noqa: E402
+
+
+# ---------- tabela em memória (subconjunto da API Table do boto3) ----------
+
+class LocalTable:
+    """Stand-in local: get_item, query (Key conditions), batch_writer"""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key, **_):
+        item = self.items.get((Key["actor_id"], Key["session_id"]))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[(Item["actor_id"], Item["session_id"])] = dict(Item)
+
+    def delete_item(self, Key):
+        self.items.pop((Key["actor_id"], Key["session_id"]), None)
+
+    def query(self, KeyConditionExpression, ScanIndexForward=True, **_):
+        matches = [dict(i) for i in self.items.values() if _matches(KeyConditionExpression, i)]
+        matches.sort(key=lambda i: i["session_id"], reverse=not ScanIndexForward)
+        return {"Items": matches}
+
+    def batch_writer(self, **_):
+        return _LocalBatch(self)
+
+
+class _LocalBatch:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def put_item(self, Item):
+        self.table.put_item(Item)
+
+    def delete_item(self, Key):
+        self.table.delete_item(Key)
+
+
+def _matches(condition, item) -> bool:
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator == "AND":
+        return _matches(values[0], item) and _matches(values[1], item)
+
+    value = item.get(values[0].name)
+    if operator == "=":
+        return value == values[1]
+    if operator == "begins_with":
+        return isinstance(value, str) and value.startswith(values[1])
+    if operator == "BETWEEN":
+        return value is not None and values[1] <= value <= values[2]
+    raise NotImplementedError(operator)
+
+
+# ---------- grafo de uma sessão sintética ----------
+
+SYMBOLS = ["NVDA", "AAPL", "MSFT", "PETR4.SA", "VALE3.SA", "ITUB4.SA", "AMZN", "GOOGL"]
+
+class BenchState(TypedDict):
+    messages: Annotated[List[dict], append_window]
+    actor_id: str
+    session_id: str
+    turn: int
+    topic: Optional[str]
+    final_response: Optional[str]
+
+
+def synthetic_tool_output(chars: int) -> str:
+    """Saída de tool com números variados (comprime como uma resposta real)"""
+    rows = []
+    while sum(len(r) for r in rows) < chars:
+        rows.append(f"{random.choice(SYMBOLS)}: {random.uniform(10, 900):.2f} USD "
+                    f"({random.uniform(-5, 5):+.2f}%) vol {random.randint(10**5, 10**8)}\n")
+    return "".join(rows)
+
+
+def build_graph(checkpointer, tool_chars: int):
+    def respond(state: BenchState) -> dict:
+        turn = state.get("turn", 0) + 1
+        call_id = f"call_{uuid.uuid4().hex[:12]}"
+        answer = f"Resposta do turno {turn}: " + "análise do mercado. " * 20
+        return {
+            "turn": turn,
+            "topic": "Finanças",
+            "final_response": answer,
+            "messages": [
+                AIMessage(content="", tool_calls=[{"name": "get_stock_data", "args": {"symbol": "NVDA"}, "id": call_id}]),
+                ToolMessage(tool_call_id=call_id, content=synthetic_tool_output(tool_chars)),
+                AIMessage(content=answer),
+            ],
+        }
+
+    graph = StateGraph(BenchState)
+    graph.add_node("respond", respond)
+    graph.set_entry_point("respond")
+    graph.add_edge("respond", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def ensure_table(service: DynamoDbService) -> None:
+    client = service.dynamodb.meta.client
+    if DYNAMO_TABLE in client.list_tables()["TableNames"]:
+        return
+    client.create_table(
+        TableName=DYNAMO_TABLE,
+        KeySchema=[
+            {"AttributeName": "actor_id", "KeyType": "HASH"},
+            {"AttributeName": "session_id", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "actor_id", "AttributeType": "S"},
+            {"AttributeName": "session_id", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    client.get_waiter("table_exists").wait(TableName=DYNAMO_TABLE)
+
+
+def summarize(name: str, values: list, scale: float = 1.0) -> None:
+    values = sorted(v * scale for v in values)
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    print(f"{name:<28} avg={statistics.mean(values):10.2f}  p50={statistics.median(values):10.2f}  "
+          f"p95={p95:10.2f}  max={values[-1]:10.2f}")
+
+
+def report(name: str, timing: dict, scale: float = 1.0) -> None:
+    """Linha no mesmo formato de summarize, a partir de metrics.snapshot()"""
+    print(f"{name:<28} avg={timing['avg'] * scale:10.2f}  p50={timing['p50'] * scale:10.2f}  "
+          f"p95={timing['p95'] * scale:10.2f}  max={timing['max'] * scale:10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--tool-chars", type=int, default=3000)
+    parser.add_argument("--endpoint-url", default=None)
+    parser.add_argument("--region", default="us-east-1")
+    args = parser.parse_args()
+
+    service = DynamoDbService.__new__(DynamoDbService)
+    if args.endpoint_url:
+        service = DynamoDbService(region_name=args.region, endpoint_url=args.endpoint_url)
+        ensure_table(service)
+    else:
+        service.table = LocalTable()
+
+    checkpointer = DynamoDbCheckpointer(service, ttl_seconds=0)
+    graph = build_graph(checkpointer, args.tool_chars)
+    config = {"configurable": {"thread_id": thread_id_for("bench-actor", f"session-{uuid.uuid4().hex[:8]}")}}
+
+    metrics.reset()
+    raw_sizes, cold_seconds, hot_seconds = [], [], []
+    for turn in range(args.turns):
+        checkpointer.hot.clear()
+        start = time.perf_counter()
+        checkpointer.get_tuple(config)
+        cold_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        checkpointer.get_tuple(config)
+        hot_seconds.append(time.perf_counter() - start)
+
+        state = graph.invoke(
+            {"messages": [{"role": "user", "content": f"Pergunta {turn} sobre NVDA"}],
+             "actor_id": "bench-actor", "session_id": "s"},
+            config,
+            durability="exit",
+        )
+        raw_sizes.append(len(checkpointer.serde.dumps_typed(state)[1]))
+
+    timings = metrics.snapshot("checkpointer.")["timings"]
+    backend = f"DynamoDB em {args.endpoint_url}" if args.endpoint_url else "LocalTable (em memória)"
+    print(f"{args.turns} turnos, saída de tool ~{args.tool_chars} chars, backend: {backend}\n")
+
+    summarize("estado bruto (bytes)", raw_sizes)
+    report("HEAD comprimido (bytes)", timings["checkpointer.head_bytes"])
+    report("delta comprimido (bytes)", timings["checkpointer.delta_bytes"])
+    report("put (ms)", timings["checkpointer.put_seconds"], 1000)
+    summarize("get/resume frio (ms)", cold_seconds, 1000)
+    summarize("get/resume quente (ms)", hot_seconds, 1000)
+    print(f"memória do checkpointer: {checkpointer.hot.stats()['bytes']} bytes")
+
+    history = list(checkpointer.list(config, limit=3))
+    print(f"histórico: {len(history)} checkpoints mais recentes materializados a partir dos deltas")
+
+
+if __name__ == "__main__":
+    main()
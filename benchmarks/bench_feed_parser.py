@@ -0,0 +1,103 @@
+"""
+Microbenchmark: parser RSS em streaming vs. BeautifulSoup (caminho antigo)
+
+Uso:
+    python benchmarks/bench_feed_parser.py [feed.xml ...] [--limit 5] [--runs 200]
+
+Sem arquivos, usa um feed sintético no formato do Google News (100 itens).
+Para gravar feeds reais:
+    curl -s "https://news.google.com/rss/search?q=flamengo+futebol&hl=pt-BR&gl=BR&ceid=BR:pt-419" -o google.xml
+    curl -s "https://feeds.finance.yahoo.com/rss/2.0/headline?s=NVDA&region=US&lang=en-US" -o yahoo.xml
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from src.utils.feed_parser import parse_feed  # noqa: E402
+
+CHUNK_SIZE = 8192
+
+
+def synthetic_feed(items: int = 100) -> bytes:
+    entries = "".join(
+        f"""<item><title>Manchete {i} sobre o time - Portal {i % 7}</title>
+<link>https://news.google.com/rss/articles/CBMi{i:06d}?oc=5</link>
+<guid isPermaLink="false">CBMi{i:06d}</guid>
+<pubDate>Mon, 13 Oct 2025 {i % 24:02d}:15:00 GMT</pubDate>
+<description>&lt;a href="https://example.com/{i}"&gt;Manchete {i}&lt;/a&gt;&amp;nbsp;&amp;nbsp;&lt;font color="#6f6f6f"&gt;Portal {i % 7}&lt;/font&gt;</description>
+<source url="https://portal{i % 7}.example.com">Portal {i % 7}</source></item>
+"""
+        for i in range(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>'
+        "<title>Google News</title><link>https://news.google.com</link>"
+        f"{entries}</channel></rss>"
+    ).encode("utf-8")
+
+
+def bs4_path(content: bytes, limit: int) -> list:
+    soup = BeautifulSoup(content, "xml")
+    result = []
+    for item in soup.find_all("item")[:limit]:
+        title = item.find("title")
+        pub_date = item.find("pubDate")
+        source = item.find("source")
+        result.append((
+            title.text if title else None,
+            pub_date.text if pub_date else None,
+            source.text if source else None,
+        ))
+    return result
+
+
+def streaming_path(content: bytes, limit: int) -> list:
+    chunks = (content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE))
+    return parse_feed(chunks, limit)
+
+
+def bench(fn, content: bytes, limit: int, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(content, limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name: str, samples: list) -> float:
+    ordered = sorted(samples)
+    p50 = statistics.median(ordered)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"  {name:<10} p50={p50:8.3f} ms  p95={p95:8.3f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("feeds", nargs="*", help="arquivos XML gravados")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    feeds = [(path, open(path, "rb").read()) for path in args.feeds] or [("synthetic (100 items)", synthetic_feed())]
+
+    for name, content in feeds:
+        streamed = [tuple(item) for item in streaming_path(content, args.limit)]
+        assert streamed == bs4_path(content, args.limit), f"resultados divergentes em {name}"
+
+        print(f"{name}: {len(content) / 1024:.1f} KiB, limit={args.limit}, runs={args.runs}")
+        baseline = report("bs4", bench(bs4_path, content, args.limit, args.runs))
+        current = report("streaming", bench(streaming_path, content, args.limit, args.runs))
+        print(f"  speedup    {baseline / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark do índice vetorial local: latência do top-k conforme cresce o
+número de episódios de um actor
+
+Uso:
+    python benchmarks/bench_vector_index.py [--sizes 100,1000,10000,50000] [--queries 200] [--top-k 5]
+
+Para cada tamanho, um actor recebe N episódios sintéticos (em sessões
+variadas) e são medidas:
+- busca completa: embedding da query + produto matriz-vetor + top-k
+- só o top-k: produto + argpartition, com o vetor da query pronto
+- busca restrita a uma sessão (máscara por sessão)
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from src.repository.memory.embedders import HashEmbedder, normalize  # noqa: E402
+from src.repository.memory.vector_index import LocalVectorIndex  # noqa: E402
+
+SYMBOLS = ["NVDA", "AAPL", "MSFT", "PETR4", "VALE3", "ITUB4", "AMZN", "GOOGL", "TSLA", "BBAS3"]
+GOALS = ["preço atual de {s}", "notícias sobre {s}", "comparar {s} com {t}", "dividendos de {s}",
+         "resultado trimestral de {s}", "tendência de {s} na semana"]
+TOPICS = ["Finanças", "Mercado", "Futebol", "Comida"]
+OUTCOMES = ["answered", "error", "goal_completed"]
+
+
+def synthetic_episode(rng: random.Random) -> str:
+    goal = rng.choice(GOALS).format(s=rng.choice(SYMBOLS), t=rng.choice(SYMBOLS))
+    return f"goal: {goal}\ntopic: {rng.choice(TOPICS)}\noutcome: {rng.choice(OUTCOMES)}"
+
+
+def summarize(name: str, values: list) -> str:
+    values = sorted(v * 1000 for v in values)
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    return f"{name:<22} p50={statistics.median(values):7.3f}ms  p95={p95:7.3f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--sessions", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    embedder = HashEmbedder(args.dim)
+    queries = [rng.choice(GOALS).format(s=rng.choice(SYMBOLS), t=rng.choice(SYMBOLS)) for _ in range(args.queries)]
+
+    print(f"dim={args.dim} top_k={args.top_k} queries={args.queries} sessões={args.sessions}\n")
+    for size in sizes:
+        index = LocalVectorIndex(embedder=embedder, max_records=size, max_actors=1)
+        start = time.perf_counter()
+        for i in range(size):
+            index.add("bench-actor", f"session-{i % args.sessions}", [f"#{i} " + synthetic_episode(rng)])
+        add_seconds = time.perf_counter() - start
+
+        full, topk_only, by_session = [], [], []
+        actor = index._actors["bench-actor"]
+        for query in queries:
+            t0 = time.perf_counter()
+            index.search("bench-actor", query, args.top_k, min_score=-1.0)
+            full.append(time.perf_counter() - t0)
+
+            vector = normalize(embedder.embed([query]))[0]
+            t0 = time.perf_counter()
+            actor.search(vector, args.top_k)
+            topk_only.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            index.search("bench-actor", query, args.top_k, session_id="session-0", min_score=-1.0)
+            by_session.append(time.perf_counter() - t0)
+
+        stats = index.stats()
+        print(f"N={size:>6}  memória={stats['bytes'] / 1024:8.1f}KB  add={add_seconds / size * 1e6:6.1f}us/registro")
+        print("  " + summarize("busca completa", full))
+        print("  " + summarize("só top-k (matriz)", topk_only))
+        print("  " + summarize("busca por sessão", by_session))
+
+    # Referência: top-k por laço Python (sem NumPy) no maior tamanho
+    size = sizes[-1]
+    matrix = normalize(np.random.default_rng(0).standard_normal((size, args.dim)).astype(np.float32))
+    rows = matrix.tolist()
+    vector = matrix[0].tolist()
+    t0 = time.perf_counter()
+    scores = [sum(a * b for a, b in zip(row, vector)) for row in rows]
+    sorted(range(size), key=scores.__getitem__, reverse=True)[:args.top_k]
+    print(f"\nreferência: laço Python puro em N={size}: {(time.perf_counter() - t0) * 1000:.1f}ms por busca")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ except ImportError:
     print("Warning: bedrock_agentcore not available (local development mode)")
 
 from src.agent import MarketTrendsAgent
+from src.utils.deadline import new_deadline
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -52,11 +53,48 @@ def get_agent() -> MarketTrendsAgent:
     return agent_instance
 
 
+def request_deadline(payload: dict) -> float:
+    """
+    Deadline da requisição: `deadline_ms` do payload (orçamento relativo,
+    em ms) ou settings.REQUEST_DEADLINE_SECONDS.
+    """
+    try:
+        budget_ms = float(payload.get("deadline_ms") or 0)
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid deadline_ms in payload: {payload.get('deadline_ms')!r}")
+        budget_ms = 0
+    return new_deadline(budget_ms)
+
+
+async def stream_events(
+    agent: MarketTrendsAgent,
+    user_input: str,
+    actor_id: str,
+    session_id: str,
+    deadline: float = None,
+):
+    """
+    Repassa os eventos de `astream_request` ao cliente.
+    O evento final inclui actor_id/session_id, como na resposta não-streaming.
+    """
+    try:
+        async for event in agent.astream_request(user_input, actor_id, session_id, deadline):
+            if event["type"] == "final":
+                event = {**event, "actor_id": actor_id, "session_id": session_id}
+            yield event
+
+    except Exception as e:
+        tb = traceback.format_exc()
+        logger.error("Exception occurred while streaming request:\n%s", tb)
+        yield {"type": "error", "error": str(e) or "Unknown error"}
+
+
 if app:
     @app.entrypoint
-    def market_trends_agent(payload, context):
+    async def market_trends_agent(payload, context):
         """
-        Ponto de entrada principal para o AgentCore Runtime
+        Ponto de entrada principal para o AgentCore Runtime.
+        Com `"stream": true` no payload, retorna um gerador de eventos (SSE).
         """
         try:
             logger.info(f"Received payload: {payload}")
@@ -76,13 +114,21 @@ if app:
                 return {"error": "Missing prompt in payload"}
 
             agent = get_agent()
+            session_id = getattr(context, "session_id", "unknown")
+            # O orçamento começa a contar na chegada da requisição
+            deadline = request_deadline(payload)
+
+            if payload.get("stream"):
+                logger.info(f"Streaming request for actor: {actor_id}")
+                return stream_events(agent, user_input, actor_id, session_id, deadline)
+
             logger.info(f"Processing request for actor: {actor_id}")
-            response_text = agent.process_request(user_input, actor_id, getattr(context, "session_id", "unknown"))
+            response_text = await agent.aprocess_request(user_input, actor_id, session_id, deadline)
 
             return {
                 "response": [response_text],
                 "actor_id": actor_id,
-                "session_id": getattr(context, "session_id", "unknown")
+                "session_id": session_id
             }
 
         except Exception as e:
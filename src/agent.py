@@ -1,13 +1,32 @@
 """
 Classe principal do Market Trends Agent usando LangGraph
 """
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+from src.config.settings import settings
 from src.graph import compile_graph
+from src.llm.messages import content_text
+from src.llm.registry import llm_registry
+from src.nodes.analyzer import AnalysisPlan
+from src.nodes.tools_executor import TOOLS
+from src.repository.dynamodb.checkpointer import DynamoDbCheckpointer, thread_id_for
+from src.repository.session_store import session_store
+from src.repository.write_behind import get_write_behind, turn_outcome
 from src.state import AgentState
+from src.utils.deadline import DEADLINE_MESSAGE, new_deadline, remaining
+from src.utils.events import RESET_EVENT, STATUS_EVENT, SYNTHESIS_TAG, TOKEN_EVENT
+from src.utils.http_client import close_async_client
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 import traceback
 
 logger = setup_logger(__name__)
 
+NO_RESPONSE_MESSAGE = "I apologize, but I couldn't generate a response. Please try again."
+ERROR_MESSAGE = "I apologize, but I encountered an error processing your request. Please try again."
+
 
 class MarketTrendsAgent:
     """
@@ -18,6 +37,7 @@ class MarketTrendsAgent:
     def __init__(self):
         """Inicializa o agente"""
         self.graph = None
+        self.checkpointer = None
         self._initialize_agent()
 
     def _initialize_agent(self):
@@ -25,8 +45,16 @@ class MarketTrendsAgent:
         try:
             logger.info("Initializing Market Trends Agent with LangGraph...")
 
-            # Compila o grafo
-            self.graph = compile_graph()
+            # Compila o grafo (com checkpoints por sessão, se habilitado)
+            if settings.CHECKPOINT_ENABLED:
+                self.checkpointer = DynamoDbCheckpointer()
+            self.graph = compile_graph(self.checkpointer)
+
+            # Pré-aquece clientes Bedrock, schemas das tools e o schema do plano
+            llm_registry.warm(
+                tools=TOOLS.values(),
+                structured=[(AnalysisPlan, settings.ANALYZER_MAX_TOKENS)],
+            )
 
             logger.info("✅ Market Trends Agent initialized successfully")
 
@@ -39,10 +67,32 @@ class MarketTrendsAgent:
         self,
         user_input: str,
         actor_id: str,
-        session_id: str
+        session_id: str,
+        deadline: Optional[float] = None
     ) -> str:
         """
-        Processa uma requisição do usuário
+        Processa uma requisição do usuário (API síncrona).
+        Wrapper fino sobre `aprocess_request`; não usar dentro de um event loop.
+        """
+        async def _run() -> str:
+            try:
+                return await self.aprocess_request(user_input, actor_id, session_id, deadline)
+            finally:
+                await close_async_client()
+
+        return asyncio.run(_run())
+
+    async def aprocess_request(
+        self,
+        user_input: str,
+        actor_id: str,
+        session_id: str,
+        deadline: Optional[float] = None
+    ) -> str:
+        """
+        Processa uma requisição do usuário (API assíncrona).
+        `deadline` (epoch, segundos) limita a requisição inteira; sem ele,
+        vale settings.REQUEST_DEADLINE_SECONDS.
         """
         if self.graph is None:
             logger.error("Graph not initialized")
@@ -50,27 +100,24 @@ class MarketTrendsAgent:
 
         try:
             logger.info(f"Processing request from {actor_id}: {user_input[:100]}...")
+            start = time.perf_counter()
             
             
+            deadline = deadline or new_deadline()
+
             # Cria estado inicial
-            initial_state: AgentState = {
-                "messages": [{"role": "user", "content": user_input}],
-                "actor_id": actor_id,
-                "session_id": session_id,
-                "user_profile": None,
-                "conversation_history": [],
-                "tools_to_execute": [],
-                "tools_results": {},
-                "final_response": None,
-                "next_step": "analyze",
-                "topic": None,
-                "goal": None,
-                "error": None,
-                "signals": None,
-            }
-
-            # Executa o grafo
-            result = self.graph.invoke(initial_state)
+            initial_state = self._build_initial_state(user_input, actor_id, session_id, deadline)
+
+            # Executa o grafo dentro do orçamento da requisição
+            try:
+                result = await asyncio.wait_for(
+                    self.graph.ainvoke(initial_state, **self._run_options(actor_id, session_id)),
+                    timeout=max(remaining(deadline), 0),
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Request deadline exceeded; returning degraded answer")
+                metrics.incr("deadline.exceeded.request")
+                return DEADLINE_MESSAGE
         
             
             # Extrai resposta final
@@ -79,18 +126,209 @@ class MarketTrendsAgent:
                     
 
             if not response_text:
-                response_text = "I apologize, but I couldn't generate a response. Please try again."
+                response_text = NO_RESPONSE_MESSAGE
 
             if result.get("error"):
                 logger.error(f"Error in graph execution: {result['error']}")
 
+            self._persist(result)
+            self._remember_session(result)
+            self._observe_latency(result, start)
+
             logger.info(f"✅ Generated response: {response_text[:100]}...")
             return response_text
 
         except Exception:
             tb = traceback.format_exc()
             logger.error("Error processing request:\n%s", tb)
-            return "I apologize, but I encountered an error processing your request. Please try again."
+            return ERROR_MESSAGE
+
+    async def astream_request(
+        self,
+        user_input: str,
+        actor_id: str,
+        session_id: str,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Processa uma requisição emitindo eventos à medida que são gerados:
+            {"type": "status", "message": ...}  etapas intermediárias
+            {"type": "token", "content": ...}   trechos da resposta final
+            {"type": "reset"}                   descarta os tokens anteriores
+            {"type": "final", "response": ...}  resposta completa (último evento)
+        """
+        if self.graph is None:
+            logger.error("Graph not initialized")
+            yield {"type": "final", "response": "Error: Agent not initialized"}
+            return
+
+        try:
+            logger.info(f"Streaming request from {actor_id}: {user_input[:100]}...")
+            start = time.perf_counter()
+
+            deadline = deadline or new_deadline()
+            initial_state = self._build_initial_state(user_input, actor_id, session_id, deadline)
+            result = {}
+            streamed = False
+
+            # Cada espera por evento é limitada ao tempo restante (o timeout
+            # não pode envolver os `yield`, que devolvem o controle ao cliente)
+            events = self.graph.astream_events(
+                initial_state, version="v2", **self._run_options(actor_id, session_id)
+            ).__aiter__()
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(events.__anext__(), timeout=max(remaining(deadline), 0))
+                    except StopAsyncIteration:
+                        break
+
+                    kind = event["event"]
+
+                    if kind == "on_custom_event" and event["name"] == STATUS_EVENT:
+                        yield {"type": "status", "message": event["data"]}
+
+                    elif kind == "on_custom_event" and event["name"] == TOKEN_EVENT:
+                        streamed = True
+                        yield {"type": "token", "content": event["data"]}
+
+                    elif kind == "on_custom_event" and event["name"] == RESET_EVENT:
+                        streamed = False
+                        yield {"type": "reset"}
+
+                    elif kind == "on_chat_model_stream" and SYNTHESIS_TAG in event.get("tags", []):
+                        text = content_text(event["data"]["chunk"].content)
+                        if text:
+                            streamed = True
+                            yield {"type": "token", "content": text}
+
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        # Fim da execução do grafo: estado final
+                        result = event["data"].get("output") or {}
+            except asyncio.TimeoutError:
+                logger.warning("Request deadline exceeded while streaming; returning degraded answer")
+                metrics.incr("deadline.exceeded.request")
+                await events.aclose()
+                result = {"final_response": DEADLINE_MESSAGE}
+                streamed = False
+
+            response_text = result.get("final_response") or NO_RESPONSE_MESSAGE
+
+            if result.get("error"):
+                logger.error(f"Error in graph execution: {result['error']}")
+
+            self._persist(result)
+            self._remember_session(result)
+            self._observe_latency(result, start)
+
+            # Respostas que não passaram por streaming saem em um único token
+            if not streamed:
+                yield {"type": "token", "content": response_text}
+
+            logger.info(f"✅ Streamed response: {response_text[:100]}...")
+            yield {"type": "final", "response": response_text}
+
+        except Exception:
+            tb = traceback.format_exc()
+            logger.error("Error streaming request:\n%s", tb)
+            yield {"type": "final", "response": ERROR_MESSAGE}
+
+    def _run_options(self, actor_id: str, session_id: str) -> dict:
+        """
+        Config da execução: com checkpointer, o estado da sessão é retomado
+        pelo thread_id e salvo uma única vez, ao fim do turno
+        """
+        if self.checkpointer is None:
+            return {}
+
+        return {
+            "config": {"configurable": {"thread_id": thread_id_for(actor_id, session_id)}},
+            "durability": "exit",
+        }
+
+    def _persist(self, result: dict) -> None:
+        """
+        Enfileira memória do turno e episódio no write-behind (gravação em
+        background, fora do caminho da resposta)
+        """
+        if not settings.WRITE_BEHIND_ENABLED or not result.get("actor_id"):
+            return
+
+        try:
+            get_write_behind().submit(result)
+        except Exception:
+            logger.exception("Failed to enqueue turn for persistence")
+
+    @staticmethod
+    def _observe_latency(result: dict, start: float) -> None:
+        """
+        Latência do turno, também separada pela decisão do gate de memória
+        (request.seconds.memory_skipped / memory_limited / memory_full)
+        """
+        elapsed = time.perf_counter() - start
+        metrics.observe("request.seconds", elapsed)
+        if result.get("memory_gate"):
+            metrics.observe(f"request.seconds.memory_{result['memory_gate']}", elapsed)
+
+    def _remember_session(self, result: dict) -> None:
+        """
+        Guarda o estado quente da sessão para o próximo turno neste
+        container. Com checkpointer, o histórico fica no checkpoint em memória.
+        """
+        if not settings.SESSION_STORE_ENABLED or not result.get("actor_id"):
+            return
+
+        snapshot = {
+            "user_profile": result.get("user_profile"),
+            "topic": result.get("topic"),
+            # O episódio deste turno é o "último episódio" do próximo
+            "last_episode": (
+                {"goal": result["goal"], "topic": result.get("topic"), "outcome": turn_outcome(result)}
+                if result.get("goal")
+                else result.get("last_episode")
+            ),
+        }
+        if self.checkpointer is None:
+            snapshot["messages"] = list(result.get("messages") or [])
+
+        session_store.put((result["actor_id"], result.get("session_id")), snapshot)
+
+    def _build_initial_state(
+        self,
+        user_input: str,
+        actor_id: str,
+        session_id: str,
+        deadline: Optional[float] = None
+    ) -> AgentState:
+        """
+        Cria o estado inicial do grafo para um turno.
+        Com checkpointer, `messages` é acrescentada ao histórico da sessão
+        e os demais campos são reiniciados. Sem ele, o histórico vem do
+        estado quente da sessão (SessionStore), quando presente.
+        """
+        hot = session_store.get((actor_id, session_id)) if settings.SESSION_STORE_ENABLED else None
+        hot = hot or {}
+
+        return {
+            "messages": hot.get("messages", []) + [{"role": "user", "content": user_input}],
+            "actor_id": actor_id,
+            "session_id": session_id,
+            "user_profile": hot.get("user_profile"),
+            "conversation_history": [],
+            "tools_to_execute": [],
+            "tool_plan": None,
+            "tools_results": {},
+            "final_response": None,
+            "next_step": "analyze",
+            "deadline": deadline,
+            "route": None,
+            "topic": hot.get("topic"),
+            "goal": None,
+            "last_episode": hot.get("last_episode"),
+            "memory_gate": None,
+            "error": None,
+            "signals": None,
+        }
 
     def __call__(
         self,
@@ -21,20 +21,153 @@ class Settings:
     )
     MODEL_TEMPERATURE = float(os.getenv('MODEL_TEMPERATURE', '0.7'))
     MODEL_MAX_TOKENS = int(os.getenv('MODEL_MAX_TOKENS', '4096'))
+    LLM_MAX_POOL_CONNECTIONS = int(os.getenv('LLM_MAX_POOL_CONNECTIONS', '50'))
+    PROMPT_CACHE_ENABLED = os.getenv('PROMPT_CACHE_ENABLED', 'true').lower() == 'true'
     
     # Memory
     MEMORY_ID = os.getenv('MEMORY_ID')
     MEMORY_STRATEGY_ID = os.getenv('MEMORY_STRATEGY_ID')
+    # Cache das buscas na memória (por actor/sessão/namespace)
+    MEMORY_CACHE_ENABLED = os.getenv('MEMORY_CACHE_ENABLED', 'true').lower() == 'true'
+    MEMORY_CACHE_TTL = float(os.getenv('MEMORY_CACHE_TTL', '120'))
+    MEMORY_CACHE_SIMILARITY = float(os.getenv('MEMORY_CACHE_SIMILARITY', '0.8'))
+    MEMORY_CACHE_MAX_KEYS = int(os.getenv('MEMORY_CACHE_MAX_KEYS', '1024'))
+    MEMORY_CACHE_QUERIES_PER_KEY = int(os.getenv('MEMORY_CACHE_QUERIES_PER_KEY', '8'))
+    # Recuperação em paralelo nos namespaces de sessão, reflexões e preferências
+    MEMORY_RETRIEVAL_BUDGET = float(os.getenv('MEMORY_RETRIEVAL_BUDGET', '1.0'))
+    MEMORY_RETRIEVAL_MAX_RECORDS = int(os.getenv('MEMORY_RETRIEVAL_MAX_RECORDS', '8'))
+    MEMORY_RETRIEVAL_WORKERS = int(os.getenv('MEMORY_RETRIEVAL_WORKERS', '8'))
+    # Buscas em andamento por namespace (inclui as abandonadas pelo budget);
+    # acima disso o namespace é pulado, para um namespace lento não ocupar o pool
+    MEMORY_RETRIEVAL_MAX_IN_FLIGHT = int(os.getenv('MEMORY_RETRIEVAL_MAX_IN_FLIGHT', '4'))
+    MEMORY_SESSION_TOP_K = int(os.getenv('MEMORY_SESSION_TOP_K', '5'))
+    MEMORY_SESSION_MIN_SCORE = float(os.getenv('MEMORY_SESSION_MIN_SCORE', '0.0'))
+    MEMORY_REFLECTION_TOP_K = int(os.getenv('MEMORY_REFLECTION_TOP_K', '5'))
+    MEMORY_REFLECTION_MIN_SCORE = float(os.getenv('MEMORY_REFLECTION_MIN_SCORE', '0.5'))
+    # Vazio desabilita o namespace de preferências
+    MEMORY_PREFERENCE_NAMESPACE = os.getenv('MEMORY_PREFERENCE_NAMESPACE', '/preferences/{actorId}')
+    MEMORY_PREFERENCE_STRATEGY_ID = os.getenv('MEMORY_PREFERENCE_STRATEGY_ID') or None
+    MEMORY_PREFERENCE_TOP_K = int(os.getenv('MEMORY_PREFERENCE_TOP_K', '5'))
+    MEMORY_PREFERENCE_MIN_SCORE = float(os.getenv('MEMORY_PREFERENCE_MIN_SCORE', '0.7'))
+    # Recuperação condicionada à intenção (ver src/nodes/memory_gate.py)
+    MEMORY_GATE_ENABLED = os.getenv('MEMORY_GATE_ENABLED', 'true').lower() == 'true'
+    MEMORY_GATE_MIN_CONFIDENCE = float(os.getenv('MEMORY_GATE_MIN_CONFIDENCE', '0.8'))
+    MEMORY_GATE_LIMITED_RECORDS = int(os.getenv('MEMORY_GATE_LIMITED_RECORDS', '3'))
+    # Índice vetorial local (memória episódica) antes do retrieve_memory_records.
+    # Opt-in: indexa o texto bruto dos turnos, não os registros extraídos
+    VECTOR_INDEX_ENABLED = os.getenv('VECTOR_INDEX_ENABLED', 'false').lower() == 'true'
+    # "hash" (determinístico, sem modelo; só complementa a busca remota) ou
+    # "pacote.modulo:fabrica"
+    VECTOR_INDEX_EMBEDDER = os.getenv('VECTOR_INDEX_EMBEDDER', 'hash')
+    VECTOR_INDEX_DIM = int(os.getenv('VECTOR_INDEX_DIM', '256'))
+    VECTOR_INDEX_MIN_SCORE = float(os.getenv('VECTOR_INDEX_MIN_SCORE', '0.25'))
+    # Registros locais acima do score que dispensam a busca remota (só com
+    # um embedder semântico; com "hash" a busca remota sempre roda)
+    VECTOR_INDEX_MIN_HITS = int(os.getenv('VECTOR_INDEX_MIN_HITS', '3'))
+    VECTOR_INDEX_MAX_RECORDS = int(os.getenv('VECTOR_INDEX_MAX_RECORDS', '5000'))
+    VECTOR_INDEX_MAX_ACTORS = int(os.getenv('VECTOR_INDEX_MAX_ACTORS', '1024'))
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     
     # API Configuration
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '10'))
+    TOOL_TIMEOUT = float(os.getenv('TOOL_TIMEOUT', '12'))
+    TOOL_MAX_CONCURRENCY = int(os.getenv('TOOL_MAX_CONCURRENCY', '16'))
     USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+    # Sessão sync: hosts com pool próprio e conexões por host
+    HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '10'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+    # Retry (apenas métodos idempotentes), backoff exponencial com jitter
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.2'))
+    HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '2'))
+    # Circuit breaker por host
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+    # Timeout adaptativo: p99 do host x multiplicador, entre o mínimo e REQUEST_TIMEOUT
+    ADAPTIVE_TIMEOUT_MIN = float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '1'))
+    ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '3'))
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.getenv('ADAPTIVE_TIMEOUT_MIN_SAMPLES', '20'))
+    # Hedge: 2ª requisição GET após o p95 do host (apenas caminho async)
+    HTTP_HEDGING = os.getenv('HTTP_HEDGING', 'false').lower() == 'true'
+    HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', '0.05'))
+
+    # Cache de resultados das tools (TTL em segundos)
+    TOOL_CACHE_MAX_ENTRIES = int(os.getenv('TOOL_CACHE_MAX_ENTRIES', '2048'))
+    QUOTE_TTL_OPEN = float(os.getenv('QUOTE_TTL_OPEN', '15'))
+    QUOTE_TTL_CLOSED = float(os.getenv('QUOTE_TTL_CLOSED', '300'))
+    QUOTE_NEGATIVE_TTL = float(os.getenv('QUOTE_NEGATIVE_TTL', '600'))
+    NEWS_TTL = float(os.getenv('NEWS_TTL', '180'))
+    # Leitura em streaming dos feeds RSS
+    FEED_CHUNK_SIZE = int(os.getenv('FEED_CHUNK_SIZE', '8192'))
+    FEED_DRAIN_MAX_BYTES = int(os.getenv('FEED_DRAIN_MAX_BYTES', '65536'))
+    # Por quanto tempo os validadores de um feed são reaproveitados (GET condicional)
+    FEED_VALIDATOR_TTL = float(os.getenv('FEED_VALIDATOR_TTL', '3600'))
+    # Símbolos por requisição no get_stock_quotes
+    QUOTE_BATCH_SIZE = int(os.getenv('QUOTE_BATCH_SIZE', '20'))
     
     # LangGraph Configuration
     MAX_ITERATIONS = int(os.getenv('MAX_ITERATIONS', '10'))
+
+    # Janela de contexto (orçamento de tokens por nó)
+    CONTEXT_KEEP_TURNS = int(os.getenv('CONTEXT_KEEP_TURNS', '4'))
+    CONTEXT_SUMMARY_LINE_CHARS = int(os.getenv('CONTEXT_SUMMARY_LINE_CHARS', '200'))
+    ANALYZER_MAX_INPUT_TOKENS = int(os.getenv('ANALYZER_MAX_INPUT_TOKENS', '2500'))
+    EXECUTOR_MAX_INPUT_TOKENS = int(os.getenv('EXECUTOR_MAX_INPUT_TOKENS', '8000'))
+    TOOL_OUTPUT_MAX_CHARS = int(os.getenv('TOOL_OUTPUT_MAX_CHARS', '4000'))
+    STATE_MAX_MESSAGES = int(os.getenv('STATE_MAX_MESSAGES', '60'))
+
+    # Deadline de ponta a ponta por requisição (o payload pode enviar `deadline_ms`)
+    REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '30'))
+    # Tempo reservado para a síntese final após as tools
+    DEADLINE_SYNTHESIS_RESERVE = float(os.getenv('DEADLINE_SYNTHESIS_RESERVE', '4'))
+
+    # Contexto de personalização carregado em paralelo com o analyzer
+    CONTEXT_LOAD_TIMEOUT = float(os.getenv('CONTEXT_LOAD_TIMEOUT', '1.5'))
+    # DynamoDB local (ex: http://localhost:8000); vazio usa o endpoint da AWS
+    DYNAMODB_ENDPOINT_URL = os.getenv('DYNAMODB_ENDPOINT_URL') or None
+    # Checkpoints do grafo por sessão (estado retomado entre turnos)
+    CHECKPOINT_ENABLED = os.getenv('CHECKPOINT_ENABLED', 'false').lower() == 'true'
+    CHECKPOINT_TTL = float(os.getenv('CHECKPOINT_TTL', '604800'))
+
+    # Estado quente das sessões em memória do processo (antes das leituras remotas)
+    SESSION_STORE_ENABLED = os.getenv('SESSION_STORE_ENABLED', 'true').lower() == 'true'
+    SESSION_STORE_MAX_SESSIONS = int(os.getenv('SESSION_STORE_MAX_SESSIONS', '1024'))
+    SESSION_STORE_MAX_BYTES = int(os.getenv('SESSION_STORE_MAX_BYTES', str(64 * 1024 * 1024)))
+    SESSION_STORE_IDLE_TTL = float(os.getenv('SESSION_STORE_IDLE_TTL', '1800'))
+
+    # Episódios no DynamoDB (leitura do último episódio e gravação via write-behind)
+    EPISODE_LOOKUP_ENABLED = os.getenv('EPISODE_LOOKUP_ENABLED', 'true').lower() == 'true'
+
+    # Persistência write-behind (memória do turno e episódios fora do caminho da resposta).
+    # Opt-in (como CHECKPOINT_ENABLED): ligado, cada turno gera create_event no
+    # AgentCore Memory e um item de episódio no DynamoDB
+    WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+    WRITE_BEHIND_JOURNAL = os.getenv('WRITE_BEHIND_JOURNAL', '/tmp/market_agent/write_behind.jsonl')
+    WRITE_BEHIND_FSYNC = os.getenv('WRITE_BEHIND_FSYNC', 'false').lower() == 'true'
+    WRITE_BEHIND_MAX_QUEUE = int(os.getenv('WRITE_BEHIND_MAX_QUEUE', '10000'))
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '50'))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '0.5'))
+    WRITE_BEHIND_MAX_RETRIES = int(os.getenv('WRITE_BEHIND_MAX_RETRIES', '3'))
+    WRITE_BEHIND_RETRY_BACKOFF = float(os.getenv('WRITE_BEHIND_RETRY_BACKOFF', '0.5'))
+    WRITE_BEHIND_SHUTDOWN_TIMEOUT = float(os.getenv('WRITE_BEHIND_SHUTDOWN_TIMEOUT', '10'))
+
+    # Analyzer com saída estruturada (plano via tool-use forçado)
+    ANALYZER_MAX_TOKENS = int(os.getenv('ANALYZER_MAX_TOKENS', '1024'))
+    ANALYZER_REPAIR_ATTEMPTS = int(os.getenv('ANALYZER_REPAIR_ATTEMPTS', '1'))
+    # Executa diretamente o plano de tools do analyzer (sem 2ª chamada ao LLM)
+    PLAN_DIRECTED_EXECUTION = os.getenv('PLAN_DIRECTED_EXECUTION', 'true').lower() == 'true'
+
+    # Roteador local (off | shadow | active)
+    ROUTER_MODE = os.getenv('ROUTER_MODE', 'shadow').lower()
+    ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv('ROUTER_CONFIDENCE_THRESHOLD', '0.85'))
+    ROUTER_MIN_SAMPLES = int(os.getenv('ROUTER_MIN_SAMPLES', '20'))
+    ROUTER_TRAINING_LOG = os.getenv('ROUTER_TRAINING_LOG', '')
+    # Limite de tokens do classificador (aprendizado online): evicta os menos frequentes
+    ROUTER_MAX_VOCABULARY = int(os.getenv('ROUTER_MAX_VOCABULARY', '20000'))
     
     # System Prompt
     SYSTEM_PROMPT = """Você é um analista de inteligência de mercado especializado em mercados financeiros, análise de investimentos e futebol mundial, jogadores de futebol, times e noticias em geral desse nicho.
@@ -2,10 +2,15 @@
 Definição do grafo LangGraph – Market Trends Agent
 """
 
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, END
 
 from src.state import AgentState
 from src.nodes.analyzer import analyze_request
+from src.nodes.memory_loader import load_last_episode, load_memory
+from src.nodes.router import route_request
 from src.nodes.tools_executor import execute_tools
 from src.utils.logger import setup_logger
 
@@ -15,7 +20,11 @@ logger = setup_logger(__name__)
 # Constantes de estados do grafo
 # -------------------------------------------------------------------
 
+ROUTE = "route"
+LOAD_MEMORY = "load_memory"
+LOAD_EPISODE = "load_last_episode"
 ANALYZE = "analyze"
+JOIN_CONTEXT = "join_context"
 EXECUTE_TOOLS = "execute_tools"
 END_STATE = "end"
 
@@ -24,6 +33,28 @@ END_STATE = "end"
 # Funções de decisão (roteamento condicional)
 # -------------------------------------------------------------------
 
+def should_analyze(state: AgentState) -> str:
+    """
+    Decide se o roteador local já definiu o plano de tools.
+
+    Retorna:
+        - EXECUTE_TOOLS: quando o roteador decidiu com confiança alta
+        - ANALYZE: quando a decisão fica com o analyzer (LLM)
+    """
+    return EXECUTE_TOOLS if state.get("next_step") == EXECUTE_TOOLS else ANALYZE
+
+
+def fan_out_context(state: AgentState) -> list:
+    """
+    Ramos paralelos após o roteador: memória e último episódio sempre;
+    o analyzer só quando o roteador não decidiu o plano.
+    """
+    branches = [LOAD_MEMORY, LOAD_EPISODE]
+    if should_analyze(state) == ANALYZE:
+        branches.append(ANALYZE)
+    return branches
+
+
 def should_execute_tools(state: AgentState) -> str:
     """
     Decide se o fluxo deve executar ferramentas ou finalizar.
@@ -35,6 +66,19 @@ def should_execute_tools(state: AgentState) -> str:
     return EXECUTE_TOOLS if state.get("next_step") == EXECUTE_TOOLS else END_STATE
 
 
+# -------------------------------------------------------------------
+# Nó de junção
+# -------------------------------------------------------------------
+
+def join_context(state: AgentState) -> dict:
+    """
+    Barreira dos ramos paralelos (nó deferred): roda uma única vez, depois
+    que todos os ramos disparados terminaram. Os resultados já chegam
+    mesclados no estado pelos reducers.
+    """
+    return {}
+
+
 # -------------------------------------------------------------------
 # Builder do grafo
 # -------------------------------------------------------------------
@@ -44,8 +88,13 @@ def create_market_agent_graph() -> StateGraph:
     Cria e configura o grafo do Market Trends Agent.
 
     Fluxo:
-        analyze -> (condicional) -> execute_tools -> END
-                          └────> END
+                  ┌─> load_memory ───────┐
+        route ────┼─> load_last_episode ─┼─> join_context -> (condicional) -> execute_tools -> END
+                  └─> analyze* ──────────┘                       └────> END
+
+        * analyze só é disparado quando o roteador local não decidiu o plano.
+        Memória e episódio rodam em paralelo com o analyzer, fora do caminho
+        crítico (cada leitura tem timeout próprio).
 
     Returns:
         StateGraph configurado
@@ -57,19 +106,35 @@ def create_market_agent_graph() -> StateGraph:
     # ---------------------------
     # Nós
     # ---------------------------
+    workflow.add_node(ROUTE, route_request)
+    workflow.add_node(LOAD_MEMORY, load_memory)
+    workflow.add_node(LOAD_EPISODE, load_last_episode)
     workflow.add_node(ANALYZE, analyze_request)
+    workflow.add_node(JOIN_CONTEXT, join_context, defer=True)
     workflow.add_node(EXECUTE_TOOLS, execute_tools)
 
     # ---------------------------
     # Ponto de entrada
     # ---------------------------
-    workflow.set_entry_point(ANALYZE)
+    workflow.set_entry_point(ROUTE)
 
     # ---------------------------
     # Transições
     # ---------------------------
+    # Fan-out: ramos disparados no mesmo superstep
+    workflow.add_conditional_edges(
+        ROUTE,
+        fan_out_context,
+        [LOAD_MEMORY, LOAD_EPISODE, ANALYZE]
+    )
+
+    # Fan-in: join_context espera todos os ramos disparados
+    workflow.add_edge(LOAD_MEMORY, JOIN_CONTEXT)
+    workflow.add_edge(LOAD_EPISODE, JOIN_CONTEXT)
+    workflow.add_edge(ANALYZE, JOIN_CONTEXT)
+
     workflow.add_conditional_edges(
-        ANALYZE,
+        JOIN_CONTEXT,
         should_execute_tools,
         {
             EXECUTE_TOOLS: EXECUTE_TOOLS,
@@ -90,11 +155,14 @@ def create_market_agent_graph() -> StateGraph:
 # Compile
 # -------------------------------------------------------------------
 
-def compile_graph():
+def compile_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
     """
     Compila o grafo para uso em runtime.
 
+    Args:
+        checkpointer: persiste o estado por thread (sessão) entre turnos
+
     Returns:
         Grafo LangGraph compilado
     """
-    return create_market_agent_graph().compile()
+    return create_market_agent_graph().compile(checkpointer=checkpointer)
@@ -0,0 +1,216 @@
+"""
+Gerenciador da janela de contexto enviada ao LLM
+
+Mantém o tamanho do prompt estável conforme a sessão cresce:
+- os últimos N turnos seguem na íntegra
+- turnos mais antigos viram um resumo extrativo (ou são descartados)
+- saídas de tools muito grandes são truncadas
+- o total respeita um teto de tokens de entrada por nó
+
+A contagem de tokens é uma estimativa (≈ 4 caracteres por token),
+suficiente para orçamento e sem custo de tokenização.
+"""
+import json
+from typing import Any, List, Optional
+
+from langchain_core.messages import SystemMessage
+
+from src.config.settings import settings
+from src.llm.messages import content_text
+from src.utils.metrics import metrics
+
+CHARS_PER_TOKEN = 4
+# Overhead aproximado por mensagem (role, delimitadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TRUNCATION_MARKER = "\n…[conteúdo truncado]"
+
+_ROLE_BY_TYPE = {"human": "user", "ai": "assistant", "system": "system", "tool": "tool"}
+
+
+# ---------- helpers de mensagem (dict ou BaseMessage) ----------
+
+def message_role(message: Any) -> Optional[str]:
+    if isinstance(message, dict):
+        return message.get("role")
+    return _ROLE_BY_TYPE.get(getattr(message, "type", None), getattr(message, "type", None))
+
+
+def message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        return content_text(message.get("content"))
+    return content_text(getattr(message, "content", ""))
+
+
+def last_user_text(messages: List[Any]) -> Optional[str]:
+    """Texto da última mensagem do usuário (None se não houver)"""
+    for message in reversed(messages or []):
+        if message_role(message) == "user":
+            return message_text(message)
+    return None
+
+
+def estimate_tokens(message: Any) -> int:
+    """Estimativa de tokens de uma mensagem (texto + tool calls)"""
+    chars = len(message_text(message))
+    tool_calls = getattr(message, "tool_calls", None) if not isinstance(message, dict) else None
+    if tool_calls:
+        chars += len(json.dumps([c.get("args", {}) for c in tool_calls], default=str))
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_total_tokens(messages: List[Any]) -> int:
+    return sum(estimate_tokens(m) for m in messages)
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    return text[:max_chars] + TRUNCATION_MARKER
+
+
+def _with_content(message: Any, content: str) -> Any:
+    """Cópia da mensagem com novo conteúdo (o estado nunca é mutado)"""
+    if isinstance(message, dict):
+        return {**message, "content": content}
+    return message.model_copy(update={"content": content})
+
+
+def _truncate_message(message: Any, max_chars: int) -> Any:
+    text = message_text(message)
+    if len(text) <= max_chars:
+        return message
+    metrics.incr("context_window.truncated_messages")
+    return _with_content(message, truncate_text(text, max_chars))
+
+
+# ---------- janela ----------
+
+def _split_turns(messages: List[Any]) -> tuple:
+    """
+    Separa mensagens de sistema (ex: contexto de memória) e agrupa o
+    restante em turnos. Cada turno começa em uma mensagem do usuário, o que
+    mantém tool calls e seus ToolMessages sempre juntos.
+    """
+    system, turns, current = [], [], None
+
+    for message in messages:
+        role = message_role(message)
+        if role == "system":
+            system.append(message)
+        elif role == "user":
+            current = [message]
+            turns.append(current)
+        elif current is not None:
+            current.append(message)
+        # Mensagens órfãs antes do primeiro usuário são descartadas
+
+    return system, turns
+
+
+def _summarize_turns(turns: List[List[Any]], line_chars: int) -> List[str]:
+    """Resumo extrativo: pergunta do usuário e resposta final de cada turno"""
+    lines = []
+    for turn in turns:
+        user_text = message_text(turn[0]).strip().replace("\n", " ")
+        answer = next(
+            (
+                message_text(m).strip().replace("\n", " ")
+                for m in reversed(turn)
+                if message_role(m) == "assistant" and message_text(m).strip()
+            ),
+            "",
+        )
+        line = f"- Usuário: {truncate_text(user_text, line_chars)}"
+        if answer:
+            line += f" | Assistente: {truncate_text(answer, line_chars)}"
+        lines.append(line)
+    return lines
+
+
+def _summary_message(lines: List[str]) -> Optional[SystemMessage]:
+    if not lines:
+        return None
+    return SystemMessage(content="Resumo de turnos anteriores da conversa:\n" + "\n".join(lines))
+
+
+def build_context(
+    messages: List[Any],
+    max_tokens: int,
+    reserved_tokens: int = 0,
+    keep_turns: Optional[int] = None,
+    max_tool_chars: Optional[int] = None,
+) -> List[Any]:
+    """
+    Monta a lista de mensagens para o LLM dentro do orçamento.
+
+    Args:
+        messages: mensagens do estado (dicts ou BaseMessage)
+        max_tokens: teto de tokens de entrada do nó
+        reserved_tokens: tokens já usados pelo prefixo (system prompt)
+        keep_turns: turnos recentes mantidos na íntegra
+        max_tool_chars: limite de caracteres por saída de tool / contexto
+
+    Returns:
+        Nova lista (o estado não é alterado)
+    """
+    keep_turns = settings.CONTEXT_KEEP_TURNS if keep_turns is None else keep_turns
+    max_tool_chars = settings.TOOL_OUTPUT_MAX_CHARS if max_tool_chars is None else max_tool_chars
+    budget = max_tokens - reserved_tokens
+
+    system, turns = _split_turns(messages)
+    system = [_truncate_message(m, max_tool_chars) for m in system]
+
+    recent = turns[-keep_turns:] if keep_turns > 0 else turns[-1:]
+    older = turns[:len(turns) - len(recent)]
+
+    recent = [
+        [_truncate_message(m, max_tool_chars) if message_role(m) == "tool" else m for m in turn]
+        for turn in recent
+    ]
+    summary_lines = _summarize_turns(older, settings.CONTEXT_SUMMARY_LINE_CHARS)
+
+    def assemble() -> List[Any]:
+        summary = _summary_message(summary_lines)
+        head = system + ([summary] if summary else [])
+        return head + [m for turn in recent for m in turn]
+
+    context = assemble()
+
+    # Teto: descarta primeiro o resumo mais antigo, depois turnos antigos
+    while estimate_total_tokens(context) > budget:
+        if summary_lines:
+            summary_lines.pop(0)
+        elif len(recent) > 1:
+            recent.pop(0)
+        else:
+            break
+        metrics.incr("context_window.dropped")
+        context = assemble()
+
+    # Último recurso: trunca agressivamente o turno atual e o contexto
+    if estimate_total_tokens(context) > budget:
+        hard_limit = max(budget * CHARS_PER_TOKEN // max(len(context), 1), 200)
+        context = [
+            m if message_role(m) == "user" else _truncate_message(m, hard_limit)
+            for m in context
+        ]
+
+    metrics.observe("context_window.tokens", estimate_total_tokens(context) + reserved_tokens)
+    return context
+
+
+def append_window(left: List[Any], right: List[Any]) -> List[Any]:
+    """
+    Reducer do canal `messages`: concatena como `operator.add`, mas mantém
+    apenas as últimas STATE_MAX_MESSAGES mensagens no estado.
+    Mensagens de contexto (dict com chave "context", ex: memória) substituem
+    a anterior com a mesma chave, para não se acumularem entre turnos.
+    """
+    replaced = {m["context"] for m in right or [] if isinstance(m, dict) and m.get("context")}
+    if replaced:
+        left = [m for m in left or [] if not (isinstance(m, dict) and m.get("context") in replaced)]
+    merged = list(left or []) + list(right or [])
+    if len(merged) > settings.STATE_MAX_MESSAGES:
+        merged = merged[-settings.STATE_MAX_MESSAGES:]
+    return merged
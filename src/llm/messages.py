@@ -0,0 +1,26 @@
+"""
+Helpers para mensagens retornadas pelos chat models
+"""
+from typing import Any
+
+
+def content_text(content: Any) -> str:
+    """
+    Extrai o texto do `content` de uma mensagem.
+
+    A Converse API pode devolver uma lista de blocos
+    ([{"type": "text", "text": ...}, {"type": "tool_use", ...}]),
+    principalmente em chunks de streaming.
+    """
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+
+    parts = []
+    for block in content:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return "".join(parts)
@@ -0,0 +1,94 @@
+"""
+Prompt caching do Bedrock (cache checkpoints da Converse API)
+
+Os prompts são montados como prefixo estável (system prompt, catálogo de
+tools) + sufixo variável (mensagens do turno). Um bloco `cachePoint` marca
+o fim do prefixo, para que o Bedrock reaproveite o processamento desses
+tokens entre chamadas nos modelos que suportam cache.
+"""
+from typing import List
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from src.config.settings import settings
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+# Famílias de modelos com suporte a prompt caching no Bedrock
+_CACHE_MODEL_PREFIXES = (
+    "amazon.nova-micro",
+    "amazon.nova-lite",
+    "amazon.nova-pro",
+    "amazon.nova-premier",
+    "anthropic.claude-3-5-haiku",
+    "anthropic.claude-3-7-sonnet",
+    "anthropic.claude-sonnet-4",
+    "anthropic.claude-opus-4",
+    "anthropic.claude-haiku-4",
+)
+
+# Prefixos de inference profiles cross-region ("us.amazon.nova-pro-v1:0")
+_PROFILE_PREFIXES = ("us.", "eu.", "apac.", "global.")
+
+
+def supports_prompt_cache(model_id: str) -> bool:
+    """Indica se o modelo aceita cache checkpoints (e se o cache está ligado)"""
+    if not settings.PROMPT_CACHE_ENABLED or not model_id:
+        return False
+
+    for prefix in _PROFILE_PREFIXES:
+        if model_id.startswith(prefix):
+            model_id = model_id[len(prefix):]
+            break
+
+    return model_id.startswith(_CACHE_MODEL_PREFIXES)
+
+
+def cached_system_message(*parts: str, model_id: str = None) -> SystemMessage:
+    """
+    System message com o prefixo estável seguido de um cache checkpoint
+    (quando suportado). Sem suporte, retorna o texto puro.
+    """
+    text = "\n\n".join(parts)
+    if not supports_prompt_cache(model_id or settings.MODEL_ID):
+        return SystemMessage(content=text)
+
+    return SystemMessage(content=[{"type": "text", "text": text}, CACHE_POINT])
+
+
+def tools_with_cache_point(tools: List, model_id: str) -> List:
+    """Acrescenta um checkpoint após as definições das tools (toolConfig)"""
+    if not supports_prompt_cache(model_id):
+        return list(tools)
+    return [*tools, CACHE_POINT]
+
+
+def record_prompt_usage(node: str, message: BaseMessage) -> None:
+    """
+    Registra tokens de entrada em cache vs. não cacheados de uma chamada.
+    Usa `usage_metadata` (input_token_details.cache_read/cache_creation).
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+
+    details = usage.get("input_token_details") or {}
+    input_tokens = usage.get("input_tokens", 0)
+    cache_read = details.get("cache_read", 0) or 0
+    cache_write = details.get("cache_creation", 0) or 0
+    uncached = max(input_tokens - cache_read - cache_write, 0)
+
+    metrics.incr(f"prompt_cache.{node}.calls")
+    metrics.incr(f"prompt_cache.{node}.input_tokens", input_tokens)
+    metrics.incr(f"prompt_cache.{node}.cache_read_tokens", cache_read)
+    metrics.incr(f"prompt_cache.{node}.cache_write_tokens", cache_write)
+    metrics.incr(f"prompt_cache.{node}.uncached_tokens", uncached)
+
+    logger.info(
+        f"Prompt usage [{node}]: input={input_tokens} cached={cache_read} "
+        f"cache_write={cache_write} uncached={uncached} output={usage.get('output_tokens', 0)}"
+    )
@@ -0,0 +1,244 @@
+"""
+Registry process-wide de clientes LLM (Bedrock)
+
+Evita recriar ChatBedrock, clientes boto3 e schemas de tools a cada turno:
+- um cliente boto3 (bedrock-runtime / bedrock) por região, com pool de conexões
+- um chat model por (model_id, região, parâmetros de geração)
+- um runnable com tools já vinculadas por (chat model, conjunto de tools)
+- um runnable com schema de saída (tool-use forçado) por (chat model, schema)
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple, Type
+
+import boto3
+from botocore.config import Config
+from langchain_aws import ChatBedrockConverse
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+
+from src.config.settings import settings
+from src.llm.prompt_cache import tools_with_cache_point
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+
+class LLMKey(NamedTuple):
+    """Chave de cache de um cliente LLM"""
+    model_id: str
+    region: str
+    temperature: float
+    max_tokens: int
+    tools: Tuple[str, ...] = ()
+
+
+class LLMClientRegistry:
+    """
+    Registry thread-safe de chat models e runnables com tools vinculadas.
+
+    Todos os objetos retornados são compartilhados entre requisições;
+    clientes boto3 e ChatBedrockConverse são seguros para uso concorrente.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._aws_clients: Dict[Tuple[str, str], object] = {}
+        self._models: Dict[LLMKey, ChatBedrockConverse] = {}
+        self._bound: Dict[LLMKey, Runnable] = {}
+
+    # ---------- API pública ----------
+    def get_chat_model(
+        self,
+        model_id: Optional[str] = None,
+        region: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> ChatBedrockConverse:
+        """Retorna (criando se necessário) o chat model para os parâmetros"""
+        key = self._build_key(model_id, region, temperature, max_tokens)
+
+        model = self._models.get(key)
+        if model is not None:
+            metrics.incr("llm_registry.model.hit")
+            return model
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                metrics.incr("llm_registry.model.hit")
+                return model
+
+            metrics.incr("llm_registry.model.miss")
+            start = time.perf_counter()
+            model = self._create_chat_model(key)
+            metrics.observe("llm_registry.model.build_seconds", time.perf_counter() - start)
+
+            self._models[key] = model
+            return model
+
+    def get_tool_model(
+        self,
+        tools: Iterable[BaseTool],
+        model_id: Optional[str] = None,
+        region: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Runnable:
+        """Retorna o chat model com `bind_tools` já aplicado (schemas cacheados)"""
+        tools = list(tools)
+        base_key = self._build_key(model_id, region, temperature, max_tokens)
+        key = base_key._replace(tools=tuple(sorted(t.name for t in tools)))
+
+        # Checkpoint de cache após as definições das tools (prefixo estável)
+        return self._get_bound(
+            key,
+            lambda model: model.bind_tools(tools_with_cache_point(tools, key.model_id)),
+        )
+
+    def get_structured_model(
+        self,
+        schema: Type[BaseModel],
+        model_id: Optional[str] = None,
+        region: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Runnable:
+        """
+        Retorna o chat model com o schema vinculado como única tool e
+        `tool_choice` forçado (quando o modelo suporta). A resposta chega
+        como tool call com argumentos no formato do schema.
+        """
+        base_key = self._build_key(model_id, region, temperature, max_tokens)
+        key = base_key._replace(tools=(f"schema:{schema.__name__}",))
+
+        def bind(model: ChatBedrockConverse) -> Runnable:
+            return model.bind_tools(
+                tools_with_cache_point([schema], key.model_id),
+                tool_choice=self._forced_tool_choice(model, schema),
+            )
+
+        return self._get_bound(key, bind)
+
+    def warm(
+        self,
+        tools: Optional[Iterable[BaseTool]] = None,
+        structured: Iterable[Tuple[Type[BaseModel], Optional[int]]] = (),
+    ) -> None:
+        """
+        Pré-aquece clientes e schemas (chamado na inicialização do agente),
+        tirando a construção e a resolução de credenciais do caminho quente.
+        `structured` lista pares (schema, max_tokens) de saídas estruturadas.
+        """
+        try:
+            self.get_chat_model()
+            if tools is not None:
+                self.get_tool_model(tools)
+            for schema, max_tokens in structured:
+                self.get_structured_model(schema, max_tokens=max_tokens)
+            logger.info("LLM client registry warmed")
+        except Exception:
+            logger.exception("Failed to warm LLM client registry")
+
+    def stats(self) -> dict:
+        """Resumo de uso do registry (tamanho e taxa de acerto)"""
+        return {
+            "models": len(self._models),
+            "bound_runnables": len(self._bound),
+            "model_hit_rate": metrics.ratio("llm_registry.model.hit", "llm_registry.model.miss"),
+            "bound_hit_rate": metrics.ratio("llm_registry.bound.hit", "llm_registry.bound.miss"),
+            **metrics.snapshot("llm_registry."),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._bound.clear()
+            self._aws_clients.clear()
+
+    # ---------- helpers ----------
+    def _get_bound(self, key: LLMKey, bind: Callable[[ChatBedrockConverse], Runnable]) -> Runnable:
+        bound = self._bound.get(key)
+        if bound is not None:
+            metrics.incr("llm_registry.bound.hit")
+            return bound
+
+        with self._lock:
+            bound = self._bound.get(key)
+            if bound is not None:
+                metrics.incr("llm_registry.bound.hit")
+                return bound
+
+            metrics.incr("llm_registry.bound.miss")
+            model = self.get_chat_model(*key[:4])
+
+            start = time.perf_counter()
+            bound = bind(model)
+            metrics.observe("llm_registry.bound.build_seconds", time.perf_counter() - start)
+
+            self._bound[key] = bound
+            return bound
+
+    @staticmethod
+    def _forced_tool_choice(model: ChatBedrockConverse, schema: Type[BaseModel]) -> Optional[str]:
+        """
+        tool_choice mais restritivo suportado: a tool específica, "any" ou
+        nenhum (ex: Nova aceita só "auto"; com uma única tool e instruções
+        explícitas o modelo ainda responde via tool call).
+        """
+        supported = model.supports_tool_choice_values or ()
+        if "tool" in supported:
+            return schema.__name__
+        if "any" in supported:
+            return "any"
+        return None
+
+    def _build_key(
+        self,
+        model_id: Optional[str],
+        region: Optional[str],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> LLMKey:
+        return LLMKey(
+            model_id=model_id or settings.MODEL_ID,
+            region=region or settings.AWS_REGION,
+            temperature=settings.MODEL_TEMPERATURE if temperature is None else temperature,
+            max_tokens=max_tokens or settings.MODEL_MAX_TOKENS,
+        )
+
+    def _get_aws_client(self, service: str, region: str):
+        key = (service, region)
+        client = self._aws_clients.get(key)
+        if client is None:
+            session = boto3.session.Session()
+            # Resolve credenciais agora, e não na primeira chamada do usuário
+            session.get_credentials()
+            client = session.client(
+                service,
+                region_name=region,
+                config=Config(
+                    max_pool_connections=settings.LLM_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True,
+                    retries={"max_attempts": 3, "mode": "adaptive"},
+                ),
+            )
+            self._aws_clients[key] = client
+        return client
+
+    def _create_chat_model(self, key: LLMKey) -> ChatBedrockConverse:
+        logger.info(f"Creating chat model: {key.model_id} ({key.region})")
+        return ChatBedrockConverse(
+            model=key.model_id,
+            region_name=key.region,
+            temperature=key.temperature,
+            max_tokens=key.max_tokens,
+            client=self._get_aws_client("bedrock-runtime", key.region),
+            bedrock_client=self._get_aws_client("bedrock", key.region),
+        )
+
+
+# Instância global do registry
+llm_registry = LLMClientRegistry()
@@ -1,16 +1,85 @@
-import json
-from langchain_aws import ChatBedrock
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from pydantic import BaseModel, Field, ValidationError, model_validator
 
 from src.config.settings import settings
+from src.llm.context_window import CHARS_PER_TOKEN, estimate_tokens, last_user_text, truncate_text
+from src.llm.messages import content_text
+from src.llm.prompt_cache import cached_system_message, record_prompt_usage
+from src.llm.registry import llm_registry
+from src.nodes.router import router
 from src.state import AgentState
+from src.utils.deadline import DEADLINE_MESSAGE, DeadlineExceeded, bounded_timeout
+from src.utils.events import emit_reset, emit_status, emit_token
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 logger = setup_logger(__name__)
 
 
+class PlannedToolCall(BaseModel):
+    """Uma chamada de ferramenta do plano"""
+    name: str = Field(description="Nome da ferramenta")
+    args: Dict[str, Any] = Field(default_factory=dict, description="Argumentos da ferramenta")
+
+
+class AnalysisPlan(BaseModel):
+    """Plano de atendimento da mensagem do usuário"""
+    needs_tools: bool = Field(description="true se alguma ferramenta precisa ser chamada")
+    tool_calls: List[PlannedToolCall] = Field(
+        default_factory=list,
+        description="Uma entrada por chamada; repita a ferramenta quando precisar de várias buscas distintas",
+    )
+    goal: str = Field(default="", description="Intenção real do input do usuário")
+    topic: str = Field(default="", description="Tópico raiz da intenção. Exemplo: Futebol, Finanças")
+    direct_response: str = Field(default="", description="Resposta ao usuário quando needs_tools for false")
+
+    @model_validator(mode="after")
+    def _check_consistency(self) -> "AnalysisPlan":
+        if self.needs_tools and not self.tool_calls:
+            raise ValueError("needs_tools=true exige ao menos uma entrada em tool_calls")
+        if not self.needs_tools and not self.direct_response.strip():
+            raise ValueError("needs_tools=false exige direct_response preenchido")
+        return self
+
+    @property
+    def tools_needed(self) -> List[str]:
+        return list(dict.fromkeys(call.name for call in self.tool_calls))
+
+    def to_tool_plan(self) -> List[dict]:
+        """Plano no formato do estado: [{"name": ..., "args": {...}}]"""
+        return [{"name": call.name, "args": call.args} for call in self.tool_calls]
+
+
+PLAN_TOOL_NAME = AnalysisPlan.__name__
 
-def analyze_request(state: AgentState) -> dict:
+FALLBACK_RESPONSE = "Não consegui entender a solicitação. Pode reformular a pergunta?"
+
+# Instruções estáticas do analyzer (catálogo de tools + formato de saída)
+ANALYSIS_INSTRUCTIONS = f"""Considerando a mensagem do usuário, determine quais ferramentas (se houver) devem ser chamadas.
+
+Ferramentas disponíveis:
+- get_stock_data(symbol): Obter dados de preços de ações em tempo real para um determinado símbolo
+- get_stock_quotes(symbols): Cotações de vários símbolos de uma vez (use quando houver mais de um símbolo)
+- search_news(query, news_source="yahoo finance" | "reuters"): Pesquisar notícias financeiras
+- search_football_news(query, scope="br" | "global", limit): Pesquisar notícias do futebol mundial
+- get_user_for_request_food_action: Ação que envolve pegar informações do user para prosseguir com pedido de comida
+- get_restaurants: Pega localização que veio do resultado da tool get_user_for_request_food_action() e busca restaurantes perto dessal ocalização
+- request_order: Faz pedido de itens ao restaurante escolhido
+
+Responda SEMPRE chamando a ferramenta {PLAN_TOOL_NAME}, nunca em texto livre.
+Em tool_calls, use uma entrada por chamada (a mesma ferramenta pode aparecer mais de uma vez).
+Caso não sejam necessárias ferramentas, defina needs_tools como false e forneça a resposta direta em direct_response."""
+
+# Prefixo estável (system prompt + instruções) com cache checkpoint;
+# construído uma única vez por processo. Só a mensagem do usuário varia.
+ANALYSIS_SYSTEM_MESSAGE = cached_system_message(settings.SYSTEM_PROMPT, ANALYSIS_INSTRUCTIONS)
+ANALYSIS_PREFIX_TOKENS = estimate_tokens(ANALYSIS_SYSTEM_MESSAGE)
+
+
+async def analyze_request(state: AgentState) -> dict:
     """
     Analisa a requisição do usuário e decide próximos passos.
     Retorna APENAS o delta do estado (patch).
@@ -18,94 +87,190 @@ def analyze_request(state: AgentState) -> dict:
     try:
         logger.info("Analyzing user request...")
 
-        messages = state.get("messages", [])
-        user_messages = [m for m in messages if m.get("role") == "user"]
+        # Pega a última mensagem do usuário
+        user_input = last_user_text(state.get("messages", []))
 
-        if not user_messages:
+        if user_input is None:
             return {
                 "error": "No user messages to process",
                 "next_step": "end",
             }
 
-        # Pega a última mensagem do usuário
-        last_user_message = user_messages[-1]
-        user_input = last_user_message.get("content", "")
-
-        llm = ChatBedrock(
-            model_id=settings.MODEL_ID,
-            region_name=settings.AWS_REGION,
-            model_kwargs={
-                "temperature": settings.MODEL_TEMPERATURE,
-                "max_tokens": settings.MODEL_MAX_TOKENS,
-            },
-        )
-        
-        
-        analysis_prompt = ChatPromptTemplate.from_messages([
-                    ("system", settings.SYSTEM_PROMPT),
-                    ("system", """Considerando a mensagem do usuário, determine quais ferramentas (se houver) devem ser chamadas.
-
-        Ferramentas disponíveis:
-        - get_stock_data: Obter dados de preços de ações em tempo real para um determinado símbolo
-        - search_news: Pesquisar notícias financeiras
-        - search_football_news: Pesquisar notícias do futebol mundial
-        - get_user_for_request_food_action: Ação que envolve pegar informações do user para prosseguir com pedido de comida
-        - get_restaurants: Pega localização que veio do resultado da tool get_user_for_request_food_action() e busca restaurantes perto dessal ocalização
-        - request_order: Faz pedido de itens ao restaurante escolhido
- 
-        Responda com um objeto JSON contendo:
-        {{
-            "tools_needed": ["tool1", "tool2"],
-            "tool_params": {{"tool1": {{"param": "value"}}}},
-            "reasoning": "Por que essas ferramentas são necessárias?",
-            "goal" "Intenção real do input do usuário",
-            "topic": "Tópico raiz da intenção. Exemplo: Futebol, Finanças"
-            "needs_tools": true/false
-        }}
-
-        Caso não sejam necessárias ferramentas, defina needs_tools como false e forneça uma resposta direta."""),
-                    ("human", "{input}")
-                ])
-
-        chain = analysis_prompt | llm
-        response = chain.invoke({"input": user_input})
-        content = response.content
-
-        # Parse defensivo
+        llm = llm_registry.get_structured_model(AnalysisPlan, max_tokens=settings.ANALYZER_MAX_TOKENS)
+
+        await emit_status("Analisando sua solicitação…")
+
+        # Teto de entrada do analyzer: prefixo fixo + mensagem (truncada se preciso)
+        max_input_chars = (settings.ANALYZER_MAX_INPUT_TOKENS - ANALYSIS_PREFIX_TOKENS) * CHARS_PER_TOKEN
+        prompt = [ANALYSIS_SYSTEM_MESSAGE, HumanMessage(content=truncate_text(user_input, max_input_chars))]
+
+        # O analyzer deixa tempo para a execução das tools e a síntese
         try:
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-            else:
-                json_str = content[content.find("{"): content.rfind("}") + 1]
-            analysis = json.loads(json_str)
-        except Exception:
-            analysis = {
-                "needs_tools": False,
-                "direct_response": content,
+            plan, response = await asyncio.wait_for(
+                _request_plan(llm, prompt),
+                timeout=bounded_timeout(None, state.get("deadline"), reserve=settings.DEADLINE_SYNTHESIS_RESERVE),
+            )
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            logger.warning("Analyzer ran out of request budget")
+            metrics.incr("deadline.exceeded.analyzer")
+            return {
+                "final_response": DEADLINE_MESSAGE,
+                "next_step": "end",
+                "error": False
             }
 
-        if analysis.get("needs_tools"):
+        if plan is None:
+            # Sem plano válido após o reparo: responde com o texto do modelo (se houver)
+            metrics.incr("analyzer.plan.fallback")
+            text = content_text(response.content).strip() if response is not None else ""
+            answer = text or FALLBACK_RESPONSE
             return {
-                "tools_to_execute": analysis.get("tools_needed", []),
+                "final_response": answer,
+                "messages": [{"role": "assistant", "content": answer}],
+                "next_step": "end",
+                "error": False
+            }
+
+        # Shadow do roteador local + amostra de treino do classificador
+        router.record_analyzer_outcome(
+            user_input,
+            {**plan.model_dump(), "tools_needed": plan.tools_needed},
+            state.get("route"),
+        )
+
+        if plan.needs_tools:
+            return {
+                "tools_to_execute": plan.tools_needed,
+                "tool_plan": plan.to_tool_plan(),
                 "next_step": "execute_tools",
-                "goal": analysis.get("goal"),
-                "topic": analysis.get("topic"),
+                "goal": plan.goal,
+                "topic": plan.topic,
                 "error": False
             }
 
+        # A resposta entra no histórico (retomado do checkpoint no próximo turno)
         return {
-            "final_response": analysis.get("direct_response", content),
+            "final_response": plan.direct_response,
+            "messages": [{"role": "assistant", "content": plan.direct_response}],
             "next_step": "end",
-            "goal": analysis.get("goal"),
-            "topic": analysis.get("topic"),
+            "goal": plan.goal,
+            "topic": plan.topic,
             "error": False
         }
 
-    except Exception as e:
+    except Exception:
         logger.exception("Error in analyze_request")
         return {
             "next_step": "end",
-            "goal": analysis.get("goal"),
-            "topic": analysis.get("topic"),
             "error": True
         }
+
+
+async def _request_plan(llm, prompt: list) -> Tuple[Optional[AnalysisPlan], Optional[AIMessage]]:
+    """
+    Chama o modelo (tool-use forçado) e valida o plano. Em caso de falha,
+    devolve o erro de validação ao modelo e tenta de novo, no máximo
+    ANALYZER_REPAIR_ATTEMPTS vezes. Retorna (plano ou None, última resposta).
+    """
+    messages = list(prompt)
+    response = None
+    streamed = ""
+
+    for attempt in range(settings.ANALYZER_REPAIR_ATTEMPTS + 1):
+        if attempt:
+            metrics.incr("analyzer.plan.repair_attempt")
+
+        # Texto emitido por uma tentativa rejeitada não vale para a próxima
+        streamed = await _reset_stream(streamed)
+        response = None
+        # Streaming: a resposta direta é repassada ao usuário enquanto é gerada
+        async for chunk in llm.astream(messages):
+            response = chunk if response is None else response + chunk
+            streamed = await _stream_direct_response(response, streamed)
+
+        if response is None:
+            metrics.incr("analyzer.plan.parse_failure.empty")
+            continue
+
+        record_prompt_usage("analyzer", response)
+
+        plan, error, call = _parse_plan(response)
+        if plan is not None:
+            await _finish_stream(plan, streamed)
+            metrics.incr("analyzer.plan.success")
+            if attempt:
+                metrics.incr("analyzer.plan.repaired")
+            return plan, response
+
+        metrics.incr(f"analyzer.plan.parse_failure.{'invalid' if call else 'no_tool_call'}")
+        logger.warning(f"Invalid analyzer plan (attempt {attempt + 1}): {error}")
+
+        messages.extend(_repair_messages(response, call, error))
+
+    # Sem plano válido: a resposta final (fallback) não é o texto já emitido
+    await _reset_stream(streamed)
+    return None, response
+
+
+def _parse_plan(response: AIMessage) -> Tuple[Optional[AnalysisPlan], Optional[str], Optional[dict]]:
+    """Retorna (plano, erro, tool call) a partir da resposta do modelo"""
+    call = next((c for c in response.tool_calls if c.get("name") == PLAN_TOOL_NAME), None)
+    if call is None:
+        return None, f"a resposta não chamou a ferramenta {PLAN_TOOL_NAME}", None
+
+    try:
+        return AnalysisPlan.model_validate(call.get("args") or {}), None, call
+    except ValidationError as e:
+        return None, str(e), call
+
+
+def _repair_messages(response: AIMessage, call: Optional[dict], error: str) -> list:
+    """Mensagens de reparo: a saída inválida + o erro para o modelo corrigir"""
+    instruction = f"Saída inválida: {error}. Chame {PLAN_TOOL_NAME} novamente com os campos corrigidos."
+    if call is None:
+        return [AIMessage(content=content_text(response.content) or "..."), HumanMessage(content=instruction)]
+
+    # tool_use precisa ser seguido do respectivo tool_result
+    return [
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(tool_call_id=call["id"], content=instruction, status="error"),
+    ]
+
+
+async def _stream_direct_response(response: AIMessage, streamed: str) -> str:
+    """
+    Lê os argumentos parciais da tool call do plano (JSON em geração) e
+    emite como tokens o trecho novo de `direct_response` (apenas quando
+    needs_tools já é false). Retorna o texto já emitido.
+    """
+    partial = next((c.get("args") for c in response.tool_calls if c.get("name") == PLAN_TOOL_NAME), None)
+
+    if not isinstance(partial, dict) or partial.get("needs_tools") is not False:
+        return streamed
+
+    direct = partial.get("direct_response")
+    if not isinstance(direct, str) or len(direct) <= len(streamed) or not direct.startswith(streamed):
+        return streamed
+
+    await emit_token(direct[len(streamed):])
+    return direct
+
+
+async def _finish_stream(plan: AnalysisPlan, streamed: str) -> None:
+    """
+    Alinha o que foi emitido com o plano validado: completa a resposta
+    direta (o parcial pode ter parado antes do fim) ou descarta o texto
+    quando o plano não é uma resposta direta
+    """
+    direct = plan.direct_response if not plan.needs_tools else None
+    if isinstance(direct, str) and direct.startswith(streamed):
+        await emit_token(direct[len(streamed):])
+    else:
+        await _reset_stream(streamed)
+
+
+async def _reset_stream(streamed: str) -> str:
+    if streamed:
+        metrics.incr("analyzer.stream.reset")
+        await emit_reset()
+    return ""
@@ -0,0 +1,115 @@
+"""
+Política de recuperação de memória por intenção
+
+O nó load_memory roda em paralelo com o analyzer, então a decisão usa o
+que já existe no estado nesse momento: a decisão do roteador local
+(`route`: tools e confiança; calculada também em modo shadow) e o texto
+do usuário + `goal` (definido pelo roteador em modo active).
+
+- consulta de cotação/manchete com confiança alta: não busca memória
+- tools que dependem do perfil (pedido de comida): só preferências e
+  sessão, com menos registros
+- mensagem com referência pessoal ("minha carteira", "lembra..."),
+  confiança baixa ou roteador desligado: busca completa
+
+Respostas diretas (sem tools) só são conhecidas depois do analyzer: o
+roteador não emite plano vazio com confiança (sem plano, confiança 0),
+então elas caem na busca completa. O `topic` não entra na decisão: com
+confiança alta ele é derivado das próprias tools do plano.
+"""
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from src.config.settings import settings
+from src.llm.context_window import last_user_text
+from src.repository.memory.namespaces import PREFERENCE, REFLECTION, SESSION
+from src.state import AgentState
+from src.utils.intent_classifier import tokenize
+
+SKIPPED = "skipped"
+LIMITED = "limited"
+FULL = "full"
+
+ALL_NAMESPACES = (SESSION, REFLECTION, PREFERENCE)
+
+# Namespaces úteis para cada tool; () = a tool não se beneficia de memória
+TOOL_NAMESPACES = {
+    "get_stock_data": (),
+    "get_stock_quotes": (),
+    "search_news": (),
+    "search_football_news": (),
+    "get_user_for_request_food_action": (PREFERENCE, SESSION),
+    "get_restaurants": (PREFERENCE, SESSION),
+    "request_order": (PREFERENCE, SESSION),
+}
+
+# Referências ao próprio usuário ou à conversa (texto normalizado)
+PERSONAL_WORDS = {
+    "eu", "meu", "minha", "meus", "minhas", "mim", "comigo", "lembra", "lembrar",
+    "lembre", "antes", "anterior", "ultima", "ultimo", "prefiro", "preferencia",
+    "preferencias", "carteira", "portfolio", "recomenda", "recomendacao", "devo",
+    "sugere", "sugestao", "perfil", "my", "me", "remember", "before", "previous",
+    "prefer", "recommend", "should",
+}
+
+
+@dataclass
+class MemoryGateDecision:
+    """Se busca memória, em quais namespaces e quantos registros"""
+    mode: str
+    reason: str
+    namespaces: Tuple[str, ...] = field(default_factory=tuple)
+    max_results: int = 0
+
+    @property
+    def retrieve(self) -> bool:
+        return self.mode != SKIPPED
+
+
+def decide_memory_gate(state: AgentState) -> MemoryGateDecision:
+    if not settings.MEMORY_GATE_ENABLED:
+        return _full("disabled")
+
+    text = last_user_text(state.get("messages", [])) or ""
+    route = state.get("route") or {}
+
+    if set(tokenize(f"{text} {state.get('goal') or ''}")) & PERSONAL_WORDS:
+        return _full("personal")
+
+    if not route or route.get("confidence", 0.0) < settings.MEMORY_GATE_MIN_CONFIDENCE:
+        return _full("uncertain")
+
+    tools: List[str] = route.get("tools") or []
+    if not tools or any(tool not in TOOL_NAMESPACES for tool in tools):
+        return _full("unknown_tool")
+
+    namespaces = _union(TOOL_NAMESPACES[tool] for tool in tools)
+    if not namespaces:
+        return MemoryGateDecision(mode=SKIPPED, reason="lookup")
+    return _limited("profile", namespaces)
+
+
+def _full(reason: str) -> MemoryGateDecision:
+    return MemoryGateDecision(
+        mode=FULL,
+        reason=reason,
+        namespaces=ALL_NAMESPACES,
+        max_results=settings.MEMORY_RETRIEVAL_MAX_RECORDS,
+    )
+
+
+def _limited(reason: str, namespaces: Tuple[str, ...]) -> MemoryGateDecision:
+    return MemoryGateDecision(
+        mode=LIMITED,
+        reason=reason,
+        namespaces=namespaces,
+        max_results=min(settings.MEMORY_GATE_LIMITED_RECORDS, settings.MEMORY_RETRIEVAL_MAX_RECORDS),
+    )
+
+
+def _union(groups) -> Tuple[str, ...]:
+    names: List[str] = []
+    for group in groups:
+        names.extend(n for n in group if n not in names)
+    return tuple(names)
+
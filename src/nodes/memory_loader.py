@@ -1,30 +1,56 @@
+"""
+Carregamento de contexto de personalização (memória e último episódio)
+
+Os nós rodam em paralelo com o analyzer (ver src/graph.py). Cada leitura
+é limitada por CONTEXT_LOAD_TIMEOUT e pelo deadline da requisição: se não
+responder a tempo, o turno segue sem esse contexto em vez de esperar.
+
+A memória só é buscada quando a intenção pede (src/nodes/memory_gate.py).
+"""
+import asyncio
+import time
+from typing import Optional
+
+from src.config.settings import settings
+from src.llm.context_window import last_user_text
+from src.nodes.memory_gate import MemoryGateDecision, decide_memory_gate
+from src.repository.dynamodb.dynamodb_service import DynamoDbService
 from src.repository.memory.agent_memory import AgentMemory
+from src.repository.memory.namespaces import default_namespaces
 from src.state import AgentState
+from src.utils.deadline import DeadlineExceeded, bounded_timeout
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
 
 class MemoryLoader:
-    def __init__(self):
-        self.memory = AgentMemory()
+    def __init__(self, memory: Optional[AgentMemory] = None):
+        self.memory = memory or AgentMemory()
 
-    def __call__(self, state: AgentState) -> dict:
+    def __call__(self, state: AgentState, gate: Optional[MemoryGateDecision] = None) -> dict:
         actor_id = state.get("actor_id")
         session_id = state.get("session_id")
-        messages = state.get("messages", [])
-        
 
         if not actor_id:
             return {}
 
-
-        user_messages = [m for m in messages if m.get("role") == "user"]
-        
-        if user_messages:
-            user_input = user_messages[-1].get("content", "")
-        else:
-            user_input = ""
+        # Sem decisão do gate: todos os namespaces
+        namespaces, max_results = None, settings.MEMORY_RETRIEVAL_MAX_RECORDS
+        if gate is not None:
+            namespaces = [ns for ns in default_namespaces() if ns.name in gate.namespaces]
+            max_results = gate.max_results
 
         # Busca na memória usando o input do usuário como searchQuery
-        memory_text = self.memory.load(actor_id, session_id, max_results=5, search_query=user_input)
-        
+        memory_text = self.memory.load(
+            actor_id,
+            session_id,
+            max_results=max_results,
+            search_query=_last_user_input(state),
+            namespaces=namespaces,
+        )
+
         if not memory_text:
             return {}  # 🔑 NÃO retorna messages vazias
 
@@ -32,7 +58,120 @@ class MemoryLoader:
             "messages": [
                 {
                     "role": "system",
+                    "context": "memory",
                     "content": f"User memory context:\n{memory_text}"
                 }
             ]
         }
+
+
+class EpisodeLoader:
+    """Último episódio (goal/topic/outcome) da sessão, salvo no DynamoDB"""
+
+    def __init__(self, store: Optional[DynamoDbService] = None):
+        self.store = store or DynamoDbService(region_name=settings.AWS_REGION, endpoint_url=settings.DYNAMODB_ENDPOINT_URL)
+
+    def __call__(self, state: AgentState) -> dict:
+        actor_id = state.get("actor_id")
+        session_id = state.get("session_id")
+
+        if not actor_id or not session_id:
+            return {}
+
+        # Estado quente da sessão (SessionStore) antes do DynamoDB
+        episode = state.get("last_episode")
+        if episode:
+            metrics.incr("context.episode.hot")
+        else:
+            try:
+                episode = self.store.load_last_episode(actor_id, session_id)
+            except Exception:
+                logger.exception("Failed to load last episode")
+                return {}
+
+        if not episode:
+            return {}
+
+        return {
+            "last_episode": episode,
+            "messages": [
+                {
+                    "role": "system",
+                    "context": "episode",
+                    "content": f"Previous interaction in this session:\n{_describe_episode(episode)}"
+                }
+            ]
+        }
+
+
+# Instâncias criadas no primeiro uso (clientes boto3 fora do import)
+_memory_loader: Optional[MemoryLoader] = None
+_episode_loader: Optional[EpisodeLoader] = None
+
+
+async def load_memory(state: AgentState) -> dict:
+    """Nó do grafo: memória de longo prazo (AgentCore Memory) do usuário"""
+    global _memory_loader
+
+    if not settings.MEMORY_ID:
+        return {}
+
+    gate = decide_memory_gate(state)
+    metrics.incr("memory.gate.performed" if gate.retrieve else "memory.gate.skipped")
+    metrics.incr(f"memory.gate.{gate.mode}.{gate.reason}")
+
+    if not gate.retrieve:
+        logger.info(f"Memory retrieval skipped ({gate.reason})")
+        return {"memory_gate": gate.mode}
+
+    if _memory_loader is None:
+        _memory_loader = MemoryLoader()
+    delta = await _load_bounded("memory", _memory_loader, state, gate)
+    return {**delta, "memory_gate": gate.mode}
+
+
+async def load_last_episode(state: AgentState) -> dict:
+    """Nó do grafo: último episódio da sessão (DynamoDB)"""
+    global _episode_loader
+
+    if not settings.EPISODE_LOOKUP_ENABLED:
+        return {}
+    if _episode_loader is None:
+        _episode_loader = EpisodeLoader()
+    return await _load_bounded("episode", _episode_loader, state)
+
+
+async def _load_bounded(name: str, loader, state: AgentState, *args) -> dict:
+    """
+    Executa o loader (boto3 síncrono) em uma thread, limitado pelo timeout.
+    Em timeout a thread é abandonada e o nó retorna sem contexto.
+    """
+    start = time.perf_counter()
+    try:
+        timeout = bounded_timeout(settings.CONTEXT_LOAD_TIMEOUT, state.get("deadline"))
+        delta = await asyncio.wait_for(asyncio.to_thread(loader, state, *args), timeout=timeout)
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        logger.warning(f"Context load '{name}' skipped: no response in time")
+        metrics.incr(f"context.{name}.timeout")
+        return {}
+    except Exception:
+        logger.exception(f"Context load '{name}' failed")
+        metrics.incr(f"context.{name}.error")
+        return {}
+
+    metrics.observe(f"context.{name}.seconds", time.perf_counter() - start)
+    metrics.incr(f"context.{name}.{'hit' if delta else 'miss'}")
+    return delta
+
+
+def _last_user_input(state: AgentState) -> str:
+    return last_user_text(state.get("messages", [])) or ""
+
+
+def _describe_episode(episode: dict) -> str:
+    lines = []
+    for key in ("goal", "topic", "outcome"):
+        value = episode.get(key)
+        if value:
+            lines.append(f"{key}: {value}")
+    return "\n".join(lines)
@@ -0,0 +1,329 @@
+"""
+Roteador local de intenção (fast-path antes do analyzer LLM)
+
+Regras de ticker/palavra-chave + classificador Naive Bayes treinado com as
+saídas do analyzer. Quando a confiança é alta, emite o mesmo patch que o
+analyzer (tools_to_execute / tool_plan / goal / topic) e o grafo pula a
+chamada ao Bedrock.
+
+Modos (settings.ROUTER_MODE):
+    - "off":    roteador desligado
+    - "shadow": calcula a decisão, mas o analyzer sempre roda; a
+                concordância entre os dois é registrada em métricas
+    - "active": decisões com confiança >= ROUTER_CONFIDENCE_THRESHOLD
+                vão direto para execute_tools
+"""
+import json
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from src.config.settings import settings
+from src.llm.context_window import last_user_text
+from src.state import AgentState
+from src.utils.intent_classifier import (
+    IntentClassifier,
+    label_for_tools,
+    normalize_text,
+    tokenize,
+)
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+FINANCE_TOPIC = "Finanças"
+FOOTBALL_TOPIC = "Futebol"
+
+# ---------------------------------------------------------------
+# Vocabulário das regras (texto normalizado: minúsculo, sem acento)
+# ---------------------------------------------------------------
+
+PRICE_WORDS = {
+    "preco", "precos", "cotacao", "cotacoes", "valor", "price", "prices",
+    "quote", "quotes", "acao", "acoes", "stock", "stocks", "ticker", "quanto",
+}
+NEWS_WORDS = {
+    "noticia", "noticias", "news", "headline", "headlines", "manchete",
+    "manchetes", "novidades", "ultimas",
+}
+FOOTBALL_WORDS = {
+    "futebol", "football", "soccer", "jogo", "partida", "campeonato",
+    "time", "gol", "gols", "elenco", "contratacao",
+}
+MARKET_WORDS = {
+    "mercado", "mercados", "bolsa", "ibovespa", "nasdaq", "dow", "market",
+    "markets", "economia", "juros", "inflacao", "financeiro", "financeiras",
+}
+
+# Nome da empresa -> símbolo no Yahoo Finance
+COMPANY_SYMBOLS = {
+    "nvidia": "NVDA", "apple": "AAPL", "tesla": "TSLA", "microsoft": "MSFT",
+    "amazon": "AMZN", "google": "GOOGL", "alphabet": "GOOGL", "netflix": "NFLX",
+    "petrobras": "PETR4.SA", "itau": "ITUB4.SA", "bradesco": "BBDC4.SA",
+    "ambev": "ABEV3.SA",
+}
+
+# Entidades de futebol -> escopo da busca
+FOOTBALL_ENTITIES = {
+    "flamengo": "br", "corinthians": "br", "palmeiras": "br", "sao paulo": "br",
+    "santos": "br", "vasco": "br", "fluminense": "br", "botafogo": "br",
+    "gremio": "br", "internacional": "br", "cruzeiro": "br",
+    "atletico mineiro": "br", "bahia": "br", "fortaleza": "br",
+    "brasileirao": "br", "copa do brasil": "br", "libertadores": "br",
+    "selecao brasileira": "br", "neymar": "br",
+    "barcelona": "global", "real madrid": "global", "manchester united": "global",
+    "manchester city": "global", "liverpool": "global", "chelsea": "global",
+    "arsenal": "global", "juventus": "global", "milan": "global", "psg": "global",
+    "bayern": "global", "champions league": "global", "premier league": "global",
+    "la liga": "global", "messi": "global", "cristiano ronaldo": "global",
+    "mbappe": "global", "haaland": "global",
+}
+
+# Tickers US aceitos em qualquer mensagem; outros termos em maiúsculas só
+# contam como ticker com palavra de preço/mercado e texto em caixa mista
+KNOWN_US_TICKERS = {
+    "NVDA", "AAPL", "TSLA", "MSFT", "AMZN", "GOOGL", "GOOG", "META", "NFLX",
+    "AMD", "INTC", "IBM", "ORCL", "CRM", "ADBE", "AVGO", "QCOM", "UBER",
+    "DIS", "KO", "PEP", "JPM", "BAC", "WMT", "NKE", "SPY", "QQQ",
+}
+
+# Tickers B3 (PETR4, VALE3, BOVA11) e tickers US em maiúsculas (NVDA)
+_B3_TICKER_RE = re.compile(r"\b([A-Za-z]{4}(?:3|4|5|6|11))\b")
+_US_TICKER_RE = re.compile(r"\b([A-Z]{2,5})\b")
+_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+_NOT_TICKERS = {
+    "ETF", "CEO", "IPO", "USD", "BRL", "EUA", "PIB", "API", "OK", "EU",
+    "NEWS", "CDI", "SELIC", "FED", "BC", "TI", "AI", "IA", "FII", "FIIS",
+}
+
+
+@dataclass
+class RouteDecision:
+    """Decisão do roteador local"""
+    tool_plan: List[dict] = field(default_factory=list)
+    topic: Optional[str] = None
+    goal: Optional[str] = None
+    confidence: float = 0.0
+    source: str = "rules"
+
+    @property
+    def tools(self) -> List[str]:
+        return [step["name"] for step in self.tool_plan]
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "tools": self.tools}
+
+
+class IntentRouter:
+    """Combina regras determinísticas com o classificador local"""
+
+    def __init__(self, classifier: Optional[IntentClassifier] = None):
+        self.classifier = classifier or IntentClassifier()
+        self._log_lock = threading.Lock()
+
+    # ---------- decisão ----------
+    def decide(self, text: str) -> RouteDecision:
+        norm = normalize_text(text)
+        tokens = set(tokenize(text))
+
+        wants_price = bool(tokens & PRICE_WORDS)
+        wants_news = bool(tokens & NEWS_WORDS)
+        about_market = bool(tokens & MARKET_WORDS)
+
+        symbols = self._extract_symbols(text, norm, wants_price or about_market)
+        entity, scope = self._extract_football_entity(norm)
+        about_football = bool(entity) or bool(tokens & FOOTBALL_WORDS)
+
+        plan, topics, goals = [], [], []
+        confidence = 0.9
+
+        if symbols and (wants_price or not wants_news):
+            if len(symbols) == 1:
+                plan.append({"name": "get_stock_data", "args": {"symbol": symbols[0]}})
+            else:
+                plan.append({"name": "get_stock_quotes", "args": {"symbols": symbols}})
+            topics.append(FINANCE_TOPIC)
+            goals.append(f"Consultar cotação de {', '.join(symbols)}")
+            if not wants_price:
+                confidence = min(confidence, 0.7)
+
+        if entity and (wants_news or about_football or not plan):
+            plan.append({
+                "name": "search_football_news",
+                "args": {"query": entity.title(), "scope": scope, "limit": 5},
+            })
+            topics.append(FOOTBALL_TOPIC)
+            goals.append(f"Notícias de futebol sobre {entity.title()}")
+            if not wants_news:
+                confidence = min(confidence, 0.7)
+
+        if wants_news and (about_market or (symbols and not wants_price)):
+            query = " ".join(symbols) if symbols and not wants_price else "stock market"
+            plan.append({"name": "search_news", "args": {"query": query}})
+            topics.append(FINANCE_TOPIC)
+            goals.append(f"Notícias financeiras sobre {query}")
+
+        # Menção a futebol sem entidade reconhecida: falta o termo de busca
+        if about_football and not entity and wants_news:
+            confidence = min(confidence, 0.3)
+
+        if not plan:
+            return RouteDecision(confidence=0.0)
+
+        decision = RouteDecision(
+            tool_plan=plan,
+            topic=topics[0],
+            goal="; ".join(goals),
+            confidence=confidence,
+        )
+        return self._blend_with_classifier(text, decision)
+
+    def _blend_with_classifier(self, text: str, decision: RouteDecision) -> RouteDecision:
+        """
+        Ajusta a confiança das regras com o classificador (quando já há
+        amostras suficientes): concordância reforça, divergência reduz.
+        """
+        if self.classifier.samples < settings.ROUTER_MIN_SAMPLES:
+            return decision
+
+        label, probability = self.classifier.predict(text)
+        rule_confidence = decision.confidence
+
+        if label == label_for_tools(decision.tools):
+            decision.confidence = 1 - (1 - rule_confidence) * (1 - probability)
+        else:
+            decision.confidence = rule_confidence * (1 - probability)
+
+        decision.source = "rules+classifier"
+        return decision
+
+    def _extract_symbols(self, text: str, norm: str, financial: bool) -> List[str]:
+        """
+        Símbolos citados no texto. Palavra em maiúsculas fora de
+        KNOWN_US_TICKERS só vira ticker quando a mensagem fala de
+        preço/mercado (`financial`) e não está toda em caixa alta
+        ("OLA, TUDO BEM?" não é uma lista de tickers).
+        """
+        symbols = []
+
+        for match in _B3_TICKER_RE.findall(text):
+            symbols.append(f"{match.upper()}.SA")
+
+        bare_allowed = financial and not _mostly_uppercase(text)
+        for match in _US_TICKER_RE.findall(text):
+            if match in _NOT_TICKERS or f"{match}.SA" in symbols:
+                continue
+            if match in KNOWN_US_TICKERS or bare_allowed:
+                symbols.append(match)
+
+        for name, symbol in COMPANY_SYMBOLS.items():
+            if re.search(rf"\b{name}\b", norm):
+                symbols.append(symbol)
+
+        # Remove duplicados preservando a ordem
+        return list(dict.fromkeys(symbols))
+
+    def _extract_football_entity(self, norm: str):
+        # Entidades mais longas primeiro ("real madrid" antes de "madrid")
+        for name in sorted(FOOTBALL_ENTITIES, key=len, reverse=True):
+            if re.search(rf"\b{name}\b", norm):
+                return name, FOOTBALL_ENTITIES[name]
+        return None, None
+
+    # ---------- aprendizado / shadow ----------
+    def record_analyzer_outcome(self, user_input: str, analysis: dict, route: Optional[dict]) -> None:
+        """
+        Registra a saída do analyzer: compara com a decisão local (shadow),
+        treina o classificador e grava no log de treino (se configurado).
+        """
+        tools = analysis.get("tools_needed", []) if analysis.get("needs_tools") else []
+        label = label_for_tools(tools)
+
+        if route:
+            agreed = label_for_tools(route.get("tools")) == label
+            metrics.incr("router.shadow.agree" if agreed else "router.shadow.disagree")
+            if route.get("confidence", 0) >= settings.ROUTER_CONFIDENCE_THRESHOLD:
+                metrics.incr("router.shadow.confident_agree" if agreed else "router.shadow.confident_disagree")
+            if not agreed:
+                logger.info(f"Router disagreement: local={route.get('tools')} llm={tools} "
+                            f"confidence={route.get('confidence', 0):.2f}")
+
+        self.classifier.learn(user_input, label)
+        self._append_training_log(user_input, tools, analysis)
+
+    def _append_training_log(self, user_input: str, tools: list, analysis: dict) -> None:
+        path = settings.ROUTER_TRAINING_LOG
+        if not path:
+            return
+
+        record = {
+            "input": user_input,
+            "tools_needed": tools,
+            "tool_calls": analysis.get("tool_calls"),
+            "topic": analysis.get("topic"),
+            "goal": analysis.get("goal"),
+        }
+        try:
+            with self._log_lock, open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            logger.exception("Failed to append router training log")
+
+    def stats(self) -> dict:
+        return {
+            "mode": settings.ROUTER_MODE,
+            "samples": self.classifier.samples,
+            "agreement_rate": metrics.ratio("router.shadow.agree", "router.shadow.disagree"),
+            "confident_agreement_rate": metrics.ratio(
+                "router.shadow.confident_agree", "router.shadow.confident_disagree"
+            ),
+            **metrics.snapshot("router."),
+        }
+
+
+def _mostly_uppercase(text: str) -> bool:
+    """Mais da metade das palavras (2+ letras) em caixa alta"""
+    words = _WORD_RE.findall(text)
+    return bool(words) and sum(w.isupper() for w in words) * 2 > len(words)
+
+
+# Instância global (treinada com o log do analyzer, se existir)
+router = IntentRouter()
+router.classifier.load_jsonl(settings.ROUTER_TRAINING_LOG)
+
+
+async def route_request(state: AgentState) -> dict:
+    """
+    Nó de roteamento local. Retorna APENAS o delta do estado.
+    Em modo "active" com confiança alta, já decide o plano de tools.
+    """
+    if settings.ROUTER_MODE == "off":
+        return {}
+
+    user_input = last_user_text(state.get("messages", []))
+    if user_input is None:
+        return {}
+
+    decision = router.decide(user_input)
+    metrics.observe("router.confidence", decision.confidence)
+
+    confident = bool(decision.tool_plan) and decision.confidence >= settings.ROUTER_CONFIDENCE_THRESHOLD
+    metrics.incr("router.confident" if confident else "router.deferred")
+
+    logger.info(f"Local route: tools={decision.tools} confidence={decision.confidence:.2f} "
+                f"mode={settings.ROUTER_MODE}")
+
+    if settings.ROUTER_MODE == "active" and confident:
+        metrics.incr("router.routed")
+        return {
+            "route": decision.to_dict(),
+            "tools_to_execute": decision.tools,
+            "tool_plan": decision.tool_plan,
+            "goal": decision.goal,
+            "topic": decision.topic,
+            "next_step": "execute_tools",
+        }
+
+    return {"route": decision.to_dict()}
@@ -1,24 +1,50 @@
-from langchain_aws import ChatBedrock
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+import asyncio
+import time
+import weakref
+from typing import Optional
+from uuid import uuid4
+
+from langchain_core.messages import AIMessage, ToolMessage
+from pydantic import ValidationError
+
 from src.config.settings import settings
+from src.llm.context_window import build_context, estimate_tokens, truncate_text
+from src.llm.messages import content_text
+from src.llm.prompt_cache import cached_system_message, record_prompt_usage
+from src.llm.registry import llm_registry
 from src.state import AgentState
 from src.tools.news_tools import search_news
-from src.tools.stock_tools import get_stock_data
+from src.tools.stock_tools import get_stock_data, get_stock_quotes
 from src.tools.news_football import search_football_news
+from src.utils.deadline import DEADLINE_MESSAGE, DeadlineExceeded, bounded_timeout, deadline_scope
+from src.utils.events import SYNTHESIS_TAG, emit_status, emit_token
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 logger = setup_logger(__name__)
 
 TOOLS = {
     "get_stock_data": get_stock_data,
+    "get_stock_quotes": get_stock_quotes,
     "search_news": search_news,
     "search_football_news": search_football_news
 }
 
+# System prompt do executor (prefixo estável, com cache checkpoint)
+EXECUTOR_SYSTEM_MESSAGE = cached_system_message(settings.SYSTEM_PROMPT)
+EXECUTOR_PREFIX_TOKENS = estimate_tokens(EXECUTOR_SYSTEM_MESSAGE)
+
+# Limita tools simultâneas por event loop (asyncio.Semaphore é ligado ao loop)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
-def execute_tools(state: AgentState) -> dict:
+async def execute_tools(state: AgentState) -> dict:
     """
     Executa tools via Bedrock tool calling.
+    Quando o analyzer fornece um plano válido, as tools são executadas
+    diretamente; caso contrário, o LLM decide as tool calls (bind_tools).
     Retorna APENAS o delta do estado, evitando duplicar mensagens do usuário.
     """
     try:
@@ -26,56 +52,68 @@ def execute_tools(state: AgentState) -> dict:
         
 
         messages = state.get("messages", [])
+        deadline = state.get("deadline")
 
-        llm = ChatBedrock(
-            model_id=settings.MODEL_ID,
-            region_name=settings.AWS_REGION,
-            model_kwargs={
-                "temperature": settings.MODEL_TEMPERATURE,
-                "max_tokens": settings.MODEL_MAX_TOKENS,
-            },
-        ).bind_tools(list(TOOLS.values()))
+        # Runnable compartilhado: schemas das tools gerados uma única vez
+        llm = llm_registry.get_tool_model(TOOLS.values())
 
         # ⚠️ cria nova lista, NÃO muta state["messages"]
+        # O prompt de cada chamada é montado por _build_prompt (janela de contexto)
         new_messages = list(messages)
 
-        # Primeira chamada do LLM
-        ai_message: AIMessage = llm.invoke(new_messages)
+        # Plano validado do analyzer dispensa a primeira chamada do LLM
+        ai_message: Optional[AIMessage] = None
+        if settings.PLAN_DIRECTED_EXECUTION:
+            ai_message = _plan_to_ai_message(state.get("tool_plan"))
+
+        if ai_message is not None:
+            metrics.incr("executor.plan.direct")
+        else:
+            metrics.incr("executor.plan.fallback")
+            try:
+                ai_message = await asyncio.wait_for(
+                    llm.ainvoke(_build_prompt(new_messages)),
+                    timeout=bounded_timeout(None, deadline, reserve=settings.DEADLINE_SYNTHESIS_RESERVE),
+                )
+            except (asyncio.TimeoutError, DeadlineExceeded):
+                metrics.incr("deadline.exceeded.executor")
+                return {"final_response": DEADLINE_MESSAGE, "next_step": "end"}
+            record_prompt_usage("executor", ai_message)
+
         new_messages.append(ai_message)
 
         # Lista para acumular apenas mensagens novas (delta)
         delta_messages = [ai_message]
 
-        # Se houver tool calls
+        # Se houver tool calls (executadas em paralelo)
         if ai_message.tool_calls:
-            for call in ai_message.tool_calls:
-                tool_name = call["name"]
-                tool_args = call["args"]
-
-                logger.info(f"Calling tool: {tool_name} {tool_args}")
-
-                tool_fn = TOOLS.get(tool_name)
-                if not tool_fn:
-                    raise ValueError(f"Tool '{tool_name}' not found")
+            with deadline_scope(deadline):
+                tool_messages = await _run_tool_calls(ai_message.tool_calls, deadline)
 
-                tool_result = tool_fn.invoke(tool_args)
+            new_messages.extend(tool_messages)
+            delta_messages.extend(tool_messages)
 
-                tool_message = ToolMessage(
-                    tool_call_id=call["id"],
-                    content=str(tool_result),
+            # Segunda chamada com resultado das tools (tokens transmitidos via tag)
+            await emit_status("Preparando a resposta…")
+            try:
+                final_ai_message: AIMessage = await asyncio.wait_for(
+                    llm.with_config(tags=[SYNTHESIS_TAG]).ainvoke(_build_prompt(new_messages)),
+                    timeout=bounded_timeout(None, deadline),
                 )
-
-                new_messages.append(tool_message)
-                delta_messages.append(tool_message)
-
-            # Segunda chamada com resultado das tools
-            final_ai_message: AIMessage = llm.invoke(new_messages)
+            except (asyncio.TimeoutError, DeadlineExceeded):
+                # Sem tempo para a síntese: devolve os dados brutos obtidos
+                logger.warning("Synthesis ran out of request budget; returning tool outputs")
+                metrics.incr("deadline.exceeded.synthesis")
+                final_ai_message = AIMessage(content=_degraded_response(tool_messages))
+            else:
+                record_prompt_usage("synthesis", final_ai_message)
             new_messages.append(final_ai_message)
             delta_messages.append(final_ai_message)
 
-            final_response = final_ai_message.content
+            final_response = content_text(final_ai_message.content)
         else:
-            final_response = ai_message.content
+            final_response = content_text(ai_message.content)
+            await emit_token(final_response)
 
         return {
             "messages": delta_messages,  
@@ -90,3 +128,149 @@ def execute_tools(state: AgentState) -> dict:
             "final_response": "I encountered an error while processing your request.",
             "next_step": "end",
         }
+
+
+def _build_prompt(messages: list) -> list:
+    """
+    Prefixo estável (system prompt em cache) + janela de contexto das
+    mensagens, dentro do teto de tokens do executor.
+    """
+    context = build_context(
+        messages,
+        max_tokens=settings.EXECUTOR_MAX_INPUT_TOKENS,
+        reserved_tokens=EXECUTOR_PREFIX_TOKENS,
+    )
+    return [EXECUTOR_SYSTEM_MESSAGE, *context]
+
+
+def _plan_to_ai_message(plan: Optional[list]) -> Optional[AIMessage]:
+    """
+    Valida o plano do analyzer contra o schema de cada @tool e o converte
+    em um AIMessage com tool_calls. Retorna None se o plano estiver
+    ausente ou inválido (o executor então faz o round-trip com o LLM).
+    """
+    if not plan:
+        return None
+
+    tool_calls = []
+    for step in plan:
+        tool_name = step.get("name") if isinstance(step, dict) else None
+        tool_fn = TOOLS.get(tool_name)
+
+        if tool_fn is None:
+            logger.info(f"Invalid tool plan: unknown tool '{tool_name}'")
+            return None
+
+        try:
+            args = tool_fn.args_schema.model_validate(step.get("args") or {})
+        except ValidationError as e:
+            logger.info(f"Invalid tool plan for '{tool_name}': {e.errors()}")
+            return None
+
+        tool_calls.append({
+            "name": tool_name,
+            "args": args.model_dump(),
+            "id": f"plan_{uuid4().hex[:16]}",
+            "type": "tool_call",
+        })
+
+    return AIMessage(content="", tool_calls=tool_calls)
+
+
+async def _run_tool_calls(tool_calls: list, deadline: Optional[float] = None) -> list[ToolMessage]:
+    """
+    Executa as tool calls concorrentemente no event loop.
+
+    - Resultados retornam na mesma ordem das tool calls (tool_call_id)
+    - Cada tool tem seu próprio timeout (settings.TOOL_TIMEOUT), limitado
+      pelo deadline da requisição menos o tempo reservado para a síntese
+    - Falha ou timeout de uma tool vira ToolMessage de erro, sem
+      derrubar as demais
+    """
+    started_at = time.monotonic()
+    tool_messages = await asyncio.gather(
+        *(_run_tool_call(call, deadline) for call in tool_calls)
+    )
+    metrics.observe("executor.tools.batch_seconds", time.monotonic() - started_at)
+    return list(tool_messages)
+
+
+async def _run_tool_call(call: dict, deadline: Optional[float] = None) -> ToolMessage:
+    tool_name = call["name"]
+    tool_args = call["args"]
+    tool_fn = TOOLS.get(tool_name)
+
+    if not tool_fn:
+        metrics.incr("executor.tool.unknown")
+        return _tool_error_message(call, f"Tool '{tool_name}' not found")
+
+    logger.info(f"Calling tool: {tool_name} {tool_args}")
+    await emit_status(_describe_call(call))
+
+    timeout = settings.TOOL_TIMEOUT
+    try:
+        async with _tool_semaphore():
+            timeout = bounded_timeout(settings.TOOL_TIMEOUT, deadline, reserve=settings.DEADLINE_SYNTHESIS_RESERVE)
+            tool_result = await asyncio.wait_for(tool_fn.ainvoke(tool_args), timeout=timeout)
+        metrics.incr("executor.tool.success")
+        return ToolMessage(
+            tool_call_id=call["id"],
+            content=truncate_text(str(tool_result), settings.TOOL_OUTPUT_MAX_CHARS),
+        )
+
+    except DeadlineExceeded:
+        logger.warning(f"Tool '{tool_name}' skipped: request deadline exceeded")
+        metrics.incr("deadline.exceeded.tool")
+        return _tool_error_message(call, f"Tool '{tool_name}' skipped: no time left for this request.")
+
+    except asyncio.TimeoutError:
+        logger.warning(f"Tool '{tool_name}' timed out after {timeout:.2f}s")
+        metrics.incr("executor.tool.timeout")
+        return _tool_error_message(call, f"Tool '{tool_name}' did not respond in time.")
+
+    except Exception as e:
+        logger.exception(f"Tool '{tool_name}' failed")
+        metrics.incr("executor.tool.error")
+        return _tool_error_message(call, f"Tool '{tool_name}' failed: {e}")
+
+
+def _tool_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(settings.TOOL_MAX_CONCURRENCY)
+    return semaphore
+
+
+def _degraded_response(tool_messages: list) -> str:
+    """Resposta de melhor esforço com as saídas das tools que funcionaram"""
+    outputs = [content_text(m.content) for m in tool_messages if getattr(m, "status", None) != "error"]
+    if not outputs:
+        return DEADLINE_MESSAGE
+    return (
+        "I couldn't finish the full analysis within the time available. "
+        "Here is the data retrieved so far:\n\n" + "\n\n".join(outputs)
+    )
+
+
+def _tool_error_message(call: dict, error: str) -> ToolMessage:
+    return ToolMessage(
+        tool_call_id=call["id"],
+        content=error,
+        status="error",
+    )
+
+
+def _describe_call(call: dict) -> str:
+    """Status legível de uma tool call para o modo streaming"""
+    args = call.get("args") or {}
+
+    if call["name"] == "get_stock_data":
+        return f"Buscando cotação de {args.get('symbol', '')}…"
+    if call["name"] == "get_stock_quotes":
+        return f"Buscando cotações de {', '.join(args.get('symbols') or [])}…"
+    if call["name"] == "search_news":
+        return f"Buscando notícias sobre {args.get('query', '')}…"
+    if call["name"] == "search_football_news":
+        return f"Buscando notícias de futebol sobre {args.get('query', '')}…"
+    return f"Executando {call['name']}…"
@@ -0,0 +1,669 @@
+"""
+Checkpointer LangGraph no DynamoDB (tabela de sessões do DynamoDbService)
+
+thread_id = "<actor_id>#<session_id>", com "%" e "#" escapados em cada
+parte (ver `thread_id_for`). Itens, todos
+sob a PK "ACTOR#<actor_id>", seguindo as convenções de chave da tabela:
+
+- SESSION#<session>#CHECKPOINT#<ns>#HEAD
+    último checkpoint com o estado completo (comprimido). Retomar uma
+    sessão custa uma GetItem + uma Query (writes pendentes)
+- SESSION#<session>#CHECKPOINT#<ns>#<checkpoint_id>
+    checkpoint + apenas os canais alterados nele (delta); listas que só
+    cresceram (ex: `messages`) guardam apenas a janela em relação ao pai
+    (itens descartados do início + itens novos). Usado para histórico
+    (list / checkpoint_id explícito)
+- SESSION#<session>#WRITES#<ns>#<checkpoint_id>#<task_id>#<idx>
+    writes pendentes de um checkpoint
+
+Valores são serializados pelo serde do LangGraph e comprimidos com zlib.
+Os itens recebem `expires_at` (TTL do DynamoDB) quando CHECKPOINT_TTL > 0.
+Um delta depende dos ancestrais (canais não alterados, janelas de lista),
+então o HEAD guarda `history_expires_at` (menor expiração entre os deltas
+da sessão); quando ela fica a menos de metade do TTL, o put renova o
+`expires_at` de todos os deltas da sessão.
+
+O último checkpoint de cada sessão (com writes pendentes) fica também em
+memória (SessionStore): com SESSION_STORE_ENABLED, retomar a sessão no
+mesmo container não lê o DynamoDB. O mesmo estado serve de base para os
+deltas de lista no put.
+"""
+import asyncio
+import copy
+import time
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+from boto3.dynamodb.conditions import Key
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+from src.config.settings import settings
+from src.repository.dynamodb.dynamodb_service import DynamoDbService
+from src.repository.session_store import SessionStore, new_session_store
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+THREAD_SEPARATOR = "#"
+HEAD = "HEAD"
+
+# Tipos de item (atributo `kind`)
+KIND_HEAD = "checkpoint_head"
+KIND_CHECKPOINT = "checkpoint"
+KIND_WRITE = "checkpoint_write"
+
+
+def _escape(part: str) -> str:
+    return part.replace("%", "%25").replace(THREAD_SEPARATOR, "%23")
+
+
+def thread_id_for(actor_id: str, session_id: str) -> str:
+    """
+    thread_id do LangGraph para uma sessão de um actor. As partes são
+    escapadas: um "#" no actor_id não desloca a divisão em split_thread_id.
+    """
+    return f"{_escape(actor_id)}{THREAD_SEPARATOR}{_escape(session_id)}"
+
+
+def split_thread_id(thread_id: str) -> Tuple[str, str]:
+    parts = thread_id.split(THREAD_SEPARATOR)
+    if len(parts) != 2:
+        raise ValueError(f"thread_id must be '<actor_id>#<session_id>', got {thread_id!r}")
+    return unquote(parts[0]), unquote(parts[1])
+
+
+class DynamoDbCheckpointer(BaseCheckpointSaver[int]):
+    """BaseCheckpointSaver sobre a tabela do DynamoDbService"""
+
+    def __init__(
+        self,
+        service: Optional[DynamoDbService] = None,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        ttl_seconds: Optional[float] = None,
+        compression_level: int = 6,
+    ):
+        super().__init__(serde=serde)
+        self.service = service or DynamoDbService(
+            region_name=settings.AWS_REGION,
+            endpoint_url=settings.DYNAMODB_ENDPOINT_URL,
+        )
+        self.table = self.service.table
+        self.ttl_seconds = settings.CHECKPOINT_TTL if ttl_seconds is None else ttl_seconds
+        self.compression_level = compression_level
+        # Último checkpoint por thread/namespace: leitura quente e base dos deltas de lista
+        self.hot: SessionStore = new_session_store("checkpointer.hot")
+
+    # ---------- chaves ----------
+
+    @staticmethod
+    def _keys(config: RunnableConfig) -> Tuple[str, str, str]:
+        configurable = config["configurable"]
+        actor_id, session_id = split_thread_id(configurable["thread_id"])
+        return f"ACTOR#{actor_id}", session_id, configurable.get("checkpoint_ns", "")
+
+    @staticmethod
+    def _checkpoint_prefix(session_id: str, checkpoint_ns: str) -> str:
+        return f"SESSION#{session_id}#CHECKPOINT#{checkpoint_ns}#"
+
+    @staticmethod
+    def _writes_prefix(session_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"SESSION#{session_id}#WRITES#{checkpoint_ns}#{checkpoint_id}#"
+
+    # ---------- serialização ----------
+
+    def _pack(self, value: Any) -> bytes:
+        type_, data = self.serde.dumps_typed(value)
+        return zlib.compress(type_.encode() + b"\x00" + data, self.compression_level)
+
+    def _unpack(self, blob: Any) -> Any:
+        raw = zlib.decompress(getattr(blob, "value", blob))
+        type_, _, data = raw.partition(b"\x00")
+        return self.serde.loads_typed((type_.decode(), data))
+
+    def _expiry(self) -> Dict[str, int]:
+        if self.ttl_seconds <= 0:
+            return {}
+        return {"expires_at": int(time.time() + self.ttl_seconds)}
+
+    # ---------- leitura ----------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        result = self._get_hot(config)
+        if result is not None:
+            return result
+        return self._get_remote(config)
+
+    def _get_hot(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        start = time.perf_counter()
+        pk, session_id, checkpoint_ns = self._keys(config)
+        result = self._hot_tuple(pk, session_id, checkpoint_ns, get_checkpoint_id(config))
+        if result is not None:
+            metrics.incr("checkpointer.get.hot")
+            metrics.observe("checkpointer.get_seconds", time.perf_counter() - start)
+        return result
+
+    def _get_remote(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        start = time.perf_counter()
+        pk, session_id, checkpoint_ns = self._keys(config)
+        checkpoint_id = get_checkpoint_id(config)
+
+        head = self.table.get_item(
+            Key={"actor_id": pk, "session_id": self._checkpoint_prefix(session_id, checkpoint_ns) + HEAD}
+        ).get("Item")
+
+        if head is not None and (checkpoint_id is None or head["checkpoint_id"] == checkpoint_id):
+            result = self._to_tuple(pk, session_id, checkpoint_ns, head, self._unpack(head["values"]))
+            self._remember(pk, session_id, checkpoint_ns, result.checkpoint, result.metadata,
+                           head.get("parent_checkpoint_id"), result.pending_writes,
+                           _history_expiry(head))
+        elif checkpoint_id is not None:
+            # Checkpoint antigo: reconstrói os valores a partir dos deltas
+            items = self._query_checkpoints(pk, session_id, checkpoint_ns, up_to=checkpoint_id)
+            by_id = {i["checkpoint_id"]: i for i in items}
+            item = by_id.get(checkpoint_id)
+            if item is None:
+                return None
+            result = self._to_tuple(pk, session_id, checkpoint_ns, item, self._materialize(item, by_id))
+        else:
+            metrics.incr("checkpointer.get.miss")
+            return None
+
+        metrics.incr("checkpointer.get.hit")
+        metrics.observe("checkpointer.get_seconds", time.perf_counter() - start)
+        return result
+
+    def _hot_tuple(
+        self,
+        pk: str,
+        session_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: Optional[str],
+    ) -> Optional[CheckpointTuple]:
+        """Último checkpoint a partir da memória do processo, ou None"""
+        if not settings.SESSION_STORE_ENABLED:
+            return None
+
+        hot = self.hot.get((pk, session_id, checkpoint_ns))
+        if hot is None or (checkpoint_id is not None and hot["checkpoint"]["id"] != checkpoint_id):
+            return None
+
+        # Cópias: o LangGraph não pode alterar o estado guardado
+        checkpoint = copy.deepcopy(hot["checkpoint"])
+        checkpoint["channel_values"] = {
+            channel: copy.copy(value) if isinstance(value, (list, dict)) else value
+            for channel, value in hot["values"].items()
+        }
+        writes = sorted(hot["writes"].values(), key=lambda w: writes_sort_key(w[3], w[0], w[4]))
+        return self._tuple(
+            pk, session_id, checkpoint_ns, checkpoint, copy.deepcopy(hot["metadata"]), hot["parent_id"],
+            [(task_id, channel, value) for task_id, channel, value, _, _ in writes],
+        )
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is None:
+            raise ValueError("DynamoDbCheckpointer.list requires a config with thread_id")
+
+        pk, session_id, checkpoint_ns = self._keys(config)
+        config_checkpoint_id = get_checkpoint_id(config)
+        before_id = get_checkpoint_id(before) if before else None
+
+        items = self._query_checkpoints(pk, session_id, checkpoint_ns)
+        by_id = {i["checkpoint_id"]: i for i in items}
+
+        for item in items:
+            checkpoint_id = item["checkpoint_id"]
+            if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                continue
+            if before_id and checkpoint_id >= before_id:
+                continue
+
+            metadata = self._unpack(item["metadata"])
+            if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                continue
+
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+
+            yield self._to_tuple(pk, session_id, checkpoint_ns, item, self._materialize(item, by_id), metadata)
+
+    def _query_checkpoints(
+        self,
+        pk: str,
+        session_id: str,
+        checkpoint_ns: str,
+        up_to: Optional[str] = None,
+    ) -> List[dict]:
+        """Itens de checkpoint (sem o HEAD), do mais recente para o mais antigo"""
+        prefix = self._checkpoint_prefix(session_id, checkpoint_ns)
+        condition = Key("actor_id").eq(pk)
+        if up_to is None:
+            condition &= Key("session_id").begins_with(prefix)
+        else:
+            condition &= Key("session_id").between(prefix, prefix + up_to)
+
+        items = [i for i in self._query(condition, ScanIndexForward=False) if i.get("kind") == KIND_CHECKPOINT]
+        return sorted(items, key=lambda i: i["checkpoint_id"], reverse=True)
+
+    def _materialize(self, item: dict, by_id: Dict[str, dict]) -> Dict[str, Any]:
+        """
+        Valores de um checkpoint: cada canal é procurado no próprio delta e
+        depois nos ancestrais, até achar a versão registrada no checkpoint.
+        """
+        versions = self._unpack(item["checkpoint"]).get("channel_versions", {})
+        values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            found, value = self._channel_value(item, channel, version, by_id)
+            if found:
+                values[channel] = value
+        return values
+
+    def _channel_value(self, item: Optional[dict], channel: str, version: Any, by_id: Dict[str, dict]) -> tuple:
+        """(encontrado, valor) do canal na versão dada, a partir de `item`"""
+        while item is not None:
+            delta = self._unpack(item["delta"])
+            if delta["versions"].get(channel) == version:
+                if channel in delta["values"]:
+                    return True, delta["values"][channel]
+                window = delta.get("windows", {}).get(channel)
+                if window is None:
+                    # Canal vazio nesta versão
+                    return False, None
+                base_version, dropped, appended = window
+                parent = by_id.get(item.get("parent_checkpoint_id"))
+                found, base = self._channel_value(parent, channel, base_version, by_id)
+                if not found:
+                    return False, None
+                return True, list(base)[dropped:] + list(appended)
+            item = by_id.get(item.get("parent_checkpoint_id"))
+        return False, None
+
+    def _pending_writes(self, pk: str, session_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        condition = Key("actor_id").eq(pk) & Key("session_id").begins_with(
+            self._writes_prefix(session_id, checkpoint_ns, checkpoint_id)
+        )
+        writes = [
+            (i["task_id"], i["channel"], self._unpack(i["value"]), i.get("task_path", ""), int(i["idx"]))
+            for i in self._query(condition)
+        ]
+        writes.sort(key=lambda w: writes_sort_key(w[3], w[0], w[4]))
+        return [(task_id, channel, value) for task_id, channel, value, _, _ in writes]
+
+    def _to_tuple(
+        self,
+        pk: str,
+        session_id: str,
+        checkpoint_ns: str,
+        item: dict,
+        values: Dict[str, Any],
+        metadata: Optional[dict] = None,
+    ) -> CheckpointTuple:
+        checkpoint_id = item["checkpoint_id"]
+        return self._tuple(
+            pk,
+            session_id,
+            checkpoint_ns,
+            {**self._unpack(item["checkpoint"]), "channel_values": values},
+            metadata if metadata is not None else self._unpack(item["metadata"]),
+            item.get("parent_checkpoint_id"),
+            self._pending_writes(pk, session_id, checkpoint_ns, checkpoint_id),
+        )
+
+    @staticmethod
+    def _tuple(
+        pk: str,
+        session_id: str,
+        checkpoint_ns: str,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        parent_id: Optional[str],
+        pending_writes: list,
+    ) -> CheckpointTuple:
+        thread_id = thread_id_for(pk[len("ACTOR#"):], session_id)
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint["id"],
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=metadata,
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def _query(self, condition, **kwargs) -> List[dict]:
+        items, params = [], {"KeyConditionExpression": condition, **kwargs}
+        while True:
+            response = self.table.query(**params)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return items
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    # ---------- escrita ----------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        start = time.perf_counter()
+        pk, session_id, checkpoint_ns = self._keys(config)
+        prefix = self._checkpoint_prefix(session_id, checkpoint_ns)
+
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        parent_id = config["configurable"].get("checkpoint_id")
+        delta = self._build_delta(pk, session_id, checkpoint_ns, parent_id, values, new_versions)
+        metadata = get_checkpoint_metadata(config, metadata)
+
+        expiry = self._expiry()
+        common = {
+            "actor_id": pk,
+            "checkpoint_id": checkpoint["id"],
+            "checkpoint": self._pack(c),
+            "metadata": self._pack(metadata),
+            "created_at": datetime.utcnow().isoformat(),
+            **expiry,
+        }
+        if parent_id:
+            common["parent_checkpoint_id"] = parent_id
+
+        history_expires_at = None
+        if expiry:
+            history_expires_at = self._keep_history(pk, session_id, checkpoint_ns, parent_id, expiry["expires_at"])
+
+        delta_item = {**common, "session_id": prefix + checkpoint["id"], "kind": KIND_CHECKPOINT, "delta": self._pack(delta)}
+        head_item = {**common, "session_id": prefix + HEAD, "kind": KIND_HEAD, "values": self._pack(values)}
+        if history_expires_at is not None:
+            head_item["history_expires_at"] = history_expires_at
+
+        # Um único BatchWriteItem para o delta e o HEAD
+        with self.table.batch_writer() as batch:
+            batch.put_item(Item=delta_item)
+            batch.put_item(Item=head_item)
+
+        self._remember(pk, session_id, checkpoint_ns, checkpoint, metadata, parent_id,
+                       history_expires_at=history_expires_at)
+
+        metrics.observe("checkpointer.put_seconds", time.perf_counter() - start)
+        metrics.observe("checkpointer.head_bytes", len(head_item["values"]) + len(head_item["checkpoint"]))
+        metrics.observe("checkpointer.delta_bytes", len(delta_item["delta"]) + len(delta_item["checkpoint"]))
+
+        return {
+            "configurable": {
+                "thread_id": config["configurable"]["thread_id"],
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def _keep_history(
+        self,
+        pk: str,
+        session_id: str,
+        checkpoint_ns: str,
+        parent_id: Optional[str],
+        expires_at: int,
+    ) -> int:
+        """
+        Menor expiração entre os deltas da sessão após este put. Se algum
+        ancestral expira em menos de metade do TTL, renova todos para
+        `expires_at` (o histórico não pode perder ancestrais antes do HEAD).
+        """
+        if not parent_id:
+            return expires_at
+
+        hot = self.hot.peek((pk, session_id, checkpoint_ns))
+        if hot is not None and hot["checkpoint"]["id"] == parent_id:
+            oldest = hot.get("history_expires_at")
+        else:
+            head = self.table.get_item(
+                Key={"actor_id": pk, "session_id": self._checkpoint_prefix(session_id, checkpoint_ns) + HEAD},
+                ProjectionExpression="history_expires_at, expires_at",
+            ).get("Item")
+            oldest = _history_expiry(head) if head is not None else None
+
+        if oldest is not None and oldest - time.time() >= self.ttl_seconds / 2:
+            return oldest
+
+        self._refresh_history(pk, session_id, checkpoint_ns, expires_at)
+        return expires_at
+
+    def _refresh_history(self, pk: str, session_id: str, checkpoint_ns: str, expires_at: int) -> None:
+        """Regrava os deltas da sessão com a nova expiração (BatchWriteItem)"""
+        condition = Key("actor_id").eq(pk) & Key("session_id").begins_with(
+            self._checkpoint_prefix(session_id, checkpoint_ns)
+        )
+        items = [i for i in self._query(condition) if i.get("kind") == KIND_CHECKPOINT]
+        with self.table.batch_writer(overwrite_by_pkeys=["actor_id", "session_id"]) as batch:
+            for item in items:
+                batch.put_item(Item={**item, "expires_at": expires_at})
+        metrics.incr("checkpointer.history_refreshed", len(items))
+
+    def _build_delta(
+        self,
+        pk: str,
+        session_id: str,
+        checkpoint_ns: str,
+        parent_id: Optional[str],
+        values: Dict[str, Any],
+        new_versions: ChannelVersions,
+    ) -> dict:
+        """
+        Canais alterados. Uma lista cujo valor anterior (checkpoint pai,
+        conhecido neste processo) é uma janela do novo vira
+        (versão base, itens descartados do início, itens novos).
+        """
+        delta = {"versions": dict(new_versions), "values": {}, "windows": {}}
+        parent = None
+        last = self.hot.peek((pk, session_id, checkpoint_ns))
+        if last is not None and parent_id and last["checkpoint"]["id"] == parent_id:
+            parent = {"versions": last["checkpoint"].get("channel_versions", {}), "values": last["values"]}
+
+        for channel in new_versions:
+            if channel not in values:
+                continue
+            value = values[channel]
+            window = None
+            if parent is not None and isinstance(value, list):
+                base_version, base = parent["versions"].get(channel), parent["values"].get(channel)
+                if base_version is not None and isinstance(base, list):
+                    dropped = _window_offset(base, value)
+                    if dropped is not None:
+                        window = (base_version, dropped, value[len(base) - dropped:])
+
+            if window is None:
+                delta["values"][channel] = value
+            else:
+                delta["windows"][channel] = window
+                metrics.incr("checkpointer.delta.window")
+        return delta
+
+    def _remember(
+        self,
+        pk: str,
+        session_id: str,
+        checkpoint_ns: str,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        parent_id: Optional[str],
+        pending_writes: Sequence[tuple] = (),
+        history_expires_at: Optional[int] = None,
+    ) -> None:
+        """Guarda o checkpoint em memória (writes como {(task_id, idx): write})"""
+        c = copy.deepcopy({k: v for k, v in checkpoint.items() if k != "channel_values"})
+        self.hot.put((pk, session_id, checkpoint_ns), {
+            "checkpoint": c,
+            "values": dict(checkpoint["channel_values"]),
+            "metadata": metadata,
+            "parent_id": parent_id,
+            "history_expires_at": history_expires_at,
+            "writes": {
+                (task_id, idx): (task_id, channel, value, "", idx)
+                for idx, (task_id, channel, value) in enumerate(pending_writes)
+            },
+        })
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        if not writes:
+            return
+
+        pk, session_id, checkpoint_ns = self._keys(config)
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        prefix = self._writes_prefix(session_id, checkpoint_ns, checkpoint_id)
+        expiry = self._expiry()
+        hot_writes = {}
+
+        with self.table.batch_writer(overwrite_by_pkeys=["actor_id", "session_id"]) as batch:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                hot_writes[(task_id, write_idx)] = (task_id, channel, value, task_path, write_idx)
+                batch.put_item(Item={
+                    "actor_id": pk,
+                    "session_id": f"{prefix}{task_id}#{write_idx}",
+                    "kind": KIND_WRITE,
+                    "task_id": task_id,
+                    "task_path": task_path,
+                    "idx": write_idx,
+                    "channel": channel,
+                    "value": self._pack(value),
+                    **expiry,
+                })
+
+        def merge(hot: dict) -> dict:
+            if hot["checkpoint"]["id"] != checkpoint_id:
+                return hot
+            return {**hot, "writes": {**hot["writes"], **hot_writes}}
+
+        self.hot.update((pk, session_id, checkpoint_ns), merge)
+        metrics.incr("checkpointer.writes", len(writes))
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove checkpoints e writes da sessão (episódios são preservados)"""
+        actor_id, session_id = split_thread_id(thread_id)
+        pk = f"ACTOR#{actor_id}"
+
+        keys = []
+        for marker in ("CHECKPOINT", "WRITES"):
+            condition = Key("actor_id").eq(pk) & Key("session_id").begins_with(f"SESSION#{session_id}#{marker}#")
+            keys.extend(
+                {"actor_id": i["actor_id"], "session_id": i["session_id"]}
+                for i in self._query(condition, ProjectionExpression="actor_id, session_id")
+            )
+
+        with self.table.batch_writer() as batch:
+            for key in keys:
+                batch.delete_item(Key=key)
+
+        self.hot.pop_matching(lambda key: key[:2] == (pk, session_id))
+
+    # ---------- async (boto3 é síncrono: roda em thread) ----------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        # Leitura quente resolve sem trocar de thread
+        result = self._get_hot(config)
+        if result is not None:
+            return result
+        return await asyncio.to_thread(self._get_remote, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _history_expiry(head: dict) -> Optional[int]:
+    """Menor expiração dos deltas registrada no HEAD (HEAD antigo: a do próprio HEAD)"""
+    value = head.get("history_expires_at", head.get("expires_at"))
+    return int(value) if value is not None else None
+
+
+def _window_offset(base: list, value: list) -> Optional[int]:
+    """
+    Quantos itens do início de `base` foram descartados para que o restante
+    seja prefixo de `value` (janela deslizante + append). None se não for.
+    """
+    for dropped in range(len(base) + 1):
+        kept = len(base) - dropped
+        if kept > len(value):
+            continue
+        if kept == 0 or (value[0] == base[dropped] and value[:kept] == base[dropped:]):
+            return dropped
+    return None
@@ -1,15 +1,29 @@
 # src/repository/episode_store.py
+import json
 import boto3
 from datetime import datetime
-from typing import Optional, Dict
+from decimal import Decimal
+from typing import Optional, Dict, List
 from uuid import uuid4
 
+from src.config.settings import settings
+from src.repository.memory.vector_index import episode_record, vector_index
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
 DYNAMO_TABLE = "agent_turn_sessions"  # nome da tabela no DynamoDB
 
 class DynamoDbService:
-    def __init__(self, region_name="us-east-1"):
-        self.dynamodb = boto3.resource("dynamodb", region_name=region_name)
-        self.table = self.dynamodb.Table(DYNAMO_TABLE)
+    def __init__(
+        self,
+        region_name="us-east-1",
+        endpoint_url: Optional[str] = None,
+        table_name: str = DYNAMO_TABLE
+    ):
+        # endpoint_url permite apontar para um DynamoDB local (ex: DynamoDB Local)
+        self.dynamodb = boto3.resource("dynamodb", region_name=region_name, endpoint_url=endpoint_url)
+        self.table = self.dynamodb.Table(table_name)
 
     def save_episode_in_dynamo(
         self,
@@ -20,18 +34,47 @@ class DynamoDbService:
         topic: Optional[str] = None,
         signals: Optional[Dict] = None
     ):
+        item = self.build_episode_item(actor_id, session_id, goal, outcome, topic, signals)
+        self.table.put_item(Item=_to_dynamo(item))
+        _index_episodes([item])
+        return item["episode_id"]
+
+    def build_episode_item(
+        self,
+        actor_id: str,
+        session_id: str,
+        goal: str,
+        outcome: str,
+        topic: Optional[str] = None,
+        signals: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Item de episódio (JSON puro, serializável no journal do write-behind).
+        A sort key leva o instante de criação antes do id, para que
+        load_last_episode (ordem decrescente) retorne de fato o mais recente.
+        """
         episode_id = str(uuid4())
-        item = {
+        created_at = datetime.utcnow().isoformat()
+        return {
             "actor_id": f"ACTOR#{actor_id}",
-            "session_id": f"SESSION#{session_id}#EPISODE#{episode_id}",
+            "session_id": f"SESSION#{session_id}#EPISODE#{created_at}#{episode_id}",
+            "episode_id": episode_id,
             "goal": goal,
             "outcome": outcome,
             "topic": topic or "",
             "signals": signals or {},
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": created_at
         }
-        self.table.put_item(Item=item)
-        return episode_id
+
+    def save_episodes(self, items: List[Dict]) -> None:
+        """
+        Grava vários episódios com batch_writer (BatchWriteItem, até 25 por
+        chamada, com reenvio automático dos itens não processados).
+        """
+        with self.table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=_to_dynamo(item))
+        _index_episodes(items)
 
     def load_last_episode(self, actor_id: str, session_id: str) -> Optional[Dict]:
         """
@@ -54,3 +97,21 @@ class DynamoDbService:
         items = response.get("Items", [])
         return items[0] if items else None
 
+
+def _index_episodes(items: List[Dict]) -> None:
+    """Episódios gravados entram no índice vetorial local do actor"""
+    if not settings.VECTOR_INDEX_ENABLED:
+        return
+    try:
+        for item in items:
+            actor_id = item["actor_id"][len("ACTOR#"):]
+            session_id = item["session_id"][len("SESSION#"):].split("#EPISODE#")[0]
+            vector_index.add(actor_id, session_id, [episode_record(item)])
+    except Exception:
+        logger.exception("Failed to index episodes locally")
+
+
+def _to_dynamo(item: Dict) -> Dict:
+    """DynamoDB não aceita float: converte números para Decimal"""
+    return json.loads(json.dumps(item, default=str), parse_float=Decimal)
+
@@ -6,13 +6,52 @@ Responsável por:
 """
 import boto3
 from src.config.settings import settings
+from src.repository.memory.embedders import HASH_EMBEDDER
+from src.repository.memory.namespaces import MemoryNamespace, MemoryRecord, default_namespaces, merge_records
+from src.repository.memory.retrieval_cache import memory_cache
+from src.repository.memory.vector_index import turn_records, vector_index
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from typing import Dict, List, Optional
 import json
 
 logger = setup_logger(__name__)
 
+# Limite de mensagens por evento na API create_event
+MAX_EVENT_MESSAGES = 100
+
+# Buscas nos namespaces (boto3 síncrono) em paralelo, compartilhado pelo processo
+_retrieval_pool = ThreadPoolExecutor(
+    max_workers=settings.MEMORY_RETRIEVAL_WORKERS,
+    thread_name_prefix="memory-retrieval",
+)
+
+# Buscas submetidas e ainda não concluídas, por namespace. Uma busca
+# abandonada pelo budget não pode ser interrompida (boto3 síncrono) e segue
+# ocupando uma thread do pool até responder.
+_in_flight: Dict[str, int] = {}
+_in_flight_lock = threading.Lock()
+
+
+def _acquire_slot(name: str) -> bool:
+    with _in_flight_lock:
+        if _in_flight.get(name, 0) >= settings.MEMORY_RETRIEVAL_MAX_IN_FLIGHT:
+            return False
+        _in_flight[name] = _in_flight.get(name, 0) + 1
+        metrics.set_gauge("memory.retrieve.in_flight", sum(_in_flight.values()))
+        return True
+
+
+def _release_slot(name: str) -> None:
+    with _in_flight_lock:
+        _in_flight[name] -= 1
+        metrics.set_gauge("memory.retrieve.in_flight", sum(_in_flight.values()))
+
 
 class AgentMemory:
     """
@@ -38,87 +77,189 @@ class AgentMemory:
 
 
     # ---------- LOAD ----------
-    def load(self, actor_id: str, session_id: str, max_results: int, search_query: str) -> str:
+    def load(
+        self,
+        actor_id: str,
+        session_id: str,
+        max_results: int,
+        search_query: str,
+        namespaces: Optional[List[MemoryNamespace]] = None,
+    ) -> str:
+        """Textos dos registros relevantes dos namespaces (todos por padrão), um por linha"""
+        records = self.retrieve(actor_id, session_id, search_query, max_results=max_results, namespaces=namespaces)
+        return "\n".join(record.text for record in records)
+
+    def retrieve(
+        self,
+        actor_id: str,
+        session_id: str,
+        search_query: str,
+        max_results: Optional[int] = None,
+        namespaces: Optional[List[MemoryNamespace]] = None,
+        budget: Optional[float] = None,
+    ) -> List[MemoryRecord]:
+        """
+        Busca os namespaces em paralelo, aplica o score mínimo de cada um e
+        junta os registros (sem duplicados, por posição em cada namespace;
+        ver merge_records). Retorna dentro de
+        `budget` segundos com o que já respondeu; namespaces lentos ou com
+        erro ficam de fora.
+        """
         if not self.enabled:
-            return ""
+            return []
 
         actor_id = self._normalize_actor_id(actor_id)
-        
-        namespace = self._build_namespace(
-            settings.MEMORY_STRATEGY_ID,
-            actor_id,
-            session_id
-            )
+        namespaces = namespaces if namespaces is not None else default_namespaces()
+        budget = settings.MEMORY_RETRIEVAL_BUDGET if budget is None else budget
+        start = time.perf_counter()
+
+        futures = {}
+        for namespace in namespaces:
+            # Namespace com buscas demais pendentes (lento): não entra na fila do pool
+            if not _acquire_slot(namespace.name):
+                metrics.incr(f"memory.retrieve.{namespace.name}.saturated")
+                logger.warning(f"Memory namespace '{namespace.name}' skipped: too many searches in flight")
+                continue
+            future = _retrieval_pool.submit(self._search_namespace, namespace, actor_id, session_id, search_query)
+            future.add_done_callback(lambda _, name=namespace.name: _release_slot(name))
+            futures[future] = namespace
+
+        done, pending = wait(futures, timeout=budget) if futures else (set(), set())
+
+        results = []
+        for future in pending:
+            name = futures[future].name
+            metrics.incr(f"memory.retrieve.{name}.timeout")
+            # Já em execução: não cancela, fica rodando até o boto3 responder
+            if not future.cancel():
+                metrics.incr("memory.retrieve.abandoned")
+                metrics.incr(f"memory.retrieve.{name}.abandoned")
+            logger.warning(f"Memory namespace '{name}' skipped: no response in {budget}s")
+
+        # Ordem dos namespaces (não a de conclusão): desempate estável no merge
+        for future, namespace in futures.items():
+            if future not in done:
+                continue
+            try:
+                found = future.result()
+            except Exception:
+                logger.exception(f"Failed to load AgentCore memory ({namespace.name})")
+                metrics.incr(f"memory.retrieve.{namespace.name}.error")
+                continue
+
+            kept = [record for record in found if record.score >= namespace.min_score]
+            metrics.incr(f"memory.retrieve.{namespace.name}.records", len(kept))
+            metrics.incr(f"memory.retrieve.{namespace.name}.below_threshold", len(found) - len(kept))
+            results.append(kept)
+
+        metrics.observe("memory.retrieve_seconds", time.perf_counter() - start)
+        return merge_records(results, max_results)
+
+    def _search_namespace(
+        self,
+        namespace: MemoryNamespace,
+        actor_id: str,
+        session_id: str,
+        search_query: str,
+    ) -> List[MemoryRecord]:
+        """Registros de um namespace: cache, índice local (se houver) e AgentCore Memory"""
+        resolved = namespace.resolve(actor_id, session_id)
+
+        # Busca igual/parecida recente para o mesmo actor/sessão/namespace
+        cache_key = (actor_id, session_id, resolved)
+        if settings.MEMORY_CACHE_ENABLED:
+            cached = memory_cache.get(cache_key, search_query, namespace.top_k)
+            if cached is not None:
+                return cached
+
+        # Índice vetorial local: a busca remota só quando ele não basta
+        local = []
+        if namespace.local:
+            local = self._search_local(actor_id, session_id, search_query, namespace.top_k, namespace.name)
+            # Hash embedding é só lexical: complementa, não substitui, a busca remota
+            semantic = settings.VECTOR_INDEX_EMBEDDER != HASH_EMBEDDER
+            if semantic and local and len(local) >= min(namespace.top_k, settings.VECTOR_INDEX_MIN_HITS):
+                metrics.incr("memory.local.sufficient")
+                return local
+            if settings.VECTOR_INDEX_ENABLED:
+                metrics.incr("memory.local.insufficient")
+
+        search_criteria = {
+            "searchQuery": search_query,  # pode ser vazio se quiser todos os registros
+            "topK": namespace.top_k,
+        }
+        if namespace.strategy_id:
+            search_criteria["memoryStrategyId"] = namespace.strategy_id
 
         try:
             response = self.client.retrieve_memory_records(
-            memoryId=settings.MEMORY_ID,
-            namespace=namespace,
-            searchCriteria={
-                "searchQuery": search_query,  # pode ser vazio se quiser todos os registros
-                "memoryStrategyId": settings.MEMORY_STRATEGY_ID,
-                "topK": max_results,
-            },
-        )
+                memoryId=settings.MEMORY_ID,
+                namespace=resolved,
+                searchCriteria=search_criteria,
+            )
+        except Exception:
+            if local:
+                logger.exception(f"Failed to load AgentCore memory ({namespace.name}); using local records")
+                return local
+            raise
 
-            summaries = response.get("memoryRecordSummaries", [])
+        records = []
+        for summary in response.get("memoryRecordSummaries", []):
+            text = (summary.get("content") or {}).get("text")
+            if text:
+                records.append(MemoryRecord(text, float(summary.get("score") or 0.0), namespace.name))
 
-            texts = []
-            
-            for summary in summaries:
-                content = summary.get("content", {})
-                text = content.get("text")
-                if text:
-                    texts.append(text)
+        if local:
+            # Escalas diferentes (cosseno local x relevância remota): junta por posição
+            records = merge_records([records, local], namespace.top_k)
 
-            return "\n".join(texts)
+        # Falhas não entram no cache; resultado vazio entra
+        if settings.MEMORY_CACHE_ENABLED:
+            memory_cache.set(cache_key, search_query, namespace.top_k, records)
 
-        except Exception:
-            logger.exception("Failed to load AgentCore memory")
-            return ""
+        return records
 
     # ---------- SAVE ----------
     def save_summary_interaction(self, state) -> None:
         """
         Persiste informações relevantes do estado no AgentCore Memory.
+        Chamada síncrona; no caminho da resposta use o write-behind
+        (src/repository/write_behind.py).
         """
-        if not self.enabled:
-            return
-
-        if not self._should_persist(state):
-            return
+        payload = self.build_turn_payload(state)
 
-        actor_id = self._normalize_actor_id(state["actor_id"])
-        session_id = self._build_session_id(state)
-        messages = self._build_messages(state)
-        event_timestamp = datetime.utcnow()
-
-        if not messages:
+        if not payload:
             return
 
         try:
-            self.client.create_event(
-                memoryId=settings.MEMORY_ID,
-                actorId=actor_id,
-                sessionId=session_id,
-                eventTimestamp=event_timestamp,
-                payload=messages
-            )
-            print("saved")
+            self.create_event(state["actor_id"], self._build_session_id(state), payload)
             logger.info("AgentCore memory saved")
-            
 
         except Exception:
             logger.exception("Failed to save AgentCore memory")
-            
-    
-    
+
     def save_episode_in_agentcore_memory(self, state) -> None:
-        if not self.enabled:
+        payload = self.build_episode_payload(state)
+
+        if not payload:
             return
 
-        actor_id = self._normalize_actor_id(state["actor_id"])
-        session_id = self._build_session_id(state)
+        try:
+            self.create_event(state["actor_id"], self._build_session_id(state), payload)
+        except Exception:
+            logger.exception("Failed to save AgentCore memory")
+
+    def build_turn_payload(self, state) -> list[dict]:
+        """Mensagens USER/ASSISTANT do turno (vazio se não deve persistir)"""
+        if not self.enabled or not self._should_persist(state):
+            return []
+
+        return self._build_messages(state)
+
+    def build_episode_payload(self, state) -> list[dict]:
+        """Episódio do turno (goal/actions/outcome) no formato do AgentCore Memory"""
+        if not self.enabled:
+            return []
 
         episode_content = {
             "goal": state.get("goal", "unknown"),
@@ -131,7 +272,7 @@ class AgentMemory:
         }
 
         # Payload no formato aceito pelo AgentCore Memory
-        episode_payload = [
+        return [
             {
                 "conversational": {
                     "role": "ASSISTANT",              # obrigatório
@@ -142,20 +283,56 @@ class AgentMemory:
             }
         ]
 
+    def create_event(
+        self,
+        actor_id: str,
+        session_id: str,
+        payload: list[dict],
+        event_timestamp: Optional[datetime] = None,
+        client_token: Optional[str] = None,
+    ) -> None:
+        """
+        Envia um evento (até MAX_EVENT_MESSAGES mensagens) ao AgentCore Memory.
+        Levanta a exceção do boto3 em caso de falha.
+        """
+        params = {
+            "memoryId": settings.MEMORY_ID,
+            "actorId": self._normalize_actor_id(actor_id),
+            "sessionId": session_id,
+            "eventTimestamp": event_timestamp or datetime.utcnow(),
+            "payload": payload,
+        }
+        if client_token:
+            params["clientToken"] = client_token
+
+        self.client.create_event(**params)
+
+        # Novo evento do actor: buscas em cache deixam de refletir a memória
+        memory_cache.invalidate_actor(params["actorId"])
+
+        if settings.VECTOR_INDEX_ENABLED:
+            try:
+                vector_index.add(params["actorId"], session_id, turn_records(payload))
+            except Exception:
+                logger.exception("Failed to index memory event locally")
+
+    def _search_local(
+        self,
+        actor_id: str,
+        session_id: str,
+        query: str,
+        max_results: int,
+        namespace: str,
+    ) -> List[MemoryRecord]:
+        """Registros do índice vetorial local da sessão (vazio se desabilitado ou em erro)"""
+        if not settings.VECTOR_INDEX_ENABLED:
+            return []
         try:
-            event_timestamp = datetime.utcnow() 
-            
-            self.client.create_event(
-                memoryId=settings.MEMORY_ID,
-                actorId=actor_id,
-                sessionId=session_id,
-                eventTimestamp=event_timestamp,
-                payload=episode_payload
-            )
+            hits = vector_index.search(actor_id, query, max_results, session_id=session_id)
         except Exception:
-            logger.exception("Failed to save AgentCore memory")
-
-            
+            logger.exception("Local vector search failed")
+            return []
+        return [MemoryRecord(hit.text, hit.score, namespace) for hit in hits]
 
     # ---------- helpers ----------
     def _should_persist(self, state) -> bool:
@@ -180,9 +357,7 @@ class AgentMemory:
         Converte o estado em eventos de memória.
         """
         messages = state.get("messages", [])
-        
-        print("Messages", messages)
-    
+
         user_input = None
         for msg in reversed(messages):
             role = getattr(msg, "role", None) if not isinstance(msg, dict) else msg.get("role")
@@ -215,22 +390,6 @@ class AgentMemory:
     def _normalize_actor_id(self, actor_id: str) -> str:
         return actor_id.lower().replace(" ", "-")
     
-    def _build_namespace(
-        self,
-        memory_strategy_id: str,
-        actor_id: str,
-        session_id: str,
-    ) -> str:
-        actor_id = actor_id.lower().replace(" ", "-")
-        session_id = session_id.lower().replace(" ", "-")
-
-        return (
-            f"/strategies/{memory_strategy_id}"
-            f"/actors/{actor_id}"
-            f"/sessions/{session_id}"
-        )
-
-    
     # ---------- INJECT ----------
     def inject_into_state(self, state, max_results=5) -> None:
         """
@@ -0,0 +1,84 @@
+"""
+Embedders de CPU para o índice vetorial local (src/repository/memory/vector_index.py)
+
+Um embedder expõe `dim` e `embed(texts) -> np.ndarray` (n x dim, float32,
+linhas com norma L2 = 1, para que o produto interno seja o cosseno).
+
+- HashEmbedder: feature hashing de tokens e bigramas. Determinístico, sem
+  modelo nem download; serve como padrão e para testes
+- VECTOR_INDEX_EMBEDDER="pacote.modulo:fabrica": carrega outro embedder
+  (ex: um modelo de sentence embeddings local), instanciado sem argumentos
+"""
+import hashlib
+import importlib
+from functools import lru_cache
+from typing import List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from src.config.settings import settings
+from src.utils.intent_classifier import tokenize
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+HASH_EMBEDDER = "hash"
+
+
+class Embedder(Protocol):
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        ...
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature: str, dim: int) -> int:
+    """Posição (com sinal) da feature no vetor: +-(índice + 1)"""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+    index = digest % dim + 1
+    return index if digest >> 63 else -index
+
+
+class HashEmbedder:
+    """Feature hashing com sinal de tokens e bigramas (sem acentos, minúsculas)"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                bucket = _bucket(feature, self.dim)
+                vectors[row, abs(bucket) - 1] += 1.0 if bucket > 0 else -1.0
+        return normalize(vectors)
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Linhas com norma L2 = 1 (linhas zeradas continuam zeradas)"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def load_embedder(spec: Optional[str] = None, dim: Optional[int] = None) -> Embedder:
+    """Embedder configurado em VECTOR_INDEX_EMBEDDER ("hash" ou "modulo:fabrica")"""
+    spec = spec or settings.VECTOR_INDEX_EMBEDDER
+    dim = dim or settings.VECTOR_INDEX_DIM
+
+    if spec == HASH_EMBEDDER:
+        return HashEmbedder(dim)
+
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"VECTOR_INDEX_EMBEDDER must be 'hash' or 'module:factory', got {spec!r}")
+
+    embedder = getattr(importlib.import_module(module_name), attr)()
+    logger.info(f"Vector index embedder: {spec} (dim={embedder.dim})")
+    return embedder
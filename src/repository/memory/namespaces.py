@@ -0,0 +1,107 @@
+"""
+Namespaces do AgentCore Memory consultados na recuperação de memória
+
+- session:    /strategies/{memoryStrategyId}/actors/{actorId}/sessions/{sessionId}
+              episódios da sessão (com o índice vetorial local na frente)
+- reflection: /strategies/{memoryStrategyId}/actors/{actorId}
+              reflexões do actor (reflectionConfiguration, ver
+              agentcore_resources/memory/create_memory.py)
+- preference: MEMORY_PREFERENCE_NAMESPACE (padrão /preferences/{actorId});
+              vazio desabilita
+
+Cada namespace tem seu topK e score mínimo (como o retrieval_config de
+agentcore_resources/memory/automatic_memory.py).
+
+Os scores não são comparáveis entre fontes (cosseno do índice local x
+relevância do AgentCore Memory), então os resultados são combinados pela
+posição em cada lista (reciprocal rank fusion), não pelo score.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from src.config.settings import settings
+
+# Constante do reciprocal rank fusion: 1 / (RRF_K + posição)
+RRF_K = 60
+
+SESSION = "session"
+REFLECTION = "reflection"
+PREFERENCE = "preference"
+
+
+class MemoryNamespace(NamedTuple):
+    name: str
+    template: str
+    top_k: int
+    min_score: float
+    strategy_id: Optional[str] = None
+    # Consulta o índice vetorial local antes do remoto
+    local: bool = False
+
+    def resolve(self, actor_id: str, session_id: str) -> str:
+        return self.template.format(
+            memoryStrategyId=self.strategy_id or "",
+            actorId=actor_id,
+            sessionId=session_id.lower().replace(" ", "-"),
+        )
+
+
+class MemoryRecord(NamedTuple):
+    text: str
+    score: float
+    namespace: str
+
+
+def default_namespaces() -> List[MemoryNamespace]:
+    namespaces = [
+        MemoryNamespace(
+            name=SESSION,
+            template="/strategies/{memoryStrategyId}/actors/{actorId}/sessions/{sessionId}",
+            top_k=settings.MEMORY_SESSION_TOP_K,
+            min_score=settings.MEMORY_SESSION_MIN_SCORE,
+            strategy_id=settings.MEMORY_STRATEGY_ID,
+            local=True,
+        ),
+        MemoryNamespace(
+            name=REFLECTION,
+            template="/strategies/{memoryStrategyId}/actors/{actorId}",
+            top_k=settings.MEMORY_REFLECTION_TOP_K,
+            min_score=settings.MEMORY_REFLECTION_MIN_SCORE,
+            strategy_id=settings.MEMORY_STRATEGY_ID,
+        ),
+    ]
+    if settings.MEMORY_PREFERENCE_NAMESPACE:
+        namespaces.append(MemoryNamespace(
+            name=PREFERENCE,
+            template=settings.MEMORY_PREFERENCE_NAMESPACE,
+            top_k=settings.MEMORY_PREFERENCE_TOP_K,
+            min_score=settings.MEMORY_PREFERENCE_MIN_SCORE,
+            strategy_id=settings.MEMORY_PREFERENCE_STRATEGY_ID,
+        ))
+    return namespaces
+
+
+def merge_records(
+    results: Iterable[Sequence[MemoryRecord]],
+    max_results: Optional[int] = None,
+) -> List[MemoryRecord]:
+    """
+    Junta as listas de cada fonte por reciprocal rank fusion: cada registro
+    soma 1 / (RRF_K + posição) em cada lista em que aparece (mesmo texto,
+    ignorando caixa e espaços). Empates seguem a ordem das listas. Os
+    registros mantêm o score original da primeira lista em que aparecem.
+    """
+    fused: Dict[str, float] = {}
+    first: Dict[str, MemoryRecord] = {}
+    for records in results:
+        ranked = sorted(records, key=lambda r: r.score, reverse=True)
+        seen = set()
+        for rank, record in enumerate(ranked, start=1):
+            key = " ".join(record.text.lower().split())
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            first.setdefault(key, record)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank)
+
+    merged = [first[key] for key in sorted(fused, key=fused.get, reverse=True)]
+    return merged[:max_results] if max_results is not None else merged
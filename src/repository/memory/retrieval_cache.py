@@ -0,0 +1,162 @@
+"""
+Cache em processo das buscas no AgentCore Memory
+
+Chave: (actor, sessão, namespace). Para cada chave guardamos as últimas
+buscas (tokens da query + registros retornados), com TTL. Uma nova busca
+reaproveita um resultado quando a query é igual ou suficientemente
+parecida (Jaccard dos tokens >= MEMORY_CACHE_SIMILARITY) e o topK
+armazenado cobre o pedido.
+
+Quando este processo grava um evento para o actor, todas as entradas
+dele são invalidadas.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from src.config.settings import settings
+from src.utils.intent_classifier import tokenize
+from src.utils.metrics import metrics
+
+CacheKey = Tuple[str, str, str]
+
+
+class _CachedSearch(NamedTuple):
+    tokens: FrozenSet[str]
+    top_k: int
+    records: list
+    expires_at: float
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MemoryRetrievalCache:
+    """LRU de chaves (actor, sessão, namespace), cada uma com até N buscas recentes"""
+
+    def __init__(
+        self,
+        max_keys: int,
+        queries_per_key: int,
+        ttl: float,
+        similarity: float,
+    ):
+        self.max_keys = max_keys
+        self.queries_per_key = queries_per_key
+        self.ttl = ttl
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, List[_CachedSearch]]" = OrderedDict()
+        self._by_actor: Dict[str, Set[CacheKey]] = {}
+
+    def get(self, key: CacheKey, query: str, top_k: int) -> Optional[list]:
+        """Registros de uma busca equivalente em cache, ou None"""
+        tokens = frozenset(tokenize(query))
+        now = time.monotonic()
+
+        with self._lock:
+            searches = self._entries.get(key)
+            if searches is None:
+                self._count("miss")
+                return None
+
+            live = [s for s in searches if s.expires_at > now]
+            if len(live) != len(searches):
+                metrics.incr("memory_cache.expired", len(searches) - len(live))
+                self._replace(key, live)
+
+            best, best_score = None, 0.0
+            for search in live:
+                if search.top_k < top_k:
+                    continue
+                score = jaccard(tokens, search.tokens)
+                if score >= self.similarity and score > best_score:
+                    best, best_score = search, score
+
+            if best is None:
+                self._count("miss")
+                return None
+
+            self._entries.move_to_end(key)
+            self._count("hit")
+            metrics.incr("memory_cache.hit_exact" if best_score == 1.0 else "memory_cache.hit_similar")
+            return best.records[:top_k]
+
+    def set(self, key: CacheKey, query: str, top_k: int, records: list) -> None:
+        if self.ttl <= 0:
+            return
+
+        search = _CachedSearch(
+            tokens=frozenset(tokenize(query)),
+            top_k=top_k,
+            records=list(records),
+            expires_at=time.monotonic() + self.ttl,
+        )
+
+        with self._lock:
+            # A mesma query substitui a anterior; mantém as N mais recentes
+            searches = [s for s in self._entries.get(key, []) if s.tokens != search.tokens]
+            searches.append(search)
+            self._replace(key, searches[-self.queries_per_key:])
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_keys:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(evicted)
+                metrics.incr("memory_cache.eviction")
+
+            metrics.set_gauge("memory_cache.keys", len(self._entries))
+
+    def invalidate_actor(self, actor_id: str) -> None:
+        """Remove todas as buscas em cache do actor (após uma gravação)"""
+        with self._lock:
+            keys = self._by_actor.pop(actor_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                metrics.incr("memory_cache.invalidated", len(keys))
+            metrics.set_gauge("memory_cache.keys", len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_actor.clear()
+            metrics.set_gauge("memory_cache.keys", 0)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._entries),
+            "hit_rate": metrics.ratio("memory_cache.hit", "memory_cache.miss"),
+            **metrics.snapshot("memory_cache.")["counters"],
+        }
+
+    def _replace(self, key: CacheKey, searches: List[_CachedSearch]) -> None:
+        if searches:
+            self._entries[key] = searches
+            self._by_actor.setdefault(key[0], set()).add(key)
+        else:
+            self._entries.pop(key, None)
+            self._unindex(key)
+
+    def _unindex(self, key: CacheKey) -> None:
+        keys = self._by_actor.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_actor[key[0]]
+
+    def _count(self, event: str) -> None:
+        metrics.incr(f"memory_cache.{event}")
+
+
+# Cache global, compartilhado pelas instâncias de AgentMemory do processo
+memory_cache = MemoryRetrievalCache(
+    max_keys=settings.MEMORY_CACHE_MAX_KEYS,
+    queries_per_key=settings.MEMORY_CACHE_QUERIES_PER_KEY,
+    ttl=settings.MEMORY_CACHE_TTL,
+    similarity=settings.MEMORY_CACHE_SIMILARITY,
+)
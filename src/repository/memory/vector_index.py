@@ -0,0 +1,260 @@
+"""
+Índice vetorial local da memória episódica (camada antes do AgentCore Memory)
+
+Turnos gravados via AgentMemory.create_event e episódios gravados via
+DynamoDbService entram aqui já com embedding (embedder de CPU, ver
+src/repository/memory/embedders.py). Cada actor tem uma matriz NumPy
+float32 (uma linha por registro, norma 1) e a busca é um produto
+matriz-vetor + top-k parcial (argpartition), opcionalmente restrita a
+uma sessão.
+
+Em AgentMemory.load, com um embedder semântico o AgentCore Memory só é
+consultado quando o índice local não tem registros suficientes acima de
+VECTOR_INDEX_MIN_SCORE. Com o HashEmbedder (só lexical) a busca remota
+sempre roda e os acertos locais são combinados a ela por posição (RRF).
+Desligado por padrão (VECTOR_INDEX_ENABLED).
+
+Limites: VECTOR_INDEX_MAX_RECORDS por actor (descarta os mais antigos)
+e VECTOR_INDEX_MAX_ACTORS (LRU de actors). Gauges vector_index.actors,
+vector_index.records e vector_index.bytes.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from src.config.settings import settings
+from src.repository.memory.embedders import Embedder, load_embedder, normalize
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+# Linhas alocadas na criação da matriz de um actor (cresce dobrando)
+INITIAL_CAPACITY = 64
+
+
+class VectorHit(NamedTuple):
+    score: float
+    text: str
+    session_id: str
+
+
+def normalize_actor_id(actor_id: str) -> str:
+    """Mesma normalização do AgentMemory (actorId do AgentCore Memory)"""
+    return actor_id.lower().replace(" ", "-")
+
+
+class ActorIndex:
+    """Registros de um actor: matriz de embeddings + textos + sessão de cada linha"""
+
+    def __init__(self, dim: int):
+        self.size = 0
+        self.vectors = np.zeros((INITIAL_CAPACITY, dim), dtype=np.float32)
+        self.session_codes = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.texts: List[str] = []
+        self.sessions: Dict[str, int] = {}
+        self._digests: set = set()
+        self._text_bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.session_codes.nbytes + self._text_bytes
+
+    def add(self, session_id: str, texts: Sequence[str], vectors: np.ndarray, max_records: int) -> int:
+        """Acrescenta os registros ainda não indexados; retorna quantos"""
+        code = self.sessions.setdefault(session_id, len(self.sessions))
+        added = 0
+        for text, vector in zip(texts, vectors):
+            digest = hashlib.blake2b(f"{session_id}\x00{text}".encode(), digest_size=16).digest()
+            if digest in self._digests:
+                continue
+            self._digests.add(digest)
+
+            if self.size == len(self.vectors):
+                self._grow()
+            self.vectors[self.size] = vector
+            self.session_codes[self.size] = code
+            self.texts.append(text)
+            self._text_bytes += len(text)
+            self.size += 1
+            added += 1
+
+        if self.size > max_records:
+            # Descarta os mais antigos (10% a mais, para não compactar a cada add)
+            self._drop_oldest(self.size - max_records + max_records // 10)
+        return added
+
+    def search(self, query: np.ndarray, top_k: int, session_id: Optional[str] = None) -> List[VectorHit]:
+        if self.size == 0 or top_k <= 0:
+            return []
+
+        scores = self.vectors[:self.size] @ query
+        if session_id is not None:
+            code = self.sessions.get(session_id)
+            if code is None:
+                return []
+            scores = np.where(self.session_codes[:self.size] == code, scores, -np.inf)
+
+        k = min(top_k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        names = {code: name for name, code in self.sessions.items()}
+        return [
+            VectorHit(float(scores[i]), self.texts[i], names[int(self.session_codes[i])])
+            for i in top
+            if np.isfinite(scores[i])
+        ]
+
+    def _grow(self) -> None:
+        capacity = len(self.vectors) * 2
+        vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        codes = np.zeros(capacity, dtype=np.int32)
+        codes[:self.size] = self.session_codes[:self.size]
+        self.vectors, self.session_codes = vectors, codes
+
+    def _drop_oldest(self, count: int) -> None:
+        count = min(count, self.size)
+        keep = self.size - count
+        self.vectors[:keep] = self.vectors[count:self.size]
+        self.session_codes[:keep] = self.session_codes[count:self.size]
+        self.texts = self.texts[count:]
+        self._text_bytes = sum(len(t) for t in self.texts)
+        self.size = keep
+        names = {code: name for name, code in self.sessions.items()}
+        self._digests = {
+            hashlib.blake2b(f"{names[int(code)]}\x00{text}".encode(), digest_size=16).digest()
+            for code, text in zip(self.session_codes[:keep], self.texts)
+        }
+        metrics.incr("vector_index.dropped", count)
+
+
+class LocalVectorIndex:
+    """Índices por actor (LRU), com embedder compartilhado"""
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        max_records: Optional[int] = None,
+        max_actors: Optional[int] = None,
+    ):
+        self._embedder = embedder
+        self.max_records = max_records or settings.VECTOR_INDEX_MAX_RECORDS
+        self.max_actors = max_actors or settings.VECTOR_INDEX_MAX_ACTORS
+        self._lock = threading.Lock()
+        self._actors: "OrderedDict[str, ActorIndex]" = OrderedDict()
+
+    @property
+    def embedder(self) -> Embedder:
+        # Carregado no primeiro uso (um modelo plugado pode ser pesado)
+        if self._embedder is None:
+            self._embedder = load_embedder()
+        return self._embedder
+
+    def add(self, actor_id: str, session_id: str, texts: Sequence[str]) -> int:
+        texts = [t for t in texts if t and t.strip()]
+        if not texts:
+            return 0
+
+        start = time.perf_counter()
+        vectors = normalize(np.asarray(self.embedder.embed(texts), dtype=np.float32))
+        actor_id = normalize_actor_id(actor_id)
+
+        with self._lock:
+            index = self._actors.get(actor_id)
+            if index is None:
+                index = self._actors[actor_id] = ActorIndex(vectors.shape[1])
+            self._actors.move_to_end(actor_id)
+            added = index.add(session_id, texts, vectors, self.max_records)
+
+            while len(self._actors) > self.max_actors:
+                self._actors.popitem(last=False)
+                metrics.incr("vector_index.actor_eviction")
+            self._publish()
+
+        metrics.incr("vector_index.added", added)
+        metrics.observe("vector_index.add_seconds", time.perf_counter() - start)
+        return added
+
+    def search(
+        self,
+        actor_id: str,
+        query: str,
+        top_k: int,
+        session_id: Optional[str] = None,
+        min_score: Optional[float] = None,
+    ) -> List[VectorHit]:
+        """Top-k por cosseno (maior primeiro), só com score >= min_score"""
+        min_score = settings.VECTOR_INDEX_MIN_SCORE if min_score is None else min_score
+        actor_id = normalize_actor_id(actor_id)
+
+        with self._lock:
+            if actor_id not in self._actors:
+                return []
+
+        start = time.perf_counter()
+        query_vector = normalize(np.asarray(self.embedder.embed([query or ""]), dtype=np.float32))[0]
+
+        with self._lock:
+            index = self._actors.get(actor_id)
+            if index is None:
+                return []
+            self._actors.move_to_end(actor_id)
+            hits = index.search(query_vector, top_k, session_id)
+
+        metrics.observe("vector_index.search_seconds", time.perf_counter() - start)
+        return [hit for hit in hits if hit.score >= min_score]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._actors.clear()
+            self._publish()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "actors": len(self._actors),
+                "records": sum(i.size for i in self._actors.values()),
+                "bytes": sum(i.nbytes for i in self._actors.values()),
+            }
+
+    def _publish(self) -> None:
+        metrics.set_gauge("vector_index.actors", len(self._actors))
+        metrics.set_gauge("vector_index.records", sum(i.size for i in self._actors.values()))
+        metrics.set_gauge("vector_index.bytes", sum(i.nbytes for i in self._actors.values()))
+
+
+# Índice global, alimentado pelas gravações de AgentMemory e DynamoDbService
+vector_index = LocalVectorIndex()
+
+
+# ---------- registros a partir das gravações ----------
+
+def turn_records(payload: Sequence[dict]) -> List[str]:
+    """
+    Um registro por turno (USER + ASSISTANT seguintes) de um payload do
+    create_event. Mensagens de episódio (JSON) ficam de fora: os episódios
+    são indexados a partir do DynamoDbService.
+    """
+    records, user_text = [], None
+    for message in payload:
+        conversational = message.get("conversational") or {}
+        role = conversational.get("role")
+        text = (conversational.get("content") or {}).get("text") or ""
+        if role == "USER":
+            user_text = text
+        elif role == "ASSISTANT" and user_text is not None:
+            records.append(f"USER: {user_text}\nASSISTANT: {text}")
+            user_text = None
+    return records
+
+
+def episode_record(item: dict) -> str:
+    """Texto indexado de um episódio (item do DynamoDbService)"""
+    lines = [f"{key}: {item[key]}" for key in ("goal", "topic", "outcome") if item.get(key)]
+    return "\n".join(lines)
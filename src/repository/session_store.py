@@ -0,0 +1,178 @@
+"""
+Estado quente de sessões em memória do processo
+
+O AgentCore Runtime direciona uma sessão sempre ao mesmo container, então
+os turnos seguintes de uma conversa podem ser atendidos daqui, sem ler o
+DynamoDB/AgentCore Memory. As leituras remotas ficam como fallback (miss,
+expiração por inatividade ou outro container).
+
+LRU limitada por número de sessões e por bytes (tamanho estimado pelo
+pickle do valor), com TTL de inatividade. Gauges `<nome>.sessions` e
+`<nome>.bytes` expõem o uso de memória.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from src.config.settings import settings
+from src.utils.metrics import metrics
+
+
+class _Entry(NamedTuple):
+    value: Any
+    size: int
+    touched_at: float
+
+
+def estimate_size(value: Any) -> int:
+    """Tamanho aproximado em bytes (pickle; repr quando não serializável)"""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return len(repr(value).encode())
+
+
+class SessionStore:
+    """LRU de sessões com limite de quantidade, de bytes e TTL de inatividade"""
+
+    def __init__(
+        self,
+        name: str,
+        max_sessions: int,
+        max_bytes: int,
+        idle_ttl: float,
+        sizer: Callable[[Any], int] = estimate_size,
+    ):
+        self.name = name
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.sizer = sizer
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Valor da sessão (renova o TTL), ou None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count("miss")
+                return None
+
+            if self.idle_ttl > 0 and now - entry.touched_at > self.idle_ttl:
+                self._remove(key)
+                self._count("expired")
+                self._count("miss")
+                self._publish()
+                return None
+
+            self._entries[key] = entry._replace(touched_at=now)
+            self._entries.move_to_end(key)
+            self._count("hit")
+            return entry.value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Valor em memória sem renovar o TTL nem contar hit/miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizer(value)
+        if size > self.max_bytes:
+            # Maior que o orçamento inteiro: não guarda
+            self.pop(key)
+            self._count("oversize")
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(value, size, time.monotonic())
+            self._bytes += size
+            self._evict()
+            self._publish()
+
+    def update(self, key: Hashable, fn: Callable[[Any], Any]) -> bool:
+        """
+        Aplica `fn` ao valor em cache (sem renovar o TTL nem contar
+        hit/miss). Retorna False se a sessão não está em memória.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            value = fn(entry.value)
+            size = self.sizer(value)
+            self._bytes += size - entry.size
+            self._entries[key] = entry._replace(value=value, size=size)
+            self._evict()
+            self._publish()
+            return True
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if self._remove(key):
+                self._publish()
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove as chaves que satisfazem `predicate`; retorna quantas"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            if keys:
+                self._publish()
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._publish()
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._entries),
+            "bytes": self._bytes,
+            "hit_rate": metrics.ratio(f"{self.name}.hit", f"{self.name}.miss"),
+            **metrics.snapshot(f"{self.name}.")["counters"],
+        }
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        return True
+
+    def _evict(self) -> None:
+        """Remove as sessões menos usadas até caber nos dois limites"""
+        while self._entries and (len(self._entries) > self.max_sessions or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._count("eviction")
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}.sessions", len(self._entries))
+        metrics.set_gauge(f"{self.name}.bytes", self._bytes)
+
+    def _count(self, event: str) -> None:
+        metrics.incr(f"{self.name}.{event}")
+
+
+def new_session_store(name: str) -> SessionStore:
+    """SessionStore com os limites de settings (SESSION_STORE_*)"""
+    return SessionStore(
+        name=name,
+        max_sessions=settings.SESSION_STORE_MAX_SESSIONS,
+        max_bytes=settings.SESSION_STORE_MAX_BYTES,
+        idle_ttl=settings.SESSION_STORE_IDLE_TTL,
+    )
+
+
+# Estado quente por sessão do agente: histórico, perfil, tópico e último episódio
+session_store = new_session_store("session_store")
@@ -0,0 +1,375 @@
+"""
+Persistência write-behind de turnos e episódios
+
+O caminho da resposta só enfileira registros (memória do turno, episódio);
+uma thread em background os agrupa e grava:
+
+- AgentCore Memory: um `create_event` por registro (turno ou episódio),
+  com o horário do próprio registro, na ordem de chegada. Turnos não são
+  juntados em um evento: a API tem um único eventTimestamp por evento e
+  as mensagens não levam horário próprio
+- DynamoDB: episódios em lote via batch_writer
+
+Cada registro é antes anotado em um journal local append-only (JSONL).
+Registros sem ack no journal (ex: processo morto antes do flush) são
+reenfileirados na próxima inicialização. No shutdown (atexit) a fila é
+drenada até WRITE_BEHIND_SHUTDOWN_TIMEOUT.
+"""
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from src.config.settings import settings
+from src.repository.dynamodb.dynamodb_service import DynamoDbService
+from src.repository.memory.agent_memory import AgentMemory
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+# Tipos de registro
+MEMORY_EVENT = "memory_event"
+EPISODE = "episode"
+
+# Sentinela que acorda a thread no shutdown
+_STOP = object()
+
+
+class WriteBehindJournal:
+    """
+    Journal append-only: uma linha por registro e uma por ack (lista de ids).
+    Quando tudo foi confirmado o arquivo é truncado.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pending: set = set()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def recover(self) -> List[dict]:
+        """Registros sem ack (em ordem) e compacta o arquivo só com eles"""
+        if not os.path.exists(self.path):
+            return []
+
+        records: Dict[str, dict] = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Linha parcial (crash no meio da escrita)
+                    continue
+                if "ack" in entry:
+                    for record_id in entry["ack"]:
+                        records.pop(record_id, None)
+                elif "id" in entry:
+                    records[entry["id"]] = entry
+
+        pending = list(records.values())
+        with self._lock:
+            self._rewrite(pending)
+            self._pending = {r["id"] for r in pending}
+        return pending
+
+    def append(self, record: dict) -> None:
+        with self._lock:
+            self._write(record)
+            self._pending.add(record["id"])
+
+    def ack(self, record_ids: List[str]) -> None:
+        with self._lock:
+            self._pending.difference_update(record_ids)
+            if self._pending:
+                self._write({"ack": record_ids})
+            else:
+                self._rewrite([])
+
+    def _write(self, entry: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _rewrite(self, records: List[dict]) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+class WriteBehindPipeline:
+    """Fila + thread de flush em lote para AgentCore Memory e DynamoDB"""
+
+    def __init__(
+        self,
+        memory: Optional[AgentMemory] = None,
+        store: Optional[DynamoDbService] = None,
+        journal: Optional[WriteBehindJournal] = None,
+    ):
+        self.memory = memory or AgentMemory()
+        self.store = store
+        if self.store is None and settings.EPISODE_LOOKUP_ENABLED:
+            self.store = DynamoDbService(region_name=settings.AWS_REGION, endpoint_url=settings.DYNAMODB_ENDPOINT_URL)
+        self.journal = journal
+
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.WRITE_BEHIND_MAX_QUEUE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ---------- produção (caminho da resposta) ----------
+
+    def submit(self, state: dict) -> None:
+        """Enfileira os registros do turno; não faz I/O remoto"""
+        actor_id = state.get("actor_id")
+        if not actor_id:
+            return
+
+        session_id = state.get("session_id") or str(uuid4())
+
+        # Turno e episódio em eventos separados, como nas gravações síncronas
+        # (as estratégias de memória extraem de cada evento)
+        for payload in (self.memory.build_turn_payload(state), self.memory.build_episode_payload(state)):
+            if payload:
+                self._enqueue({
+                    "kind": MEMORY_EVENT,
+                    "actor_id": actor_id,
+                    "session_id": session_id,
+                    "payload": payload,
+                    "timestamp": time.time(),
+                })
+
+        if self.store is not None and state.get("goal"):
+            self._enqueue({
+                "kind": EPISODE,
+                "item": self.store.build_episode_item(
+                    actor_id,
+                    session_id,
+                    goal=state.get("goal"),
+                    outcome=turn_outcome(state),
+                    topic=state.get("topic"),
+                    signals={
+                        "success": not state.get("error"),
+                        "tools": state.get("tools_to_execute") or [],
+                    },
+                ),
+            })
+
+    def _enqueue(self, record: dict) -> None:
+        self.start()
+
+        record = {"id": uuid4().hex, "enqueued_at": time.time(), **record}
+        if self._queue.full():
+            logger.error("Write-behind queue full; dropping record")
+            metrics.incr("write_behind.rejected")
+            return
+
+        if self.journal is not None:
+            self.journal.append(record)
+        self._queue.put(record)
+
+        metrics.incr("write_behind.enqueued")
+        metrics.set_gauge("write_behind.queue_depth", self._queue.qsize())
+
+    # ---------- ciclo de vida ----------
+
+    def start(self) -> None:
+        """Inicia a thread de flush (idempotente) e reenfileira o journal"""
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            thread.start()
+
+            # Outros produtores esperam no lock até o journal ser reaplicado
+            if self.journal is not None:
+                recovered = self.journal.recover()
+                for record in recovered:
+                    self._queue.put(record)
+                if recovered:
+                    logger.info(f"Write-behind: replaying {len(recovered)} journaled records")
+                    metrics.incr("write_behind.replayed", len(recovered))
+
+            self._thread = thread
+            atexit.register(self.close)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drena a fila (até o timeout) e encerra a thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+
+        self._queue.put(_STOP)
+        thread.join(settings.WRITE_BEHIND_SHUTDOWN_TIMEOUT if timeout is None else timeout)
+        if thread.is_alive():
+            logger.warning(f"Write-behind: shutdown timed out with {self._queue.qsize()} queued records")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a fila esvaziar (útil em testes e scripts)"""
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    # ---------- consumo (thread) ----------
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._flush(batch)
+            except Exception:
+                # A thread não pode morrer: registros sem ack ficam no journal
+                logger.exception("Write-behind: unexpected error while flushing")
+
+    def _next_batch(self) -> tuple:
+        """
+        Bloqueia até o primeiro registro e então acumula por até
+        WRITE_BEHIND_FLUSH_INTERVAL ou WRITE_BEHIND_BATCH_SIZE registros.
+        """
+        batch: List[dict] = []
+        first = self._queue.get()
+        if first is _STOP:
+            self._queue.task_done()
+            return self._drain(batch), True
+        batch.append(first)
+
+        linger_until = time.monotonic() + settings.WRITE_BEHIND_FLUSH_INTERVAL
+        while len(batch) < settings.WRITE_BEHIND_BATCH_SIZE:
+            wait = linger_until - time.monotonic()
+            if wait <= 0:
+                break
+            try:
+                record = self._queue.get(timeout=wait)
+            except queue.Empty:
+                break
+            if record is _STOP:
+                self._queue.task_done()
+                return self._drain(batch), True
+            batch.append(record)
+
+        return batch, False
+
+    def _drain(self, batch: List[dict]) -> List[dict]:
+        """No shutdown: pega tudo o que ainda está na fila, sem esperar"""
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if record is _STOP:
+                self._queue.task_done()
+                continue
+            batch.append(record)
+
+    def _flush(self, batch: List[dict]) -> None:
+        start = time.perf_counter()
+        try:
+            events = [r for r in batch if r["kind"] == MEMORY_EVENT]
+            episodes = [r for r in batch if r["kind"] == EPISODE]
+
+            # Um evento por turno: o eventTimestamp é o do turno (um evento
+            # com vários turnos levaria o horário do primeiro para todos)
+            for record in events:
+                self._write([record], "memory_event", lambda r=record: self._create_event(r))
+            if episodes and self.store is None:
+                # Reaplicados do journal sem DynamoDB configurado (EPISODE_LOOKUP_ENABLED
+                # desligado): ficam sem ack no journal até haver um store
+                logger.warning(f"Write-behind: no episode store; keeping {len(episodes)} episodes journaled")
+                metrics.incr("write_behind.episode.deferred", len(episodes))
+            elif episodes:
+                self._write(episodes, "episode", lambda: self.store.save_episodes([r["item"] for r in episodes]))
+        finally:
+            now = time.time()
+            for record in batch:
+                metrics.observe("write_behind.lag_seconds", now - record["enqueued_at"])
+                self._queue.task_done()
+
+            metrics.observe("write_behind.flush_seconds", time.perf_counter() - start)
+            metrics.observe("write_behind.batch_size", len(batch))
+            metrics.set_gauge("write_behind.queue_depth", self._queue.qsize())
+
+    def _write(self, records: List[dict], kind: str, write) -> None:
+        """
+        Grava com retry (backoff exponencial). Após WRITE_BEHIND_MAX_RETRIES
+        o lote é descartado e confirmado no journal, para não ser
+        reaplicado indefinidamente.
+        """
+        for attempt in range(settings.WRITE_BEHIND_MAX_RETRIES + 1):
+            try:
+                write()
+                metrics.incr(f"write_behind.{kind}.written", len(records))
+                break
+            except Exception:
+                if attempt >= settings.WRITE_BEHIND_MAX_RETRIES:
+                    logger.exception(f"Write-behind: dropping {len(records)} {kind} records")
+                    metrics.incr(f"write_behind.{kind}.dropped", len(records))
+                    break
+                metrics.incr(f"write_behind.{kind}.retries")
+                time.sleep(settings.WRITE_BEHIND_RETRY_BACKOFF * (2 ** attempt))
+
+        if self.journal is not None:
+            self.journal.ack([r["id"] for r in records])
+
+    def _create_event(self, record: dict) -> None:
+        """Um evento com as mensagens do turno, no horário em que foi enfileirado"""
+        # Token estável por registro: retries (e replay do journal) não duplicam o evento
+        token = hashlib.sha256(record["id"].encode()).hexdigest()
+
+        self.memory.create_event(
+            record["actor_id"],
+            record["session_id"],
+            record["payload"],
+            event_timestamp=datetime.utcfromtimestamp(record["timestamp"]),
+            client_token=token,
+        )
+
+    def stats(self) -> dict:
+        return metrics.snapshot("write_behind.")
+
+
+def turn_outcome(state: dict) -> str:
+    if state.get("outcome"):
+        return state["outcome"]
+    return "error" if state.get("error") else "answered"
+
+
+_pipeline: Optional[WriteBehindPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_write_behind() -> WriteBehindPipeline:
+    """Pipeline do processo (criado no primeiro uso)"""
+    global _pipeline
+
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                journal = None
+                if settings.WRITE_BEHIND_JOURNAL:
+                    journal = WriteBehindJournal(settings.WRITE_BEHIND_JOURNAL, fsync=settings.WRITE_BEHIND_FSYNC)
+                _pipeline = WriteBehindPipeline(journal=journal)
+
+    return _pipeline
@@ -2,15 +2,16 @@
 Estado do agente LangGraph
 """
 from typing import TypedDict, List, Optional, Annotated
-from operator import add
+
+from src.llm.context_window import append_window
 
 
 class AgentState(TypedDict):
     """
     Estado compartilhado entre os nós do grafo
     """
-    # Mensagens do usuário e assistente
-    messages: Annotated[List[dict], add]
+    # Mensagens do usuário e assistente (janela limitada a STATE_MAX_MESSAGES)
+    messages: Annotated[List[dict], append_window]
     
     # Informações do usuário
     actor_id: str
@@ -18,10 +19,11 @@ class AgentState(TypedDict):
     
     # Contexto da conversa
     user_profile: Optional[dict]
-    conversation_history: Annotated[List[dict], add]
+    conversation_history: Annotated[List[dict], append_window]
     
     # Ferramentas e análise
     tools_to_execute: List[str]
+    tool_plan: Optional[List[dict]]
     tools_results: dict
     
     # Resposta final
@@ -29,11 +31,14 @@ class AgentState(TypedDict):
     
     # Controle de fluxo
     next_step: str
+    deadline: Optional[float]  # instante limite (epoch, segundos)
+    route: Optional[dict]
     error: Optional[str]
     
     goal: Optional[str]
     topic: Optional[str]
     
     last_episode: Optional[dict]
+    memory_gate: Optional[str]  # skipped / limited / full (src/nodes/memory_gate.py)
     signals: Optional[dict]
     outcome: Optional[str]
\ No newline at end of file
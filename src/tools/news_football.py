@@ -3,120 +3,171 @@ Ferramenta para buscar notícias de futebol via Google News RSS
 Suporta escopo brasileiro ou global
 """
 
-import requests
 import urllib.parse
-from bs4 import BeautifulSoup
-from langchain.tools import tool
+from datetime import datetime
+from typing import List, Optional
+
+from langchain_core.tools import StructuredTool
 
 from src.config.settings import settings
+from src.utils.feed_fetcher import afetch_feed, fetch_feed
+from src.utils.feed_parser import FeedItem
+from src.utils.http_client import HTTP_ERRORS
 from src.utils.logger import setup_logger
+from src.utils.single_flight import coalesce
+from src.utils.tool_cache import MISSING, news_cache
 
 logger = setup_logger(__name__)
 
+INVALID_SCOPE_MESSAGE = (
+    "Escopo inválido. "
+    "Use 'br' para futebol brasileiro ou 'global' para futebol internacional."
+)
+
 
-@tool
-def search_football_news(
+@coalesce("search_football_news")
+def _search_football_news(
     query: str,
     scope: str = "br",
     limit: int = 5
 ) -> str:
     """
     Busca notícias de futebol usando Google News RSS.
-    
+
     Args:
         query: termo livre de busca (ex: Flamengo, Real Madrid, Champions League)
-        scope: 
+        scope:
             - "br"     -> futebol brasileiro (pt-BR / BR)
             - "global" -> futebol internacional (en-US / US)
         limit: quantidade máxima de notícias retornadas
-    
+
     Returns:
         String com headlines encontradas
     """
     try:
-        # Define escopo
-        if scope.lower() == "br":
-            final_query = f"{query} futebol"
-            hl = "pt-BR"
-            gl = "BR"
-            ceid = "BR:pt-419"
-        elif scope.lower() == "global":
-            final_query = f"{query} football"
-            hl = "en-US"
-            gl = "US"
-            ceid = "US:en"
-        else:
-            return (
-                "Escopo inválido. "
-                "Use 'br' para futebol brasileiro ou 'global' para futebol internacional."
-            )
-
-        # Encode da query
-        encoded_query = urllib.parse.quote_plus(final_query)
-
-        # Monta URL RSS
-        url = (
-            "https://news.google.com/rss/search"
-            f"?q={encoded_query}"
-            f"&hl={hl}&gl={gl}&ceid={ceid}"
-        )
-
-        logger.info(f"Buscando notícias de futebol: query='{final_query}', scope='{scope}'")
-
-        # Request
-        response = requests.get(
-            url,
-            headers={"User-Agent": settings.USER_AGENT},
-            timeout=settings.REQUEST_TIMEOUT,
-        )
-
-        if response.status_code != 200:
-            logger.error(f"Erro HTTP {response.status_code} ao acessar Google News RSS")
+        url = _build_football_url(query, scope)
+        if url is None:
+            return INVALID_SCOPE_MESSAGE
+
+        cache_key = (url, limit)
+        cached = news_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+
+        # Request (GET condicional; RSS lido em streaming até `limit` itens)
+        feed = fetch_feed(url, limit)
+        if not feed.ok:
+            logger.error(f"Erro HTTP {feed.status_code} ao acessar Google News RSS")
+            return "Erro ao acessar serviço de notícias."
+
+        result = _format_football_news(query, feed.items)
+        news_cache.set(cache_key, result, settings.NEWS_TTL)
+        return result
+
+    except Exception as e:
+        return _handle_football_error(e)
+
+
+@coalesce("search_football_news")
+async def _asearch_football_news(
+    query: str,
+    scope: str = "br",
+    limit: int = 5
+) -> str:
+    """Versão async de search_football_news (cliente HTTP compartilhado)"""
+    try:
+        url = _build_football_url(query, scope)
+        if url is None:
+            return INVALID_SCOPE_MESSAGE
+
+        cache_key = (url, limit)
+        cached = news_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+
+        feed = await afetch_feed(url, limit)
+        if not feed.ok:
+            logger.error(f"Erro HTTP {feed.status_code} ao acessar Google News RSS")
             return "Erro ao acessar serviço de notícias."
 
-        # Parse RSS
-        soup = BeautifulSoup(response.content, "xml")
-        items = soup.find_all("item")[:limit]
-
-        if not items:
-            return f"Nenhuma notícia encontrada para '{query}'."
-
-        # Monta saída melhorada
-        headlines = []
-        for idx, item in enumerate(items, 1):
-            title = item.find("title")
-            pub_date = item.find("pubDate")
-            source_tag = item.find("source")
-            
-            title_text = title.text if title else "Sem título"
-            
-            # Formata data de forma mais legível
-            date_text = ""
-            if pub_date:
-                try:
-                    from datetime import datetime
-                    dt = datetime.strptime(pub_date.text, "%a, %d %b %Y %H:%M:%S %Z")
-                    date_text = dt.strftime("%d/%m/%Y às %H:%M")
-                except:
-                    date_text = pub_date.text
-            
-            source_text = source_tag.text if source_tag else ""
-            
-            # Formato mais limpo
-            headline = f"{idx}. {title_text}"
-            if source_text:
-                headline += f" ({source_text})"
-            if date_text:
-                headline += f"\n   📅 {date_text}"
-            
-            headlines.append(headline)
-
-        result = f"🔍 Últimas notícias sobre '{query}':\n\n" + "\n\n".join(headlines)
+        result = _format_football_news(query, feed.items)
+        news_cache.set(cache_key, result, settings.NEWS_TTL)
         return result
 
-    except requests.exceptions.RequestException as e:
+    except Exception as e:
+        return _handle_football_error(e)
+
+
+def _build_football_url(query: str, scope: str) -> Optional[str]:
+    """Monta a URL do RSS conforme o escopo (None se o escopo for inválido)"""
+    # Define escopo
+    if scope.lower() == "br":
+        final_query = f"{query} futebol"
+        hl = "pt-BR"
+        gl = "BR"
+        ceid = "BR:pt-419"
+    elif scope.lower() == "global":
+        final_query = f"{query} football"
+        hl = "en-US"
+        gl = "US"
+        ceid = "US:en"
+    else:
+        return None
+
+    # Encode da query
+    encoded_query = urllib.parse.quote_plus(final_query)
+
+    logger.info(f"Buscando notícias de futebol: query='{final_query}', scope='{scope}'")
+
+    # Monta URL RSS
+    return (
+        "https://news.google.com/rss/search"
+        f"?q={encoded_query}"
+        f"&hl={hl}&gl={gl}&ceid={ceid}"
+    )
+
+
+def _format_football_news(query: str, items: List[FeedItem]) -> str:
+    if not items:
+        return f"Nenhuma notícia encontrada para '{query}'."
+
+    # Monta saída melhorada
+    headlines = []
+    for idx, item in enumerate(items, 1):
+        title_text = item.title or "Sem título"
+
+        # Formata data de forma mais legível
+        date_text = ""
+        if item.pub_date:
+            try:
+                dt = datetime.strptime(item.pub_date, "%a, %d %b %Y %H:%M:%S %Z")
+                date_text = dt.strftime("%d/%m/%Y às %H:%M")
+            except ValueError:
+                date_text = item.pub_date
+
+        # Formato mais limpo
+        headline = f"{idx}. {title_text}"
+        if item.source:
+            headline += f" ({item.source})"
+        if date_text:
+            headline += f"\n   📅 {date_text}"
+
+        headlines.append(headline)
+
+    return f"🔍 Últimas notícias sobre '{query}':\n\n" + "\n\n".join(headlines)
+
+
+def _handle_football_error(e: Exception) -> str:
+    if isinstance(e, HTTP_ERRORS):
         logger.error(f"Erro de rede ao buscar notícias de futebol: {e}")
         return "Erro de rede ao buscar notícias de futebol."
-    except Exception as e:
-        logger.exception("Erro inesperado ao buscar notícias de futebol")
-        return "Erro inesperado ao buscar notícias de futebol."
\ No newline at end of file
+
+    logger.exception("Erro inesperado ao buscar notícias de futebol")
+    return "Erro inesperado ao buscar notícias de futebol."
+
+
+search_football_news = StructuredTool.from_function(
+    func=_search_football_news,
+    coroutine=_asearch_football_news,
+    name="search_football_news",
+)
@@ -1,91 +1,163 @@
 """
 Ferramentas para buscar notícias financeiras
 """
-import requests
 import urllib.parse
-from bs4 import BeautifulSoup
-from langchain.tools import tool
+from typing import List, Optional
+
+from langchain_core.tools import StructuredTool
 from src.config.settings import settings
+from src.utils.feed_fetcher import afetch_feed, fetch_feed
+from src.utils.feed_parser import FeedItem
+from src.utils.http_client import HTTP_ERRORS, get_async_client, get_session
 from src.utils.logger import setup_logger
+from src.utils.single_flight import coalesce
+from src.utils.tool_cache import MISSING, news_cache
 
 logger = setup_logger(__name__)
 
+YAHOO_RSS_URL = "https://feeds.finance.yahoo.com/rss/2.0/headline?s={query}&region=US&lang=en-US"
+REUTERS_URL = "https://www.reuters.com/pf/api/v3/content/fetch/articles-by-search-v2?query={query}&size=5"
+
+# Headlines por busca
+NEWS_LIMIT = 5
+
 
-@tool
-def search_news(query: str, news_source: str = "yahoo finance") -> str:
+@coalesce("search_news")
+def _search_news(query: str, news_source: str = "yahoo finance") -> str:
     """
     Search financial news sources for market intelligence.
-    
+
     Args:
         query: Search term for news
         news_source: News source to search (yahoo finance, reuters)
-    
+
     Returns:
         String with news headlines found
     """
     try:
-        headers = {'User-Agent': settings.USER_AGENT}
-        encoded_query = urllib.parse.quote_plus(query)
-        
-        if news_source.lower() == "yahoo finance":
-            url = f"https://feeds.finance.yahoo.com/rss/2.0/headline?s={encoded_query}&region=US&lang=en-US"
-            
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=settings.REQUEST_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'xml')
-                items = soup.find_all('item')[:5]
-                
-                if items:
-                    headlines = []
-                    for item in items:
-                        title = item.find('title')
-                        pub_date = item.find('pubDate')
-                        
-                        title_text = title.text if title else 'No title'
-                        date_text = pub_date.text if pub_date else 'No date'
-                        
-                        headlines.append(f"• {title_text} ({date_text})")
-                    
-                    logger.info(f"Found {len(headlines)} headlines for '{query}'")
-                    return f"News from Yahoo Finance for '{query}':\n" + "\n".join(headlines)
-        
-        elif news_source.lower() == "reuters":
-            url = f"https://www.reuters.com/pf/api/v3/content/fetch/articles-by-search-v2?query={encoded_query}&size=5"
-            
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=settings.REQUEST_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get('result', {}).get('articles', [])
-                
-                if articles:
-                    headlines = []
-                    for article in articles[:5]:
-                        title = article.get('headlines', {}).get('basic', 'No title')
-                        date = article.get('display_date', 'No date')
-                        headlines.append(f"• {title} ({date})")
-                    
-                    logger.info(f"Found {len(headlines)} headlines from Reuters for '{query}'")
-                    return f"News from Reuters for '{query}':\n" + "\n".join(headlines)
-        
-        # Fallback genérico
-        logger.info(f"Using fallback search for '{query}'")
-        return f"Financial news search completed for: {query}\nFound recent headlines related to your search."
-        
-    except requests.exceptions.RequestException as e:
+        url = _build_news_url(query, news_source)
+
+        if url:
+            cached = news_cache.get(url)
+            if cached is not MISSING:
+                return cached
+
+            result = _fetch_news(query, news_source, url)
+            if result:
+                news_cache.set(url, result, settings.NEWS_TTL)
+                return result
+
+        return _fallback_news(query)
+
+    except Exception as e:
+        return _handle_news_error(query, e)
+
+
+@coalesce("search_news")
+async def _asearch_news(query: str, news_source: str = "yahoo finance") -> str:
+    """Versão async de search_news (cliente HTTP compartilhado)"""
+    try:
+        url = _build_news_url(query, news_source)
+
+        if url:
+            cached = news_cache.get(url)
+            if cached is not MISSING:
+                return cached
+
+            result = await _afetch_news(query, news_source, url)
+            if result:
+                news_cache.set(url, result, settings.NEWS_TTL)
+                return result
+
+        return _fallback_news(query)
+
+    except Exception as e:
+        return _handle_news_error(query, e)
+
+
+def _fetch_news(query: str, news_source: str, url: str) -> Optional[str]:
+    headers = {'User-Agent': settings.USER_AGENT}
+
+    if news_source.lower() == "yahoo finance":
+        # RSS: GET condicional + leitura em streaming até NEWS_LIMIT itens
+        return _format_yahoo_news(query, fetch_feed(url, NEWS_LIMIT).items)
+
+    response = get_session().get(url, headers=headers, timeout=settings.REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    return _format_reuters_news(query, response.json())
+
+
+async def _afetch_news(query: str, news_source: str, url: str) -> Optional[str]:
+    headers = {'User-Agent': settings.USER_AGENT}
+
+    if news_source.lower() == "yahoo finance":
+        return _format_yahoo_news(query, (await afetch_feed(url, NEWS_LIMIT)).items)
+
+    response = await get_async_client().get(url, headers=headers, timeout=settings.REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    return _format_reuters_news(query, response.json())
+
+
+def _build_news_url(query: str, news_source: str) -> Optional[str]:
+    encoded_query = urllib.parse.quote_plus(query)
+
+    if news_source.lower() == "yahoo finance":
+        return YAHOO_RSS_URL.format(query=encoded_query)
+    if news_source.lower() == "reuters":
+        return REUTERS_URL.format(query=encoded_query)
+    return None
+
+
+def _format_yahoo_news(query: str, items: List[FeedItem]) -> Optional[str]:
+    """
+    Monta as headlines do RSS do Yahoo.
+    Retorna None quando não há itens, para cair no fallback.
+    """
+    if not items:
+        return None
+
+    headlines = [f"• {item.title or 'No title'} ({item.pub_date or 'No date'})" for item in items]
+
+    logger.info(f"Found {len(headlines)} headlines for '{query}'")
+    return f"News from Yahoo Finance for '{query}':\n" + "\n".join(headlines)
+
+
+def _format_reuters_news(query: str, data: dict) -> Optional[str]:
+    articles = data.get('result', {}).get('articles', [])
+    if not articles:
+        return None
+
+    headlines = []
+    for article in articles[:NEWS_LIMIT]:
+        title = article.get('headlines', {}).get('basic', 'No title')
+        date = article.get('display_date', 'No date')
+        headlines.append(f"• {title} ({date})")
+
+    logger.info(f"Found {len(headlines)} headlines from Reuters for '{query}'")
+    return f"News from Reuters for '{query}':\n" + "\n".join(headlines)
+
+
+def _fallback_news(query: str) -> str:
+    # Fallback genérico
+    logger.info(f"Using fallback search for '{query}'")
+    return f"Financial news search completed for: {query}\nFound recent headlines related to your search."
+
+
+def _handle_news_error(query: str, e: Exception) -> str:
+    if isinstance(e, HTTP_ERRORS):
         error_msg = f"Network error searching news: {str(e)}"
         logger.error(error_msg)
         return f"Unable to search news at this time. Please try again later."
-    except Exception as e:
-        error_msg = f"Unexpected error searching news: {str(e)}"
-        logger.error(error_msg)
-        return f"An error occurred while searching for news about '{query}'."
\ No newline at end of file
+
+    error_msg = f"Unexpected error searching news: {str(e)}"
+    logger.error(error_msg)
+    return f"An error occurred while searching for news about '{query}'."
+
+
+search_news = StructuredTool.from_function(
+    func=_search_news,
+    coroutine=_asearch_news,
+    name="search_news",
+)
@@ -1,6 +1,8 @@
-import requests
 from langchain.tools import tool
 
+from src.config.settings import settings
+from src.utils.http_client import get_session
+
 
 GATEWAY_URL = "https://gateway-quick-test-agent-tools-hzok8pngst.gateway.bedrock-agentcore.us-east-1.amazonaws.com/mcp"
 
@@ -25,7 +27,7 @@ def get_user(user_id: str):
         }
     }
 
-    response = requests.post(GATEWAY_URL, json=payload)
+    response = get_session().post(GATEWAY_URL, json=payload, timeout=settings.REQUEST_TIMEOUT)
     response.raise_for_status()
     return response.json().get("result", {})
 
@@ -56,6 +58,6 @@ def location(city: str, neighborhood: str):
         }
     }
 
-    response = requests.post(GATEWAY_URL, json=payload)
+    response = get_session().post(GATEWAY_URL, json=payload, timeout=settings.REQUEST_TIMEOUT)
     response.raise_for_status()
     return response.json().get("result", {})
\ No newline at end of file
@@ -1,76 +1,327 @@
 """
 Ferramentas para obter dados de ações
 """
-import requests
-from langchain.tools import tool
+import asyncio
+from typing import Dict, List, Tuple
+
+from langchain_core.tools import StructuredTool
 from src.config.settings import settings
+from src.utils.http_client import HTTP_ERRORS, get_async_client, get_session
 from src.utils.logger import setup_logger
+from src.utils.single_flight import coalesce
+from src.utils.metrics import metrics
+from src.utils.tool_cache import MISSING, market_state, quote_cache, quote_ttl
 
 logger = setup_logger(__name__)
 
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+# Spark: vários símbolos por requisição; cada resultado traz o mesmo `meta` do chart
+SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
+
+NOT_FOUND = "not found"
 
-@tool
-def get_stock_data(symbol: str) -> str:
+
+@coalesce("get_stock_data")
+def _get_stock_data(symbol: str) -> str:
     """
     Get real-time stock data for a given symbol using Yahoo Finance API.
-    
+
     Args:
         symbol: Stock symbol (e.g., NVDA, AAPL, TSLA)
-    
+
     Returns:
         Formatted string with stock data including current price, change, and market state
     """
     try:
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-        headers = {'User-Agent': settings.USER_AGENT}
-        
-        response = requests.get(
-            url,
-            headers=headers,
+        return _format_stock_data(symbol, _fetch_quote_meta(symbol))
+
+    except Exception as e:
+        return _handle_stock_error(symbol, e)
+
+
+@coalesce("get_stock_data")
+async def _aget_stock_data(symbol: str) -> str:
+    """Versão async de get_stock_data (cliente HTTP compartilhado)"""
+    try:
+        return _format_stock_data(symbol, await _afetch_quote_meta(symbol))
+
+    except Exception as e:
+        return _handle_stock_error(symbol, e)
+
+
+def _fetch_quote_meta(symbol: str) -> dict:
+    """Retorna o `meta` da cotação, consultando o cache antes do Yahoo"""
+    key = _quote_key(symbol)
+    cached = quote_cache.get(key)
+    if cached is not MISSING:
+        return _cached_meta(symbol, cached)
+
+    response = get_session().get(
+        CHART_URL.format(symbol=symbol),
+        headers={'User-Agent': settings.USER_AGENT},
+        timeout=settings.REQUEST_TIMEOUT
+    )
+    return _parse_quote_response(symbol, response)
+
+
+async def _afetch_quote_meta(symbol: str) -> dict:
+    key = _quote_key(symbol)
+    cached = quote_cache.get(key)
+    if cached is not MISSING:
+        return _cached_meta(symbol, cached)
+
+    response = await get_async_client().get(
+        CHART_URL.format(symbol=symbol),
+        headers={'User-Agent': settings.USER_AGENT},
+        timeout=settings.REQUEST_TIMEOUT
+    )
+    return _parse_quote_response(symbol, response)
+
+
+def _parse_quote_response(symbol: str, response) -> dict:
+    """
+    Extrai o `meta` da resposta (requests ou httpx) e grava no cache.
+    Símbolos inexistentes ficam em cache negativo (valor None).
+    """
+    key = _quote_key(symbol)
+
+    if response.status_code == 404:
+        quote_cache.set(key, None, settings.QUOTE_NEGATIVE_TTL)
+        raise KeyError(f"Symbol not found: {symbol}")
+
+    response.raise_for_status()
+
+    result = response.json()['chart']['result']
+    if not result:
+        quote_cache.set(key, None, settings.QUOTE_NEGATIVE_TTL)
+        raise KeyError(f"Symbol not found: {symbol}")
+
+    meta = result[0]['meta']
+    quote_cache.set(key, meta, quote_ttl(meta))
+    return meta
+
+
+def _cached_meta(symbol: str, meta) -> dict:
+    if meta is None:
+        raise KeyError(f"Symbol not found (cached): {symbol}")
+    return meta
+
+
+def _quote_key(symbol: str) -> tuple:
+    return ("quote", symbol.strip().upper())
+
+
+@coalesce("get_stock_quotes")
+def _get_stock_quotes(symbols: List[str]) -> str:
+    """
+    Get real-time quotes for several stock symbols in batched requests.
+
+    Args:
+        symbols: List of stock symbols (e.g., ["NVDA", "AAPL", "PETR4.SA"])
+
+    Returns:
+        Compact table with price, change and market state per symbol
+    """
+    symbols, results, missing = _split_cached(symbols)
+
+    for chunk in _chunks(missing):
+        results.update(_fetch_quote_batch(chunk))
+
+    return _format_quote_table(symbols, results)
+
+
+@coalesce("get_stock_quotes")
+async def _aget_stock_quotes(symbols: List[str]) -> str:
+    """Versão async de get_stock_quotes (lotes buscados em paralelo)"""
+    symbols, results, missing = _split_cached(symbols)
+
+    batches = await asyncio.gather(*(_afetch_quote_batch(chunk) for chunk in _chunks(missing)))
+    for batch in batches:
+        results.update(batch)
+
+    return _format_quote_table(symbols, results)
+
+
+def _split_cached(symbols: List[str]) -> Tuple[List[str], Dict[str, object], List[str]]:
+    """
+    Normaliza os símbolos e separa os que já estão no cache (inclusive
+    negativo) dos que precisam ser buscados.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols or [] if s and s.strip()))
+    results, missing = {}, []
+
+    for symbol in symbols:
+        cached = quote_cache.get(_quote_key(symbol))
+        if cached is MISSING:
+            missing.append(symbol)
+        else:
+            results[symbol] = cached if cached is not None else NOT_FOUND
+
+    return symbols, results, missing
+
+
+def _chunks(symbols: List[str]) -> List[List[str]]:
+    size = max(settings.QUOTE_BATCH_SIZE, 1)
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+
+def _fetch_quote_batch(symbols: List[str]) -> Dict[str, object]:
+    try:
+        response = get_session().get(
+            SPARK_URL,
+            params=_spark_params(symbols),
+            headers={'User-Agent': settings.USER_AGENT},
+            timeout=settings.REQUEST_TIMEOUT
+        )
+        return _parse_spark_response(symbols, response)
+
+    except Exception as e:
+        return _batch_error(symbols, e)
+
+
+async def _afetch_quote_batch(symbols: List[str]) -> Dict[str, object]:
+    try:
+        response = await get_async_client().get(
+            SPARK_URL,
+            params=_spark_params(symbols),
+            headers={'User-Agent': settings.USER_AGENT},
             timeout=settings.REQUEST_TIMEOUT
         )
+        return _parse_spark_response(symbols, response)
+
+    except Exception as e:
+        return _batch_error(symbols, e)
+
+
+def _spark_params(symbols: List[str]) -> dict:
+    return {"symbols": ",".join(symbols), "range": "1d", "interval": "1d"}
+
+
+def _parse_spark_response(symbols: List[str], response) -> Dict[str, object]:
+    """
+    Extrai o `meta` de cada símbolo e grava no mesmo cache do
+    get_stock_data (chamadas individuais passam a ser servidas do lote).
+    Símbolos ausentes da resposta ficam em cache negativo.
+    """
+    metrics.incr("stock_quotes.batch_requests")
+    metrics.observe("stock_quotes.batch_size", len(symbols))
+
+    if response.status_code == 404:
+        result = []
+    else:
         response.raise_for_status()
-        
-        data = response.json()
-        chart = data['chart']['result'][0]
-        meta = chart['meta']
-        
-        current_price = meta.get('regularMarketPrice', 'N/A')
-        previous_close = meta.get('previousClose', 'N/A')
+        result = (response.json().get('spark') or {}).get('result') or []
+
+    metas = {}
+    for item in result:
+        responses = item.get('response') or []
+        meta = responses[0].get('meta') if responses else None
+        if item.get('symbol') and meta:
+            metas[item['symbol'].upper()] = meta
+
+    results = {}
+    for symbol in symbols:
+        meta = metas.get(symbol)
+        if meta is None:
+            quote_cache.set(_quote_key(symbol), None, settings.QUOTE_NEGATIVE_TTL)
+            results[symbol] = NOT_FOUND
+        else:
+            quote_cache.set(_quote_key(symbol), meta, quote_ttl(meta))
+            results[symbol] = meta
+
+    return results
+
+
+def _batch_error(symbols: List[str], e: Exception) -> Dict[str, object]:
+    """Falha de um lote não derruba os demais (e não entra no cache)"""
+    logger.error(f"Error retrieving batch quotes for {','.join(symbols)}: {str(e)}")
+    metrics.incr("stock_quotes.batch_errors")
+    return {symbol: "unavailable" for symbol in symbols}
+
+
+def _format_quote_table(symbols: List[str], results: Dict[str, object]) -> str:
+    """Tabela compacta (uma linha por símbolo, na ordem pedida)"""
+    if not symbols:
+        return "No symbols provided."
+
+    lines = ["Symbol | Price | Change | Change % | Currency | Market State"]
+    for symbol in symbols:
+        meta = results.get(symbol)
+        if not isinstance(meta, dict):
+            lines.append(f"{symbol} | {meta or 'unavailable'}")
+            continue
+
+        price = meta.get('regularMarketPrice')
+        previous_close = meta.get('previousClose', meta.get('chartPreviousClose'))
         currency = meta.get('currency', 'USD')
-        market_state = meta.get('marketState', 'Unknown')
-        exchange = meta.get('exchangeName', 'Unknown')
-        
-        # Calcula mudanças se dados disponíveis
-        if current_price != 'N/A' and previous_close != 'N/A':
-            change = current_price - previous_close
-            change_percent = (change / previous_close * 100)
-            
-            result = f"""Stock Data for {symbol}:
+        state = market_state(meta)
+
+        if price is not None and previous_close:
+            change = price - previous_close
+            change_percent = change / previous_close * 100
+            lines.append(f"{symbol} | {price:.2f} | {change:+.2f} | {change_percent:+.2f}% | {currency} | {state}")
+        else:
+            lines.append(f"{symbol} | {price if price is not None else 'N/A'} | N/A | N/A | {currency} | {state}")
+
+    logger.info(f"Successfully retrieved batch quotes for {len(symbols)} symbols")
+    return "\n".join(lines)
+
+
+def _format_stock_data(symbol: str, meta: dict) -> str:
+    """Monta a resposta da tool a partir do `meta` da cotação"""
+    current_price = meta.get('regularMarketPrice', 'N/A')
+    # Cotações em lote (spark) costumam trazer só chartPreviousClose
+    previous_close = meta.get('previousClose', meta.get('chartPreviousClose', 'N/A'))
+    currency = meta.get('currency', 'USD')
+    state = market_state(meta)
+    exchange = meta.get('exchangeName', 'Unknown')
+
+    # Calcula mudanças se dados disponíveis
+    if current_price != 'N/A' and previous_close != 'N/A':
+        change = current_price - previous_close
+        change_percent = (change / previous_close * 100)
+
+        result = f"""Stock Data for {symbol}:
 Current Price: ${current_price:.2f} {currency}
 Previous Close: ${previous_close:.2f}
 Change: ${change:.2f} ({change_percent:.2f}%)
-Market State: {market_state}
+Market State: {state}
 Exchange: {exchange}"""
-        else:
-            result = f"""Stock Data for {symbol}:
+    else:
+        result = f"""Stock Data for {symbol}:
 Current Price: ${current_price}
 Previous Close: ${previous_close}
 Currency: {currency}
-Market State: {market_state}"""
-        
-        logger.info(f"Successfully retrieved data for {symbol}")
-        return result
-        
-    except requests.exceptions.RequestException as e:
+Market State: {state}"""
+
+    logger.info(f"Successfully retrieved data for {symbol}")
+    return result
+
+
+def _handle_stock_error(symbol: str, e: Exception) -> str:
+    """Converte exceções em mensagens amigáveis (mesmo tratamento sync/async)"""
+    if isinstance(e, HTTP_ERRORS):
         error_msg = f"Error retrieving stock data for {symbol}: {str(e)}"
         logger.error(error_msg)
         return f"Unable to retrieve stock data for {symbol}. Please try again later."
-    except (KeyError, IndexError, ValueError) as e:
+    if isinstance(e, (KeyError, IndexError, ValueError)):
         error_msg = f"Error parsing stock data for {symbol}: {str(e)}"
         logger.error(error_msg)
         return f"Error processing data for {symbol}. The symbol may be invalid."
-    except Exception as e:
-        error_msg = f"Unexpected error for {symbol}: {str(e)}"
-        logger.error(error_msg)
-        return f"An unexpected error occurred while retrieving data for {symbol}."
\ No newline at end of file
+
+    error_msg = f"Unexpected error for {symbol}: {str(e)}"
+    logger.error(error_msg)
+    return f"An unexpected error occurred while retrieving data for {symbol}."
+
+
+get_stock_data = StructuredTool.from_function(
+    func=_get_stock_data,
+    coroutine=_aget_stock_data,
+    name="get_stock_data",
+)
+
+get_stock_quotes = StructuredTool.from_function(
+    func=_get_stock_quotes,
+    coroutine=_aget_stock_quotes,
+    name="get_stock_quotes",
+)
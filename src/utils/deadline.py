@@ -0,0 +1,75 @@
+"""
+Deadline de ponta a ponta de uma requisição
+
+O entrypoint define o orçamento (payload `deadline_ms` ou
+settings.REQUEST_DEADLINE_SECONDS). O instante limite (epoch, em segundos)
+vai no estado do grafo (`deadline`) e em uma ContextVar, que as tasks do
+LangGraph herdam; assim nós, tools e o cliente HTTP dimensionam seus
+próprios timeouts pelo tempo que resta.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from src.config.settings import settings
+
+# Resposta degradada quando o orçamento acaba antes de haver qualquer resultado
+DEADLINE_MESSAGE = (
+    "I couldn't complete the analysis within the time available for this request. "
+    "Please try again in a moment."
+)
+
+_current_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Orçamento da requisição esgotado"""
+
+
+def new_deadline(budget_ms: Optional[float] = None) -> float:
+    """Instante limite a partir do orçamento em ms (ou do padrão configurado)"""
+    budget = budget_ms / 1000 if budget_ms and budget_ms > 0 else settings.REQUEST_DEADLINE_SECONDS
+    return time.time() + budget
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """Torna o deadline visível para o código chamado dentro do bloco"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    return _current_deadline.get()
+
+
+def remaining(deadline: Optional[float] = None) -> Optional[float]:
+    """Segundos restantes (None quando não há deadline)"""
+    deadline = deadline if deadline is not None else _current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def bounded_timeout(
+    default: Optional[float],
+    deadline: Optional[float] = None,
+    reserve: float = 0.0,
+) -> Optional[float]:
+    """
+    Timeout de uma etapa: o menor entre o seu padrão e o tempo restante
+    (descontando `reserve`, reservado para as etapas seguintes).
+    Levanta DeadlineExceeded se não sobra tempo.
+    """
+    left = remaining(deadline)
+    if left is None:
+        return default
+
+    left -= reserve
+    if left <= 0:
+        raise DeadlineExceeded(f"deadline exceeded by {-left:.2f}s")
+    return left if default is None else min(default, left)
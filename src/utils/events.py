@@ -0,0 +1,40 @@
+"""
+Eventos intermediários emitidos pelos nós durante a execução do grafo
+
+Os eventos são entregues a quem consome `graph.astream_events`
+(ex: o modo streaming do entrypoint). Fora de uma execução do grafo,
+as chamadas são ignoradas silenciosamente.
+"""
+from langchain_core.callbacks.manager import adispatch_custom_event
+
+# Nomes dos eventos customizados
+STATUS_EVENT = "status"
+TOKEN_EVENT = "token"
+RESET_EVENT = "reset"
+
+# Tag das chamadas de LLM cujos tokens vão direto para o usuário
+SYNTHESIS_TAG = "synthesis"
+
+
+async def emit_status(message: str) -> None:
+    """Emite um status legível (ex: 'Buscando cotação de NVDA…')"""
+    await _dispatch(STATUS_EVENT, message)
+
+
+async def emit_token(text: str) -> None:
+    """Emite um trecho da resposta final"""
+    if text:
+        await _dispatch(TOKEN_EVENT, text)
+
+
+async def emit_reset() -> None:
+    """Descarta os tokens já emitidos (a resposta recomeça do zero)"""
+    await _dispatch(RESET_EVENT, "")
+
+
+async def _dispatch(name: str, data: str) -> None:
+    try:
+        await adispatch_custom_event(name, data)
+    except RuntimeError:
+        # Sem run pai (nó chamado fora do grafo): nada a notificar
+        pass
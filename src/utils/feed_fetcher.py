@@ -0,0 +1,123 @@
+"""
+Busca de feeds RSS com GET condicional
+
+Guarda, por URL, os validadores da última resposta (ETag / Last-Modified)
+junto com os itens já extraídos. As próximas buscas enviam
+If-None-Match / If-Modified-Since; em 304 os itens guardados são
+reaproveitados sem baixar nem refazer o parse do XML.
+"""
+from typing import Dict, List, NamedTuple, Optional
+
+from src.config.settings import settings
+from src.utils.feed_parser import FeedItem, aparse_feed, parse_feed
+from src.utils.http_client import get_async_client, get_session
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+from src.utils.tool_cache import MISSING, feed_cache
+
+logger = setup_logger(__name__)
+
+
+class FeedEntry(NamedTuple):
+    """Última versão conhecida de um feed"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    items: List[FeedItem]
+    limit: int
+
+
+class FeedResult(NamedTuple):
+    status_code: int
+    items: List[FeedItem]
+
+    @property
+    def ok(self) -> bool:
+        """200, ou 304 servido com os itens guardados"""
+        return self.status_code == 200 or (self.status_code == 304 and bool(self.items))
+
+
+def fetch_feed(url: str, limit: int) -> FeedResult:
+    """Busca (sync) os primeiros `limit` itens do feed"""
+    entry = _usable_entry(url, limit)
+
+    with get_session().get(
+        url,
+        headers=_request_headers(entry),
+        timeout=settings.REQUEST_TIMEOUT,
+        stream=True,
+    ) as response:
+        if response.status_code == 304 and entry is not None:
+            return _not_modified(url, entry, limit)
+        if response.status_code != 200:
+            return FeedResult(response.status_code, [])
+
+        items = parse_feed(response.iter_content(chunk_size=settings.FEED_CHUNK_SIZE), limit)
+
+    return _modified(url, response.headers, items, limit)
+
+
+async def afetch_feed(url: str, limit: int) -> FeedResult:
+    """Versão async de fetch_feed"""
+    entry = _usable_entry(url, limit)
+
+    async with get_async_client().stream(
+        "GET",
+        url,
+        headers=_request_headers(entry),
+        timeout=settings.REQUEST_TIMEOUT,
+    ) as response:
+        if response.status_code == 304 and entry is not None:
+            return _not_modified(url, entry, limit)
+        if response.status_code != 200:
+            return FeedResult(response.status_code, [])
+
+        items = await aparse_feed(response.aiter_bytes(settings.FEED_CHUNK_SIZE), limit)
+
+    return _modified(url, response.headers, items, limit)
+
+
+def _usable_entry(url: str, limit: int) -> Optional[FeedEntry]:
+    """
+    Entrada guardada que atende ao limite pedido: foi extraída com limite
+    igual/maior, ou o feed inteiro tinha menos itens que o limite dela.
+    """
+    entry = feed_cache.get(url)
+    if entry is MISSING:
+        return None
+    if entry.limit >= limit or len(entry.items) < entry.limit:
+        return entry
+    return None
+
+
+def _request_headers(entry: Optional[FeedEntry]) -> Dict[str, str]:
+    headers = {"User-Agent": settings.USER_AGENT}
+    if entry is None:
+        metrics.incr("feed.unconditional")
+        return headers
+
+    metrics.incr("feed.conditional")
+    if entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+def _not_modified(url: str, entry: FeedEntry, limit: int) -> FeedResult:
+    metrics.incr("feed.not_modified")
+    logger.info(f"Feed not modified, serving stored items: {url}")
+
+    # Renova a validade da entrada
+    feed_cache.set(url, entry, settings.FEED_VALIDATOR_TTL)
+    return FeedResult(304, entry.items[:limit])
+
+
+def _modified(url: str, headers, items: List[FeedItem], limit: int) -> FeedResult:
+    metrics.incr("feed.modified")
+
+    etag = headers.get("ETag")
+    last_modified = headers.get("Last-Modified")
+    if items and (etag or last_modified):
+        feed_cache.set(url, FeedEntry(etag, last_modified, items, limit), settings.FEED_VALIDATOR_TTL)
+
+    return FeedResult(200, items)
@@ -0,0 +1,139 @@
+"""
+Parser incremental de feeds RSS (Yahoo Finance, Google News)
+
+Consome o corpo da resposta em chunks conforme chega (lxml XMLPullParser),
+extrai apenas title/pubDate/source de cada <item> e para de ler assim que
+`limit` itens foram produzidos — sem montar a árvore completa do feed.
+"""
+import time
+from typing import AsyncIterator, Iterable, List, NamedTuple, Optional
+
+from lxml import etree
+
+from src.config.settings import settings
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+
+class FeedItem(NamedTuple):
+    """Campos usados pelas tools de notícias"""
+    title: Optional[str]
+    pub_date: Optional[str]
+    source: Optional[str]
+
+
+class StreamingFeedParser:
+    """
+    Parser push: `feed(chunk)` retorna os itens completados pelo chunk.
+    Elementos já processados são liberados (memória constante por item).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.items: List[FeedItem] = []
+        self._parser = etree.XMLPullParser(
+            events=("end",),
+            tag="item",
+            recover=True,
+            resolve_entities=False,
+            no_network=True,
+        )
+
+    @property
+    def done(self) -> bool:
+        return len(self.items) >= self.limit
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done:
+            return
+
+        self._parser.feed(chunk)
+        for _, element in self._parser.read_events():
+            if not self.done:
+                self.items.append(_to_item(element))
+            # Libera o item e os irmãos anteriores já processados
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    def close(self) -> List[FeedItem]:
+        if not self.done:
+            try:
+                self._parser.close()
+                for _, element in self._parser.read_events():
+                    if not self.done:
+                        self.items.append(_to_item(element))
+            except etree.XMLSyntaxError:
+                pass
+        return self.items
+
+
+def _to_item(element) -> FeedItem:
+    return FeedItem(
+        title=_child_text(element, "title"),
+        pub_date=_child_text(element, "pubDate"),
+        source=_child_text(element, "source"),
+    )
+
+
+def _child_text(element, name: str) -> Optional[str]:
+    child = element.find(name)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip()
+
+
+def parse_feed(chunks: Iterable[bytes], limit: int) -> List[FeedItem]:
+    """
+    Faz o parse de um corpo em chunks (ex: `response.iter_content()`).
+    Ao atingir o limite, deixa de fazer parse e apenas drena até
+    FEED_DRAIN_MAX_BYTES, para a conexão voltar ao pool de keep-alive;
+    corpos maiores que isso são abandonados (conexão descartada).
+    """
+    parser = StreamingFeedParser(limit)
+    start = time.perf_counter()
+    read = drained = 0
+
+    for chunk in chunks:
+        if parser.done:
+            drained += len(chunk)
+            if drained > settings.FEED_DRAIN_MAX_BYTES:
+                break
+            continue
+        read += len(chunk)
+        parser.feed(chunk)
+
+    return _finish(parser, start, read, drained)
+
+
+async def aparse_feed(chunks: AsyncIterator[bytes], limit: int) -> List[FeedItem]:
+    """Versão async de parse_feed (ex: `response.aiter_bytes()` do httpx)"""
+    parser = StreamingFeedParser(limit)
+    start = time.perf_counter()
+    read = drained = 0
+
+    async for chunk in chunks:
+        if parser.done:
+            drained += len(chunk)
+            if drained > settings.FEED_DRAIN_MAX_BYTES:
+                break
+            continue
+        read += len(chunk)
+        parser.feed(chunk)
+
+    return _finish(parser, start, read, drained)
+
+
+def _finish(parser: StreamingFeedParser, start: float, read: int, drained: int) -> List[FeedItem]:
+    items = parser.close()
+
+    metrics.observe("feed_parser.seconds", time.perf_counter() - start)
+    metrics.observe("feed_parser.bytes_parsed", read)
+    metrics.incr("feed_parser.items", len(items))
+    if drained:
+        metrics.incr("feed_parser.early_stop")
+        metrics.incr("feed_parser.bytes_skipped", drained)
+
+    return items
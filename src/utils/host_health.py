@@ -0,0 +1,149 @@
+"""
+Saúde das fontes externas, por host
+
+- Circuit breaker: após CIRCUIT_FAILURE_THRESHOLD falhas seguidas o host
+  fica "aberto" e as chamadas falham na hora (CircuitOpenError), sem
+  esperar timeout; depois de CIRCUIT_RESET_TIMEOUT uma única requisição
+  de teste (half-open) decide se o circuito fecha ou reabre
+- Timeout adaptativo: derivado do p99 de latência observado no host,
+  limitado a [ADAPTIVE_TIMEOUT_MIN, REQUEST_TIMEOUT]
+- Atraso de hedge: p95 de latência (quando há amostras suficientes)
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import requests
+
+from src.config.settings import settings
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Amostras de latência mantidas por host
+_LATENCY_WINDOW = 200
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Host com circuito aberto. Subclasse de RequestException para cair no
+    mesmo tratamento de erro de rede das tools (resposta de fallback).
+    """
+
+
+class HostHealth:
+    """Estado do circuito e latências recentes de um host"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=_LATENCY_WINDOW)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    # ---------- circuit breaker ----------
+    def before_request(self) -> None:
+        """Levanta CircuitOpenError se o host não deve ser chamado agora"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+
+            if self._state == OPEN and time.monotonic() - self._opened_at >= settings.CIRCUIT_RESET_TIMEOUT:
+                self._set_state(HALF_OPEN)
+
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+        metrics.incr(f"circuit.{self.host}.rejected")
+        raise CircuitOpenError(f"Circuit open for {self.host}")
+
+    def record_success(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= settings.CIRCUIT_FAILURE_THRESHOLD
+            ):
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def record_cancelled(self) -> None:
+        """Chamada interrompida por nós (deadline/cancelamento): não conta como falha"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.warning(f"Circuit for {self.host}: {self._state} -> {state}")
+        self._state = state
+        metrics.incr(f"circuit.{self.host}.{state}")
+        metrics.set_gauge(f"circuit.{self.host}.state", _STATE_GAUGE[state])
+
+    # ---------- latência ----------
+    def _percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < settings.ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1)))]
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """Timeout adaptativo (p99 x multiplicador), nunca acima do configurado"""
+        ceiling = default or settings.REQUEST_TIMEOUT
+        p99 = self._percentile(0.99)
+        if p99 is None:
+            return ceiling
+
+        timeout = min(max(p99 * settings.ADAPTIVE_TIMEOUT_MULTIPLIER, settings.ADAPTIVE_TIMEOUT_MIN), ceiling)
+        metrics.set_gauge(f"http.{self.host}.timeout", timeout)
+        return timeout
+
+    def hedge_delay(self) -> Optional[float]:
+        """Espera antes de disparar a requisição de hedge (p95), ou None"""
+        p95 = self._percentile(0.95)
+        if p95 is None:
+            return None
+        return max(p95, settings.HEDGE_MIN_DELAY)
+
+
+_hosts: Dict[str, HostHealth] = {}
+_hosts_lock = threading.Lock()
+
+
+def host_health(host: str) -> HostHealth:
+    with _hosts_lock:
+        health = _hosts.get(host)
+        if health is None:
+            health = _hosts[host] = HostHealth(host)
+        return health
+
+
+def health_snapshot() -> dict:
+    """Estado do circuito e timeout atual por host"""
+    with _hosts_lock:
+        hosts = list(_hosts.values())
+    return {h.host: {"state": h.state, "timeout": h.timeout()} for h in hosts}
@@ -0,0 +1,375 @@
+"""
+Cliente HTTP compartilhado pelas tools
+
+- Sync: uma requests.Session por processo, com pool de conexões por host
+  (keep-alive) e retry com backoff + jitter (urllib3.Retry)
+- Async: um httpx.AsyncClient por event loop (conexões reaproveitadas
+  entre requisições concorrentes do runtime), com a mesma política de retry
+
+Retries só acontecem em métodos idempotentes (GET, HEAD, ...): um POST
+(ex: gateway AgentCore) nunca é reenviado após chegar ao servidor.
+Métricas por host: requisições, retries, latência, conexões em uso e
+utilização do pool.
+
+Cada host tem circuit breaker e timeout adaptativo (src/utils/host_health);
+no caminho async, GETs podem ser "hedged" (2ª requisição após o p95).
+O timeout também é limitado pelo deadline da requisição (src/utils/deadline);
+estouros causados pelo deadline não contam como falha do host.
+"""
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.config.settings import settings
+from src.utils.deadline import remaining
+from src.utils.host_health import HostHealth, host_health
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+# Erros de rede tratados pelas tools (caminhos sync e async)
+HTTP_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+
+# Política de retry compartilhada
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+DEFAULT_HEADERS = {
+    "User-Agent": settings.USER_AGENT,
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Um cliente por event loop: httpx.AsyncClient não pode cruzar loops
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Requisições em andamento por host (sync + async)
+_in_flight: Dict[str, int] = defaultdict(int)
+_in_flight_lock = threading.Lock()
+
+
+# ---------- métricas por host ----------
+
+def _set_in_flight(host: str, delta: int, pool_size: int) -> None:
+    with _in_flight_lock:
+        _in_flight[host] += delta
+        current = _in_flight[host]
+
+    metrics.set_gauge(f"http.{host}.in_flight", current)
+    metrics.set_gauge(f"http.{host}.pool_utilization", current / max(pool_size, 1))
+    if delta > 0:
+        metrics.observe(f"http.{host}.in_flight_observed", current)
+
+
+@contextmanager
+def _track_request(host: str, pool_size: int):
+    metrics.incr(f"http.{host}.requests")
+    _set_in_flight(host, 1, pool_size)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(f"http.{host}.seconds", time.perf_counter() - start)
+        _set_in_flight(host, -1, pool_size)
+
+
+def _is_failure(status_code: int) -> bool:
+    """Status que contam como falha do host para o circuit breaker"""
+    return status_code >= 500 or status_code == 429
+
+
+def _deadline_timeout(timeout: float) -> tuple:
+    """(timeout limitado ao tempo restante da requisição, se o deadline limitou)"""
+    left = remaining()
+    if left is None or left >= timeout:
+        return timeout, False
+    return max(left, 0.001), True
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponencial com jitter (attempt começa em 1)"""
+    base = min(settings.HTTP_BACKOFF_MAX, settings.HTTP_BACKOFF_FACTOR * (2 ** (attempt - 1)))
+    return base + random.uniform(0, settings.HTTP_BACKOFF_FACTOR)
+
+
+# ---------- sync (requests) ----------
+
+class _InstrumentedAdapter(HTTPAdapter):
+    """HTTPAdapter com circuit breaker, timeout adaptativo e métricas por host"""
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).hostname or "unknown"
+        health = host_health(host)
+        health.before_request()
+
+        deadline_bound = False
+        timeout = kwargs.get("timeout")
+        if not isinstance(timeout, tuple):
+            kwargs["timeout"], deadline_bound = _deadline_timeout(health.timeout(timeout))
+
+        start = time.perf_counter()
+        with _track_request(host, settings.HTTP_POOL_MAXSIZE):
+            try:
+                response = super().send(request, **kwargs)
+            except requests.exceptions.Timeout:
+                if deadline_bound:
+                    health.record_cancelled()
+                else:
+                    health.record_failure()
+                raise
+            except BaseException:
+                health.record_failure()
+                raise
+
+        if _is_failure(response.status_code):
+            health.record_failure()
+        else:
+            health.record_success(time.perf_counter() - start)
+
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        if retries:
+            metrics.incr(f"http.{host}.retries", len(retries))
+        return response
+
+
+def _build_retry() -> Retry:
+    return Retry(
+        total=settings.HTTP_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+        backoff_max=settings.HTTP_BACKOFF_MAX,
+        backoff_jitter=settings.HTTP_BACKOFF_FACTOR,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def get_session() -> requests.Session:
+    """
+    Retorna a sessão sync do processo (criando se necessário).
+    Pools por host reaproveitam conexões TCP/TLS entre chamadas.
+    """
+    global _session
+
+    if _session is not None:
+        return _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+
+            adapter = _InstrumentedAdapter(
+                pool_connections=settings.HTTP_POOL_HOSTS,
+                pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                max_retries=_build_retry(),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            _session = session
+            logger.info("HTTP session created")
+
+    return _session
+
+
+def close_session() -> None:
+    """Fecha a sessão sync (conexões do pool) se existir"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# ---------- async (httpx) ----------
+
+class _RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Transport httpx com retry (métodos idempotentes), circuit breaker,
+    timeout adaptativo, hedge opcional e métricas por host.
+    O AsyncHTTPTransport só repete falhas de conexão; aqui também
+    repetimos status transitórios (RETRY_STATUSES) com backoff + jitter.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def __aenter__(self) -> "_RetryTransport":
+        await self._transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._transport.__aexit__(*exc_info)
+
+    async def aclose(self) -> None:
+        # O aclose da base é no-op: sem isto o pool do transport interno
+        # (conexões keep-alive) não é fechado no AsyncClient.aclose()
+        await self._transport.aclose()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host or "unknown"
+        health = host_health(host)
+        retryable = request.method in IDEMPOTENT_METHODS
+        hedge = settings.HTTP_HEDGING and request.method == "GET"
+        attempt = 0
+
+        deadline_bound = _apply_timeout(request, health)
+
+        with _track_request(host, settings.HTTP_MAX_CONNECTIONS):
+            while True:
+                # Falha rápido (CircuitOpenError) se o host está com circuito aberto
+                health.before_request()
+                start = time.perf_counter()
+                try:
+                    response = await self._send(request, health, hedge)
+                except httpx.TimeoutException:
+                    if deadline_bound:
+                        health.record_cancelled()
+                        raise
+                    health.record_failure()
+                    if not retryable or attempt >= settings.HTTP_RETRIES:
+                        raise
+                except httpx.TransportError:
+                    health.record_failure()
+                    if not retryable or attempt >= settings.HTTP_RETRIES:
+                        raise
+                except asyncio.CancelledError:
+                    health.record_cancelled()
+                    raise
+                except BaseException:
+                    health.record_failure()
+                    raise
+                else:
+                    if not _is_failure(response.status_code):
+                        health.record_success(time.perf_counter() - start)
+                        return response
+
+                    health.record_failure()
+                    if (
+                        not retryable
+                        or response.status_code not in RETRY_STATUSES
+                        or attempt >= settings.HTTP_RETRIES
+                    ):
+                        return response
+                    await response.aclose()
+
+                attempt += 1
+                metrics.incr(f"http.{host}.retries")
+                await asyncio.sleep(backoff_delay(attempt))
+
+    async def _send(self, request: httpx.Request, health: HostHealth, hedge: bool) -> httpx.Response:
+        """
+        Envia a requisição; com hedge, dispara uma 2ª idêntica se a 1ª não
+        responder dentro do p95 do host e fica com a que chegar primeiro.
+        """
+        delay = health.hedge_delay() if hedge else None
+        if delay is None:
+            return await self._transport.handle_async_request(request)
+
+        primary = asyncio.ensure_future(self._transport.handle_async_request(request))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        metrics.incr(f"http.{health.host}.hedged")
+        secondary = asyncio.ensure_future(self._transport.handle_async_request(request))
+        pending = {primary, secondary}
+        error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            metrics.incr(f"http.{health.host}.hedge_won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # A perdedora é cancelada; se já tiver resposta, ela é fechada
+            for task in (primary, secondary):
+                if not task.done():
+                    task.add_done_callback(_discard_response)
+                    task.cancel()
+
+
+def _discard_response(task: asyncio.Future) -> None:
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().aclose())
+
+
+def _apply_timeout(request: httpx.Request, health: HostHealth) -> bool:
+    """
+    Limita o timeout da requisição ao timeout adaptativo do host e ao
+    deadline. Retorna True quando o deadline foi o limite efetivo.
+    """
+    current = request.extensions.get("timeout") or {}
+    limit, deadline_bound = _deadline_timeout(health.timeout(current.get("read")))
+    request.extensions["timeout"] = {
+        key: limit if value is None else min(value, limit)
+        for key, value in current.items()
+    }
+    return deadline_bound
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Retorna o cliente async do event loop corrente (criando se necessário).
+    Deve ser chamado de dentro de uma coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+
+    if client is None or client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=settings.REQUEST_TIMEOUT,
+            follow_redirects=True,
+            transport=_RetryTransport(transport),
+        )
+        _async_clients[loop] = client
+        logger.info("Async HTTP client created")
+
+    return client
+
+
+async def close_async_client() -> None:
+    """Fecha o cliente async do event loop corrente (se existir)"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.pop(loop, None)
+
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def http_stats() -> dict:
+    """Métricas HTTP por host (requisições, retries, latência, pool)"""
+    return metrics.snapshot("http.")
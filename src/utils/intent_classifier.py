@@ -0,0 +1,135 @@
+"""
+Classificador local de intenção (Naive Bayes multinomial, CPU-only)
+
+Treinado a partir das saídas registradas do analyzer (JSONL), prevê qual
+conjunto de tools uma mensagem exige. Não tem dependências externas e
+aprende de forma incremental (`learn`). O vocabulário é limitado a
+ROUTER_MAX_VOCABULARY tokens: ao estourar, os menos frequentes são
+descartados (com suas contagens), então a memória não cresce sem limite.
+"""
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Rótulo usado quando o analyzer respondeu sem tools
+DIRECT_LABEL = "direct"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Fração do limite liberada a cada eviction (evita evictar a cada learn)
+EVICTION_FRACTION = 0.1
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas e sem acentos ("Notícias" -> "noticias")"""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def label_for_tools(tools: Iterable[str]) -> str:
+    """Rótulo canônico de um conjunto de tools ("search_news+get_stock_data")"""
+    tools = sorted(set(tools or []))
+    return "+".join(tools) if tools else DIRECT_LABEL
+
+
+class IntentClassifier:
+    """Naive Bayes multinomial com suavização de Laplace"""
+
+    def __init__(self, alpha: float = 1.0, max_vocabulary: Optional[int] = None):
+        self.alpha = alpha
+        self.max_vocabulary = settings.ROUTER_MAX_VOCABULARY if max_vocabulary is None else max_vocabulary
+        self._lock = threading.Lock()
+        self._label_counts: Counter = Counter()
+        self._token_counts: Dict[str, Counter] = defaultdict(Counter)
+        self._token_totals: Counter = Counter()
+        # Frequência total de cada token (todas as classes): vocabulário e eviction
+        self._vocabulary: Counter = Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self._label_counts.values())
+
+    def learn(self, text: str, label: str) -> None:
+        tokens = tokenize(text)
+        if not tokens:
+            return
+
+        with self._lock:
+            self._label_counts[label] += 1
+            self._token_counts[label].update(tokens)
+            self._token_totals[label] += len(tokens)
+            self._vocabulary.update(tokens)
+            if self.max_vocabulary > 0 and len(self._vocabulary) > self.max_vocabulary:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove os tokens menos frequentes até ficar abaixo do limite (com o lock)"""
+        target = int(self.max_vocabulary * (1 - EVICTION_FRACTION))
+        excess = len(self._vocabulary) - target
+        for token, _ in self._vocabulary.most_common()[:-excess - 1:-1]:
+            del self._vocabulary[token]
+            for label, counts in self._token_counts.items():
+                removed = counts.pop(token, 0)
+                self._token_totals[label] -= removed
+
+        logger.info(f"Intent classifier evicted {excess} tokens (vocabulary limit {self.max_vocabulary})")
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """Retorna (rótulo, probabilidade a posteriori) ou (None, 0.0)"""
+        tokens = tokenize(text)
+
+        with self._lock:
+            total = sum(self._label_counts.values())
+            if not tokens or not total:
+                return None, 0.0
+
+            vocab_size = len(self._vocabulary) or 1
+            scores = {}
+            for label, count in self._label_counts.items():
+                log_prob = math.log(count / total)
+                denominator = self._token_totals[label] + self.alpha * vocab_size
+                counts = self._token_counts[label]
+                for token in tokens:
+                    log_prob += math.log((counts[token] + self.alpha) / denominator)
+                scores[label] = log_prob
+
+        # Softmax estável para obter a confiança
+        best_label = max(scores, key=scores.get)
+        best = scores[best_label]
+        norm = sum(math.exp(score - best) for score in scores.values())
+        return best_label, 1.0 / norm
+
+    def load_jsonl(self, path: str) -> int:
+        """
+        Treina a partir do log do analyzer. Cada linha:
+        {"input": "...", "tools_needed": ["get_stock_data"], ...}
+        """
+        if not path or not os.path.exists(path):
+            return 0
+
+        loaded = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.learn(record.get("input", ""), label_for_tools(record.get("tools_needed")))
+                loaded += 1
+
+        logger.info(f"Intent classifier trained with {loaded} samples from {path}")
+        return loaded
@@ -0,0 +1,126 @@
+"""
+Métricas in-process do agente (contadores, gauges e tempos)
+
+Registry simples e thread-safe, sem dependências externas.
+Os valores podem ser lidos via `metrics.snapshot()` (ex: logs, healthcheck).
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+# Quantidade de amostras mantidas por métrica de tempo (percentis)
+_WINDOW_SIZE = 512
+
+
+class _Timing:
+    """Agrega observações de uma métrica de tempo/valor"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.window = deque(maxlen=_WINDOW_SIZE)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.window.append(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.window:
+            return None
+        ordered = sorted(self.window)
+        idx = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": (self.total / self.count) if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+        }
+
+
+class Metrics:
+    """
+    Registry de métricas do processo.
+
+    - incr(): contadores monotônicos
+    - set_gauge(): valores instantâneos
+    - observe()/timer(): distribuições (latência, tamanhos)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, _Timing] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = _Timing()
+            timing.add(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Mede o tempo (segundos) do bloco e registra em `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        with self._lock:
+            timing = self._timings.get(name)
+            return timing.percentile(q) if timing else None
+
+    def ratio(self, numerator: str, denominator_extra: str) -> float:
+        """
+        Calcula numerator / (numerator + denominator_extra).
+        Útil para taxas de acerto (hit / (hit + miss)).
+        """
+        with self._lock:
+            num = self._counters.get(numerator, 0)
+            total = num + self._counters.get(denominator_extra, 0)
+        return (num / total) if total else 0.0
+
+    def snapshot(self, prefix: str = "") -> dict:
+        with self._lock:
+            return {
+                "counters": {k: v for k, v in self._counters.items() if k.startswith(prefix)},
+                "gauges": {k: v for k, v in self._gauges.items() if k.startswith(prefix)},
+                "timings": {
+                    k: t.as_dict() for k, t in self._timings.items() if k.startswith(prefix)
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+# Instância global de métricas
+metrics = Metrics()
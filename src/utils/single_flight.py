@@ -0,0 +1,157 @@
+"""
+Single-flight: chamadas idênticas simultâneas compartilham uma execução
+
+A primeira chamada para uma chave (líder) executa a função; as que chegam
+enquanto ela está em andamento aguardam o mesmo resultado (ou exceção).
+Funciona entre threads e entre event loops (ex: process_request cria um
+loop por requisição): o resultado é publicado em um concurrent.futures.Future.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from src.utils.metrics import metrics
+
+T = TypeVar("T")
+
+
+class LeaderCancelledError(Exception):
+    """A execução compartilhada foi cancelada (ex: timeout do líder)"""
+
+
+class SingleFlight:
+    """Coalescência de chamadas em andamento por chave"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Executa `fn` (sync) ou aguarda a execução já em andamento"""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+
+        self._finish(key, future, result=result)
+        return result
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Versão async de `do` (aguarda sem bloquear o event loop)"""
+        future, leader = self._join(key)
+        if not leader:
+            # shield: cancelar um seguidor não cancela a execução compartilhada
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._finish(key, future, error=LeaderCancelledError(f"{self.name}: {key!r}"))
+            raise
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+
+        self._finish(key, future, result=result)
+        return result
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                metrics.incr(f"single_flight.{self.name}.merged")
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            metrics.incr(f"single_flight.{self.name}.leader")
+            metrics.set_gauge(f"single_flight.{self.name}.in_flight", len(self._calls))
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None) -> None:
+        # Remove antes de publicar: quem chegar depois faz uma nova chamada
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+            metrics.set_gauge(f"single_flight.{self.name}.in_flight", len(self._calls))
+
+        if error is not None:
+            future.set_exception(error)
+            # Evita o aviso "exception never retrieved" quando não há seguidores
+            future.exception()
+        else:
+            future.set_result(result)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip().casefold()
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def call_key(name: str, arguments: dict) -> Tuple[str, str]:
+    """Chave normalizada: nome + argumentos (strings sem caixa/espaços)"""
+    return name.strip().lower(), json.dumps(_normalize(arguments), sort_keys=True, default=str)
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """SingleFlight compartilhado por nome (versões sync e async da tool)"""
+    with _flights_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight(name)
+        return flight
+
+
+def coalesce(name: str):
+    """
+    Decorator para funções de tool (sync ou async): chamadas simultâneas
+    com os mesmos argumentos (após defaults e normalização) compartilham
+    uma única execução.
+    """
+    def decorator(fn):
+        flight = get_flight(name)
+        signature = inspect.signature(fn)
+
+        def key_for(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return call_key(name, dict(bound.arguments))
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await flight.ado(key_for(args, kwargs), lambda: fn(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return flight.do(key_for(args, kwargs), lambda: fn(*args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+def single_flight_stats() -> dict:
+    return metrics.snapshot("single_flight.")
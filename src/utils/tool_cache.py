@@ -0,0 +1,123 @@
+"""
+Cache em memória para resultados de tools (TTL + LRU)
+
+Cada entrada tem seu próprio TTL, definido pela política de quem grava
+(ex: cotação com mercado aberto expira antes de cotação com mercado
+fechado). O tamanho é limitado por quantidade de entradas; ao exceder,
+a entrada usada há mais tempo é descartada.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from src.config.settings import settings
+from src.utils.metrics import metrics
+
+# Sentinela para diferenciar "não está no cache" de valores falsy/None
+MISSING = object()
+
+
+class TTLCache:
+    """LRU thread-safe com expiração por entrada"""
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """Retorna o valor em cache ou MISSING"""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self._count("miss")
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._count("expired")
+                self._count("miss")
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self._count("hit")
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count("eviction")
+
+            metrics.set_gauge(f"tool_cache.{self.name}.size", len(self._entries))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            metrics.set_gauge(f"tool_cache.{self.name}.size", 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        prefix = f"tool_cache.{self.name}."
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": metrics.ratio(prefix + "hit", prefix + "miss"),
+            **metrics.snapshot(prefix)["counters"],
+        }
+
+    def _count(self, event: str) -> None:
+        metrics.incr(f"tool_cache.{self.name}.{event}")
+
+
+# ---------- Políticas de TTL ----------
+
+def quote_ttl(meta: dict) -> float:
+    """
+    TTL de uma cotação conforme o estado do mercado:
+    curto durante o pregão, longo com o mercado fechado.
+    """
+    return settings.QUOTE_TTL_OPEN if market_state(meta) == "REGULAR" else settings.QUOTE_TTL_CLOSED
+
+
+def market_state(meta: dict) -> str:
+    """
+    Estado do mercado a partir do `meta` do Yahoo Finance.
+    O endpoint de chart nem sempre traz `marketState`; nesse caso o estado
+    é inferido pelo período de negociação regular corrente.
+    """
+    state = meta.get("marketState")
+    if state:
+        return state
+
+    regular = (meta.get("currentTradingPeriod") or {}).get("regular") or {}
+    start, end = regular.get("start"), regular.get("end")
+    if start and end:
+        return "REGULAR" if start <= time.time() < end else "CLOSED"
+
+    return "Unknown"
+
+
+# Caches globais por tipo de dado
+quote_cache = TTLCache("quotes", settings.TOOL_CACHE_MAX_ENTRIES)
+news_cache = TTLCache("news", settings.TOOL_CACHE_MAX_ENTRIES)
+# Validadores (ETag / Last-Modified) + itens já extraídos, por URL de feed
+feed_cache = TTLCache("feeds", settings.TOOL_CACHE_MAX_ENTRIES)
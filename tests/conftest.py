@@ -0,0 +1,36 @@
+import time
+import types
+
+import pytest
+
+from src.utils.metrics import metrics
+
+
+class FakeClock:
+    """Relógio controlado pelo teste: monotonic() e time() andam juntos"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """
+    Zera as métricas e devolve `install(module)`, que troca o `time` do
+    módulo pelo FakeClock (perf_counter continua real) e retorna o relógio.
+    """
+    metrics.reset()
+    clock = FakeClock()
+
+    def install(module) -> FakeClock:
+        fake_time = types.SimpleNamespace(monotonic=clock.monotonic, time=clock.time, perf_counter=time.perf_counter)
+        monkeypatch.setattr(module, "time", fake_time)
+        return clock
+
+    return install
@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+
+from src.repository.memory import agent_memory
+from src.repository.memory.agent_memory import AgentMemory
+from src.repository.memory.namespaces import MemoryNamespace, MemoryRecord
+from src.utils.metrics import metrics
+
+
+def namespace(name: str, min_score: float = 0.0) -> MemoryNamespace:
+    return MemoryNamespace(name=name, template=f"/{name}/{{actorId}}", top_k=5, min_score=min_score)
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(agent_memory, "_in_flight", {})
+    instance = AgentMemory.__new__(AgentMemory)
+    instance.enabled = True
+    return instance
+
+
+def test_slow_namespace_is_abandoned_and_then_skipped(memory, monkeypatch):
+    monkeypatch.setattr(agent_memory.settings, "MEMORY_RETRIEVAL_MAX_IN_FLIGHT", 1)
+    release = threading.Event()
+
+    def search(ns, actor_id, session_id, query):
+        if ns.name == "slow":
+            release.wait(5)
+        return [MemoryRecord(f"{ns.name} record", 0.9, ns.name)]
+
+    monkeypatch.setattr(memory, "_search_namespace", search)
+    namespaces = [namespace("fast"), namespace("slow")]
+
+    first = memory.retrieve("actor", "session", "query", namespaces=namespaces, budget=0.2)
+    second = memory.retrieve("actor", "session", "query", namespaces=namespaces, budget=0.2)
+    release.set()
+
+    assert [r.text for r in first] == ["fast record"]
+    assert [r.text for r in second] == ["fast record"]
+    assert metrics.counter("memory.retrieve.abandoned") == 1
+    assert metrics.counter("memory.retrieve.slow.abandoned") == 1
+    assert metrics.counter("memory.retrieve.slow.saturated") == 1
+
+
+def test_slots_are_released_after_completion(memory, monkeypatch):
+    monkeypatch.setattr(agent_memory.settings, "MEMORY_RETRIEVAL_MAX_IN_FLIGHT", 1)
+    monkeypatch.setattr(memory, "_search_namespace", lambda ns, *args: [MemoryRecord("texto", 0.9, ns.name)])
+
+    for _ in range(3):
+        assert memory.retrieve("actor", "session", "query", namespaces=[namespace("session")], budget=1.0)
+
+    assert metrics.counter("memory.retrieve.session.saturated") == 0
+
+
+def test_min_score_and_errors_per_namespace(memory, monkeypatch):
+    def search(ns, *args):
+        if ns.name == "broken":
+            raise RuntimeError("boom")
+        return [MemoryRecord("alto", 0.9, ns.name), MemoryRecord("baixo", 0.1, ns.name)]
+
+    monkeypatch.setattr(memory, "_search_namespace", search)
+
+    records = memory.retrieve(
+        "actor", "session", "query",
+        namespaces=[namespace("reflection", min_score=0.5), namespace("broken")],
+        budget=1.0,
+    )
+
+    assert [r.text for r in records] == ["alto"]
+    assert metrics.counter("memory.retrieve.reflection.below_threshold") == 1
+    assert metrics.counter("memory.retrieve.broken.error") == 1
+
+
+def test_local_and_remote_scores_are_rank_merged(memory, monkeypatch):
+    # Cossenos do índice local (altos) x relevância do AgentCore (baixa)
+    local = [MemoryRecord(f"local {i}", 0.95 - i * 0.01, "session") for i in range(4)]
+    remote = [MemoryRecord(f"remoto {i}", 0.4 - i * 0.05, "reflection") for i in range(4)]
+    by_name = {"session": local, "reflection": remote}
+    monkeypatch.setattr(memory, "_search_namespace", lambda ns, *args: by_name[ns.name])
+
+    records = memory.retrieve(
+        "actor", "session", "query",
+        namespaces=[namespace("session"), namespace("reflection")],
+        max_results=4,
+        budget=1.0,
+    )
+
+    assert [r.text for r in records] == ["local 0", "remoto 0", "local 1", "remoto 1"]
+
+
+class FakeClient:
+    def __init__(self, texts):
+        self.calls = 0
+        self.texts = texts
+
+    def retrieve_memory_records(self, **kwargs):
+        self.calls += 1
+        return {"memoryRecordSummaries": [
+            {"content": {"text": text}, "score": 0.4 - i * 0.05} for i, text in enumerate(self.texts)
+        ]}
+
+
+def local_hits(memory, monkeypatch, embedder):
+    monkeypatch.setattr(agent_memory.settings, "MEMORY_CACHE_ENABLED", False)
+    monkeypatch.setattr(agent_memory.settings, "VECTOR_INDEX_EMBEDDER", embedder)
+    monkeypatch.setattr(agent_memory.settings, "VECTOR_INDEX_MIN_HITS", 2)
+    monkeypatch.setattr(memory, "_search_local", lambda *args: [
+        MemoryRecord("USER: turno 1", 0.9, "session"),
+        MemoryRecord("USER: turno 2", 0.8, "session"),
+    ])
+    memory.client = FakeClient(["registro extraído 1", "registro extraído 2"])
+    session = namespace("session")._replace(local=True, top_k=3)
+    return memory._search_namespace(session, "actor", "session", "query")
+
+
+def test_hash_embedder_hits_do_not_skip_remote_memory(memory, monkeypatch):
+    records = local_hits(memory, monkeypatch, "hash")
+
+    assert memory.client.calls == 1
+    assert [r.text for r in records] == ["registro extraído 1", "USER: turno 1", "registro extraído 2"]
+
+
+def test_semantic_embedder_hits_skip_remote_memory(memory, monkeypatch):
+    records = local_hits(memory, monkeypatch, "my_models:embedder")
+
+    assert memory.client.calls == 0
+    assert [r.text for r in records] == ["USER: turno 1", "USER: turno 2"]
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessageChunk
+
+from src.nodes import analyzer
+from src.nodes.analyzer import PLAN_TOOL_NAME
+
+
+class FakeStreamingLLM:
+    """Devolve, a cada chamada, o próximo plano (args JSON) em pedaços"""
+
+    def __init__(self, *plans: dict):
+        self.plans = list(plans)
+
+    async def astream(self, messages):
+        raw = json.dumps(self.plans.pop(0), ensure_ascii=False)
+        pieces = [raw[i:i + 8] for i in range(0, len(raw), 8)]
+        for index, piece in enumerate(pieces):
+            yield AIMessageChunk(content="", tool_call_chunks=[{
+                "name": PLAN_TOOL_NAME if index == 0 else None,
+                "args": piece,
+                "id": f"call-{len(self.plans)}" if index == 0 else None,
+                "index": 0,
+            }])
+
+
+def run_plan(monkeypatch, llm):
+    events = []
+
+    async def emit_token(text):
+        if text:
+            events.append(("token", text))
+
+    async def emit_reset():
+        events.append(("reset", ""))
+
+    monkeypatch.setattr(analyzer, "emit_token", emit_token)
+    monkeypatch.setattr(analyzer, "emit_reset", emit_reset)
+    monkeypatch.setattr(analyzer, "record_prompt_usage", lambda *args: None)
+    plan, _ = asyncio.run(analyzer._request_plan(llm, []))
+    return plan, events
+
+
+def client_text(events) -> str:
+    """Texto visto pelo cliente: tokens após o último reset"""
+    text = ""
+    for kind, data in events:
+        text = "" if kind == "reset" else text + data
+    return text
+
+
+def test_direct_response_is_streamed(monkeypatch):
+    answer = "Olá! Posso ajudar com cotações e notícias."
+    plan, events = run_plan(monkeypatch, FakeStreamingLLM(
+        {"needs_tools": False, "goal": "saudação", "topic": "Geral", "direct_response": answer},
+    ))
+
+    assert plan.direct_response == answer
+    assert client_text(events) == answer
+    assert ("reset", "") not in events
+
+
+def test_rejected_attempt_is_reset_before_repair(monkeypatch):
+    monkeypatch.setattr(analyzer.settings, "ANALYZER_REPAIR_ATTEMPTS", 1)
+    rejected = {"needs_tools": False, "tool_calls": "inválido", "direct_response": "Texto rejeitado pelo schema"}
+    answer = "Resposta reparada e válida."
+    plan, events = run_plan(monkeypatch, FakeStreamingLLM(
+        rejected,
+        {"needs_tools": False, "goal": "g", "topic": "t", "direct_response": answer},
+    ))
+
+    assert plan.direct_response == answer
+    assert events[0][0] == "token"
+    assert ("reset", "") in events
+    assert client_text(events) == answer
+
+
+def test_failed_plan_discards_streamed_text(monkeypatch):
+    monkeypatch.setattr(analyzer.settings, "ANALYZER_REPAIR_ATTEMPTS", 0)
+    plan, events = run_plan(monkeypatch, FakeStreamingLLM(
+        {"needs_tools": False, "tool_calls": "inválido", "direct_response": "Texto rejeitado"},
+    ))
+
+    assert plan is None
+    assert client_text(events) == ""
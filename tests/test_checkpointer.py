@@ -0,0 +1,90 @@
+import types
+
+import pytest
+
+from benchmarks.bench_checkpointer import LocalTable, build_graph
+from src.repository.dynamodb import checkpointer as module
+from src.repository.dynamodb.checkpointer import (
+    KIND_CHECKPOINT,
+    DynamoDbCheckpointer,
+    split_thread_id,
+    thread_id_for,
+)
+from src.utils.metrics import metrics
+
+TTL = 1000
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(module)
+
+
+def new_checkpointer() -> DynamoDbCheckpointer:
+    service = types.SimpleNamespace(table=LocalTable())
+    return DynamoDbCheckpointer(service, ttl_seconds=TTL)
+
+
+def run_turn(graph, config, turn: int) -> None:
+    graph.invoke(
+        {"messages": [{"role": "user", "content": f"Pergunta {turn}"}], "actor_id": "a", "session_id": "s"},
+        config,
+        durability="exit",
+    )
+
+
+def delta_expiries(checkpointer) -> list:
+    return [i["expires_at"] for i in checkpointer.table.items.values() if i["kind"] == KIND_CHECKPOINT]
+
+
+@pytest.mark.parametrize("actor_id,session_id", [
+    ("user#1", "s"),
+    ("a", "s#2"),
+    ("50%#23", "%23"),
+])
+def test_thread_id_round_trips_parts_with_separator(actor_id, session_id):
+    assert split_thread_id(thread_id_for(actor_id, session_id)) == (actor_id, session_id)
+
+
+def test_thread_ids_of_different_actors_do_not_collide():
+    assert thread_id_for("a#b", "c") != thread_id_for("a", "b#c")
+
+
+def test_split_thread_id_rejects_unescaped_separator():
+    with pytest.raises(ValueError):
+        split_thread_id("a#b#c")
+
+
+def test_new_head_refreshes_expiring_ancestors(clock):
+    checkpointer = new_checkpointer()
+    graph = build_graph(checkpointer, tool_chars=100)
+    config = {"configurable": {"thread_id": thread_id_for("a", "s")}}
+
+    run_turn(graph, config, 0)
+    first = delta_expiries(checkpointer)
+    assert first == [int(clock.now + TTL)]
+
+    # Ancestral ainda longe de expirar: não regrava
+    clock.now += TTL / 4
+    run_turn(graph, config, 1)
+    assert sorted(delta_expiries(checkpointer)) == [first[0], int(clock.now + TTL)]
+
+    # Ancestral a menos de metade do TTL: todos os deltas renovados
+    clock.now += TTL / 2
+    run_turn(graph, config, 2)
+    assert delta_expiries(checkpointer) == [int(clock.now + TTL)] * 3
+    assert metrics.snapshot("checkpointer.")["counters"]["checkpointer.history_refreshed"] == 2
+
+
+def test_refresh_uses_head_when_memory_is_cold(clock):
+    checkpointer = new_checkpointer()
+    graph = build_graph(checkpointer, tool_chars=100)
+    config = {"configurable": {"thread_id": thread_id_for("a", "s")}}
+
+    run_turn(graph, config, 0)
+    checkpointer.hot.clear()
+    clock.now += TTL * 0.75
+    run_turn(graph, config, 1)
+
+    assert delta_expiries(checkpointer) == [int(clock.now + TTL)] * 2
+    assert len(list(checkpointer.list(config))) == 2
@@ -0,0 +1,87 @@
+import asyncio
+
+from src.utils import feed_parser
+from src.utils.feed_parser import FeedItem, StreamingFeedParser, aparse_feed, parse_feed
+from src.utils.metrics import metrics
+
+
+def rss(count: int) -> bytes:
+    items = "".join(
+        f"<item><title> Notícia {i} </title><pubDate>Mon, 0{i % 9 + 1} Jan 2024</pubDate>"
+        f"<source url='https://example.com'>Fonte {i}</source><description>texto</description></item>"
+        for i in range(count)
+    )
+    return f"<?xml version='1.0' encoding='UTF-8'?><rss><channel><title>Feed</title>{items}</channel></rss>".encode()
+
+
+def chunked(body: bytes, size: int = 64):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_items_across_chunk_boundaries():
+    items = parse_feed(chunked(rss(3), size=7), limit=10)
+
+    assert items == [
+        FeedItem(title="Notícia 0", pub_date="Mon, 01 Jan 2024", source="Fonte 0"),
+        FeedItem(title="Notícia 1", pub_date="Mon, 02 Jan 2024", source="Fonte 1"),
+        FeedItem(title="Notícia 2", pub_date="Mon, 03 Jan 2024", source="Fonte 2"),
+    ]
+
+
+def test_missing_fields_are_none():
+    body = "<rss><channel><item><title>Só o título</title></item></channel></rss>".encode()
+
+    assert parse_feed([body], limit=5) == [FeedItem("Só o título", None, None)]
+
+
+def test_stops_parsing_at_limit_and_drains(monkeypatch):
+    metrics.reset()
+    parser_feeds = []
+    original = StreamingFeedParser.feed
+
+    def counting_feed(self, chunk):
+        parser_feeds.append(len(chunk))
+        return original(self, chunk)
+
+    monkeypatch.setattr(StreamingFeedParser, "feed", counting_feed)
+    body = rss(200)
+    items = parse_feed(chunked(body), limit=2)
+
+    assert [item.title for item in items] == ["Notícia 0", "Notícia 1"]
+    assert sum(parser_feeds) < len(body)
+    assert metrics.counter("feed_parser.early_stop") == 1
+    assert metrics.counter("feed_parser.items") == 2
+
+
+def test_drain_is_bounded(monkeypatch):
+    monkeypatch.setattr(feed_parser.settings, "FEED_DRAIN_MAX_BYTES", 100)
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(rss(200)):
+            consumed.append(chunk)
+            yield chunk
+
+    parse_feed(chunks(), limit=1)
+
+    assert len(consumed) < len(chunked(rss(200)))
+
+
+def test_truncated_feed_keeps_complete_items():
+    body = rss(3)
+    truncated = body[:body.index(b"<item>", body.index(b"Fonte 1")) + 20]
+
+    # recover=True: o corpo cortado não levanta erro
+    titles = [item.title for item in parse_feed([truncated], limit=10)]
+
+    assert titles[:2] == ["Notícia 0", "Notícia 1"]
+
+
+def test_async_parser():
+    async def chunks():
+        for chunk in chunked(rss(5), size=16):
+            yield chunk
+
+    items = asyncio.run(aparse_feed(chunks(), limit=3))
+
+    assert [item.title for item in items] == ["Notícia 0", "Notícia 1", "Notícia 2"]
@@ -0,0 +1,113 @@
+import pytest
+
+from src.utils import host_health as module
+from src.utils.host_health import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, HostHealth, host_health
+from src.utils.metrics import metrics
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(module.settings, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(module.settings, "CIRCUIT_RESET_TIMEOUT", 30.0)
+    return fake_clock(module)
+
+
+def open_circuit(health: HostHealth) -> None:
+    for _ in range(3):
+        health.before_request()
+        health.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    health = HostHealth("example.com")
+    health.record_failure()
+    health.record_failure()
+    health.record_success(0.1)
+    health.record_failure()
+    health.record_failure()
+    assert health.state == CLOSED
+
+    health.record_failure()
+
+    assert health.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        health.before_request()
+    assert metrics.counter("circuit.example.com.rejected") == 1
+
+
+def test_half_open_allows_a_single_probe(clock):
+    health = HostHealth("example.com")
+    open_circuit(health)
+
+    clock.now += 30
+    health.before_request()
+
+    assert health.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        health.before_request()
+
+
+def test_successful_probe_closes(clock):
+    health = HostHealth("example.com")
+    open_circuit(health)
+    clock.now += 30
+    health.before_request()
+
+    health.record_success(0.2)
+
+    assert health.state == CLOSED
+    health.before_request()
+
+
+def test_failed_probe_reopens_and_restarts_the_timer(clock):
+    health = HostHealth("example.com")
+    open_circuit(health)
+    clock.now += 30
+    health.before_request()
+
+    health.record_failure()
+    assert health.state == OPEN
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        health.before_request()
+    clock.now += 1
+    health.before_request()
+    assert health.state == HALF_OPEN
+
+
+def test_cancelled_probe_frees_the_slot_without_opening(clock):
+    health = HostHealth("example.com")
+    open_circuit(health)
+    clock.now += 30
+    health.before_request()
+
+    health.record_cancelled()
+
+    assert health.state == HALF_OPEN
+    health.before_request()
+
+
+def test_adaptive_timeout_and_hedge_delay(clock, monkeypatch):
+    monkeypatch.setattr(module.settings, "ADAPTIVE_TIMEOUT_MIN_SAMPLES", 10)
+    monkeypatch.setattr(module.settings, "ADAPTIVE_TIMEOUT_MULTIPLIER", 3.0)
+    monkeypatch.setattr(module.settings, "ADAPTIVE_TIMEOUT_MIN", 0.5)
+    monkeypatch.setattr(module.settings, "HEDGE_MIN_DELAY", 0.05)
+    health = HostHealth("example.com")
+
+    assert health.timeout(10.0) == 10.0
+    assert health.hedge_delay() is None
+
+    for _ in range(10):
+        health.record_success(0.1)
+    assert health.timeout(10.0) == pytest.approx(0.5)
+    assert health.hedge_delay() == pytest.approx(0.1)
+
+    for _ in range(10):
+        health.record_success(2.0)
+    assert health.timeout(5.0) == 5.0
+
+
+def test_host_health_is_shared_per_host():
+    assert host_health("a.example.com") is host_health("a.example.com")
+    assert host_health("a.example.com") is not host_health("b.example.com")
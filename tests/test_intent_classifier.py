@@ -0,0 +1,76 @@
+import json
+
+from src.utils.intent_classifier import (
+    DIRECT_LABEL,
+    IntentClassifier,
+    label_for_tools,
+    normalize_text,
+    tokenize,
+)
+
+
+def test_normalize_and_tokenize():
+    assert normalize_text("Notícias da Cotação") == "noticias da cotacao"
+    assert tokenize("Preço: PETR4, já!") == ["preco", "petr4", "ja"]
+
+
+def test_label_for_tools_is_canonical():
+    assert label_for_tools(["search_news", "get_stock_data", "search_news"]) == "get_stock_data+search_news"
+    assert label_for_tools([]) == DIRECT_LABEL
+    assert label_for_tools(None) == DIRECT_LABEL
+
+
+def test_predict_without_samples():
+    assert IntentClassifier().predict("preço da nvda") == (None, 0.0)
+
+
+def test_predict_learned_labels():
+    classifier = IntentClassifier()
+    for text in ["preço da nvda", "cotação da apple", "quanto está a petr4"]:
+        classifier.learn(text, "get_stock_data")
+    for text in ["notícias do flamengo", "últimas do palmeiras", "manchetes do corinthians"]:
+        classifier.learn(text, "search_football_news")
+
+    label, probability = classifier.predict("qual a cotação da nvda")
+
+    assert label == "get_stock_data"
+    assert 0.5 < probability <= 1.0
+    assert classifier.predict("notícias do palmeiras")[0] == "search_football_news"
+    assert classifier.samples == 6
+
+
+def test_learn_ignores_empty_text():
+    classifier = IntentClassifier()
+    classifier.learn("  !! ", "direct")
+
+    assert classifier.samples == 0
+
+
+def test_load_jsonl(tmp_path):
+    path = tmp_path / "router.jsonl"
+    lines = [
+        json.dumps({"input": "preço da nvda", "tools_needed": ["get_stock_data"]}),
+        "não é json",
+        json.dumps({"input": "oi, tudo bem?", "tools_needed": []}),
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    classifier = IntentClassifier()
+
+    assert classifier.load_jsonl(str(path)) == 2
+    assert classifier.predict("oi tudo bem")[0] == DIRECT_LABEL
+    assert IntentClassifier().load_jsonl(str(tmp_path / "missing.jsonl")) == 0
+
+
+def test_vocabulary_is_bounded_by_evicting_rare_tokens():
+    classifier = IntentClassifier(max_vocabulary=20)
+    for _ in range(5):
+        classifier.learn("preço da nvda", "get_stock_data")
+        classifier.learn("notícias do flamengo", "search_football_news")
+    for i in range(100):
+        classifier.learn(f"raro{i}", DIRECT_LABEL)
+
+    assert len(classifier._vocabulary) <= 20
+    assert {"preco", "nvda", "noticias", "flamengo"} <= set(classifier._vocabulary)
+    assert classifier._token_totals[DIRECT_LABEL] == sum(classifier._token_counts[DIRECT_LABEL].values())
+    assert classifier.predict("preço da nvda")[0] == "get_stock_data"
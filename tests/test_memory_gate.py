@@ -0,0 +1,34 @@
+from src.nodes.memory_gate import FULL, LIMITED, SKIPPED, decide_memory_gate
+from src.repository.memory.namespaces import PREFERENCE, SESSION
+
+
+def state(text: str, tools=(), confidence: float = 0.9) -> dict:
+    return {
+        "messages": [{"role": "user", "content": text}],
+        "route": {"tools": list(tools), "confidence": confidence},
+    }
+
+
+def test_confident_lookup_skips_memory():
+    decision = decide_memory_gate(state("preço da NVDA", ["get_stock_data"]))
+
+    assert decision.mode == SKIPPED
+    assert not decision.retrieve
+
+
+def test_profile_tools_limit_namespaces():
+    decision = decide_memory_gate(state("pede uma pizza", ["get_restaurants"]))
+
+    assert decision.mode == LIMITED
+    assert decision.namespaces == (PREFERENCE, SESSION)
+
+
+def test_personal_reference_forces_full_retrieval():
+    decision = decide_memory_gate(state("preço das ações da minha carteira", ["get_stock_data"]))
+
+    assert (decision.mode, decision.reason) == (FULL, "personal")
+
+
+def test_low_confidence_or_no_plan_is_full():
+    assert decide_memory_gate(state("e aí?", confidence=0.0)).reason == "uncertain"
+    assert decide_memory_gate(state("notícias", ["search_news"], confidence=0.5)).mode == FULL
@@ -0,0 +1,36 @@
+from src.repository.memory.namespaces import MemoryNamespace, MemoryRecord, merge_records
+
+
+def test_resolve_template():
+    namespace = MemoryNamespace(
+        name="session",
+        template="/strategies/{memoryStrategyId}/actors/{actorId}/sessions/{sessionId}",
+        top_k=5,
+        min_score=0.0,
+        strategy_id="strategy",
+    )
+
+    assert namespace.resolve("actor", "Minha Sessao") == "/strategies/strategy/actors/actor/sessions/minha-sessao"
+
+
+def test_merge_ranks_each_list_by_its_own_score():
+    first = [MemoryRecord("b", 0.2, "x"), MemoryRecord("a", 0.9, "x")]
+    second = [MemoryRecord("c", 50.0, "y")]
+
+    assert [r.text for r in merge_records([first, second])] == ["a", "c", "b"]
+
+
+def test_merge_boosts_records_found_in_several_lists():
+    first = [MemoryRecord("único", 0.9, "x"), MemoryRecord("Comum  ", 0.8, "x")]
+    second = [MemoryRecord("outro", 0.9, "y"), MemoryRecord("comum", 0.7, "y")]
+
+    merged = merge_records([first, second], max_results=2)
+
+    assert [r.text for r in merged] == ["Comum  ", "único"]
+    assert merged[0].namespace == "x"
+
+
+def test_merge_skips_empty_and_duplicated_text():
+    records = [MemoryRecord("  ", 0.9, "x"), MemoryRecord("a", 0.5, "x"), MemoryRecord("A", 0.4, "x")]
+
+    assert merge_records([records]) == [MemoryRecord("a", 0.5, "x")]
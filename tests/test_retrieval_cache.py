@@ -0,0 +1,105 @@
+import pytest
+
+from src.repository.memory import retrieval_cache as module
+from src.repository.memory.retrieval_cache import MemoryRetrievalCache, jaccard
+from src.utils.metrics import metrics
+
+KEY = ("actor", "session", "/strategies/s/actors/actor")
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(module)
+
+
+def new_cache(**overrides) -> MemoryRetrievalCache:
+    options = {"max_keys": 10, "queries_per_key": 4, "ttl": 60.0, "similarity": 0.8}
+    return MemoryRetrievalCache(**{**options, **overrides})
+
+
+def test_jaccard():
+    assert jaccard(frozenset("ab"), frozenset("ab")) == 1.0
+    assert jaccard(frozenset("ab"), frozenset("bc")) == pytest.approx(1 / 3)
+    assert jaccard(frozenset(), frozenset()) == 1.0
+
+
+def test_exact_and_similar_queries_hit(clock):
+    cache = new_cache()
+    cache.set(KEY, "qual o preço da nvidia hoje", 5, ["r1", "r2"])
+
+    assert cache.get(KEY, "Qual o preço da NVIDIA hoje?", 5) == ["r1", "r2"]
+    assert cache.get(KEY, "qual o preço da nvidia hoje agora", 5) == ["r1", "r2"]
+    assert metrics.counter("memory_cache.hit_exact") == 1
+    assert metrics.counter("memory_cache.hit_similar") == 1
+
+
+def test_dissimilar_query_misses(clock):
+    cache = new_cache()
+    cache.set(KEY, "qual o preço da nvidia hoje", 5, ["r1"])
+
+    assert cache.get(KEY, "notícias do flamengo", 5) is None
+    assert cache.get(("actor", "other", KEY[2]), "qual o preço da nvidia hoje", 5) is None
+
+
+def test_smaller_top_k_is_served_and_larger_is_not(clock):
+    cache = new_cache()
+    cache.set(KEY, "preço nvidia", 3, ["r1", "r2", "r3"])
+
+    assert cache.get(KEY, "preço nvidia", 2) == ["r1", "r2"]
+    assert cache.get(KEY, "preço nvidia", 5) is None
+
+
+def test_entries_expire(clock):
+    cache = new_cache(ttl=10.0)
+    cache.set(KEY, "preço nvidia", 5, ["r1"])
+
+    clock.now += 10
+
+    assert cache.get(KEY, "preço nvidia", 5) is None
+    assert metrics.counter("memory_cache.expired") == 1
+    assert cache.stats()["keys"] == 0
+
+
+def test_keeps_most_recent_queries_per_key(clock):
+    cache = new_cache(queries_per_key=2)
+    cache.set(KEY, "primeira busca", 5, ["a"])
+    cache.set(KEY, "segunda busca diferente", 5, ["b"])
+    cache.set(KEY, "terceira consulta nova", 5, ["c"])
+
+    assert cache.get(KEY, "primeira busca", 5) is None
+    assert cache.get(KEY, "terceira consulta nova", 5) == ["c"]
+
+
+def test_lru_eviction_of_keys(clock):
+    cache = new_cache(max_keys=2)
+    keys = [("actor", f"s{i}", "ns") for i in range(3)]
+    cache.set(keys[0], "busca", 5, ["0"])
+    cache.set(keys[1], "busca", 5, ["1"])
+    cache.get(keys[0], "busca", 5)
+
+    cache.set(keys[2], "busca", 5, ["2"])
+
+    assert cache.get(keys[1], "busca", 5) is None
+    assert cache.get(keys[0], "busca", 5) == ["0"]
+    assert metrics.counter("memory_cache.eviction") == 1
+
+
+def test_invalidate_actor_only_drops_that_actor(clock):
+    cache = new_cache()
+    cache.set(("actor", "s1", "ns"), "busca", 5, ["a"])
+    cache.set(("actor", "s2", "ns"), "busca", 5, ["b"])
+    cache.set(("other", "s1", "ns"), "busca", 5, ["c"])
+
+    cache.invalidate_actor("actor")
+
+    assert cache.get(("actor", "s1", "ns"), "busca", 5) is None
+    assert cache.get(("actor", "s2", "ns"), "busca", 5) is None
+    assert cache.get(("other", "s1", "ns"), "busca", 5) == ["c"]
+    assert metrics.counter("memory_cache.invalidated") == 2
+
+
+def test_disabled_with_zero_ttl(clock):
+    cache = new_cache(ttl=0)
+    cache.set(KEY, "busca", 5, ["a"])
+
+    assert cache.get(KEY, "busca", 5) is None
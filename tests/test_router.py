@@ -0,0 +1,116 @@
+from src.nodes.router import IntentRouter
+from src.utils.intent_classifier import DIRECT_LABEL, IntentClassifier, label_for_tools
+
+
+def new_router() -> IntentRouter:
+    # Classificador vazio: só as regras (sem depender do log de treino)
+    return IntentRouter(IntentClassifier())
+
+
+def test_all_caps_greeting_is_not_a_ticker_list():
+    decision = new_router().decide("OLA, TUDO BEM? ME AJUDA")
+
+    assert decision.tool_plan == []
+    assert decision.confidence == 0.0
+
+
+def test_all_caps_question_is_not_a_ticker_list():
+    decision = new_router().decide("VOCE SABE QUEM GANHOU O JOGO?")
+
+    assert "get_stock_quotes" not in decision.tools
+    assert "get_stock_data" not in decision.tools
+
+
+def test_all_caps_with_price_word_ignores_unknown_words():
+    decision = new_router().decide("QUAL O PRECO DE HOJE? ME AJUDA")
+
+    assert decision.tool_plan == []
+
+
+def test_acronym_without_price_word_is_not_a_ticker():
+    decision = new_router().decide("Me explique o que é FII")
+
+    assert decision.tool_plan == []
+
+
+def test_unknown_acronym_without_financial_context_is_ignored():
+    decision = new_router().decide("Me explique o que é XPTO")
+
+    assert decision.tool_plan == []
+
+
+def test_known_ticker_with_price_word():
+    decision = new_router().decide("Qual o preço da NVDA?")
+
+    assert decision.tool_plan == [{"name": "get_stock_data", "args": {"symbol": "NVDA"}}]
+    assert decision.confidence == 0.9
+
+
+def test_known_ticker_in_all_caps_message():
+    decision = new_router().decide("COTACAO DA NVDA E AAPL")
+
+    assert decision.tool_plan == [{"name": "get_stock_quotes", "args": {"symbols": ["NVDA", "AAPL"]}}]
+
+
+def test_unlisted_ticker_accepted_with_price_word():
+    decision = new_router().decide("Cotação de PLTR hoje")
+
+    assert decision.tools == ["get_stock_data"]
+    assert decision.tool_plan[0]["args"] == {"symbol": "PLTR"}
+
+
+def test_b3_ticker_and_company_name():
+    decision = new_router().decide("preço de petr4 e da vale3")
+
+    assert decision.tool_plan[0]["args"] == {"symbols": ["PETR4.SA", "VALE3.SA"]}
+    assert new_router().decide("quanto está a nvidia?").tool_plan[0]["args"] == {"symbol": "NVDA"}
+
+
+def test_ticker_without_price_word_has_low_confidence():
+    decision = new_router().decide("e a NVDA?")
+
+    assert decision.tools == ["get_stock_data"]
+    assert decision.confidence < 0.85
+
+
+def test_football_news():
+    decision = new_router().decide("Notícias do Flamengo")
+
+    assert decision.tool_plan == [{
+        "name": "search_football_news",
+        "args": {"query": "Flamengo", "scope": "br", "limit": 5},
+    }]
+    assert decision.topic == "Futebol"
+
+
+def test_market_news():
+    decision = new_router().decide("últimas notícias do mercado")
+
+    assert decision.tool_plan == [{"name": "search_news", "args": {"query": "stock market"}}]
+
+
+def test_football_news_without_entity_is_uncertain():
+    decision = new_router().decide("noticias de futebol")
+
+    assert decision.confidence < 0.85
+
+
+def test_classifier_agreement_raises_confidence():
+    classifier = IntentClassifier()
+    for _ in range(30):
+        classifier.learn("e a NVDA?", label_for_tools(["get_stock_data"]))
+    router = IntentRouter(classifier)
+
+    decision = router.decide("e a NVDA?")
+
+    assert decision.source == "rules+classifier"
+    assert decision.confidence > 0.7
+
+
+def test_classifier_disagreement_lowers_confidence():
+    classifier = IntentClassifier()
+    for _ in range(30):
+        classifier.learn("qual o preço da NVDA", DIRECT_LABEL)
+    router = IntentRouter(classifier)
+
+    assert router.decide("qual o preço da NVDA").confidence < 0.9
@@ -0,0 +1,121 @@
+import pytest
+
+from src.repository import session_store as module
+from src.repository.session_store import SessionStore, estimate_size
+from src.utils.metrics import metrics
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(module)
+
+
+def new_store(**overrides) -> SessionStore:
+    # Tamanho = comprimento da string: limites de bytes previsíveis
+    options = {"name": "test", "max_sessions": 10, "max_bytes": 100, "idle_ttl": 60.0, "sizer": len}
+    return SessionStore(**{**options, **overrides})
+
+
+def gauges() -> dict:
+    return metrics.snapshot("test.")["gauges"]
+
+
+def test_get_put_and_counters(clock):
+    store = new_store()
+
+    assert store.get("a") is None
+    store.put("a", "valor")
+
+    assert store.get("a") == "valor"
+    assert metrics.counter("test.hit") == 1
+    assert metrics.counter("test.miss") == 1
+    assert gauges() == {"test.sessions": 1, "test.bytes": 5}
+
+
+def test_evicts_least_recently_used_by_count(clock):
+    store = new_store(max_sessions=2)
+    store.put("a", "1")
+    store.put("b", "2")
+    store.get("a")
+
+    store.put("c", "3")
+
+    assert store.peek("b") is None
+    assert store.peek("a") == "1"
+    assert metrics.counter("test.eviction") == 1
+
+
+def test_evicts_by_bytes(clock):
+    store = new_store(max_bytes=10)
+    store.put("a", "x" * 4)
+    store.put("b", "x" * 4)
+    store.put("c", "x" * 4)
+
+    assert store.peek("a") is None
+    assert store.stats()["bytes"] == 8
+
+
+def test_oversized_value_is_not_kept(clock):
+    store = new_store(max_bytes=10)
+    store.put("a", "antigo")
+
+    store.put("a", "x" * 11)
+
+    assert store.peek("a") is None
+    assert metrics.counter("test.oversize") == 1
+    assert store.stats()["bytes"] == 0
+
+
+def test_idle_ttl_is_renewed_by_get(clock):
+    store = new_store(idle_ttl=10.0)
+    store.put("a", "1")
+
+    clock.now += 8
+    assert store.get("a") == "1"
+    clock.now += 8
+    assert store.get("a") == "1"
+    clock.now += 11
+    assert store.get("a") is None
+    assert metrics.counter("test.expired") == 1
+    assert gauges()["test.sessions"] == 0
+
+
+def test_peek_does_not_renew_ttl(clock):
+    store = new_store(idle_ttl=10.0)
+    store.put("a", "1")
+
+    clock.now += 8
+    assert store.peek("a") == "1"
+    clock.now += 3
+    assert store.get("a") is None
+
+
+def test_update_adjusts_bytes_and_may_evict(clock):
+    store = new_store(max_bytes=10)
+    store.put("a", "123")
+    store.put("b", "456")
+
+    assert store.update("b", lambda value: value + "7890")
+    assert store.stats()["bytes"] == 10
+    assert store.update("b", lambda value: value + "X")
+    assert store.peek("a") is None
+    assert store.peek("b") == "4567890X"
+    assert not store.update("missing", lambda value: value)
+
+
+def test_pop_matching_and_clear(clock):
+    store = new_store()
+    store.put(("thread-1", "ns"), "a")
+    store.put(("thread-1", "other"), "b")
+    store.put(("thread-2", "ns"), "c")
+
+    assert store.pop_matching(lambda key: key[0] == "thread-1") == 2
+    assert store.stats()["sessions"] == 1
+
+    store.clear()
+    assert gauges() == {"test.sessions": 0, "test.bytes": 0}
+
+
+def test_estimate_size_falls_back_to_repr():
+    assert estimate_size({"a": 1}) > 0
+    assert estimate_size(lambda: None) > 0
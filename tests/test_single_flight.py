@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.single_flight import LeaderCancelledError, SingleFlight, call_key, coalesce
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"price": 10}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"price": 10}] * 5
+    assert flight.in_flight() == 0
+
+
+def test_exception_is_shared_and_next_call_runs_again():
+    flight = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["upstream", "upstream"]
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_async_calls_are_coalesced():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("k", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_fails_followers():
+    flight = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("k", slow))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.ado("k", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(LeaderCancelledError):
+            await follower
+
+    asyncio.run(main())
+    assert flight.in_flight() == 0
+
+
+def test_cancelled_follower_does_not_cancel_leader():
+    flight = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("k", fetch))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.ado("k", fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_call_key_normalizes_strings():
+    assert call_key("Get_Stock_Data", {"symbol": " NVDA "}) == call_key("get_stock_data", {"symbol": "nvda"})
+    assert call_key("t", {"symbols": ["A", "b"]}) != call_key("t", {"symbols": ["b", "a"]})
+
+
+def test_coalesce_applies_defaults_to_the_key():
+    calls = []
+    release = threading.Event()
+
+    @coalesce("test_coalesce")
+    def quote(symbol, period="1d"):
+        calls.append(symbol)
+        release.wait(5)
+        return symbol
+
+    threads = [
+        threading.Thread(target=quote, args=("NVDA",)),
+        threading.Thread(target=quote, args=("nvda", "1d")),
+        threading.Thread(target=quote, kwargs={"symbol": "NVDA", "period": "1d"}),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["NVDA"]
@@ -0,0 +1,16 @@
+from src.tools.stock_tools import _format_stock_data
+
+
+def test_change_uses_chart_previous_close_from_batch_meta():
+    meta = {"regularMarketPrice": 110.0, "chartPreviousClose": 100.0, "currency": "USD", "marketState": "REGULAR"}
+
+    result = _format_stock_data("NVDA", meta)
+
+    assert "Previous Close: $100.00" in result
+    assert "Change: $10.00 (10.00%)" in result
+
+
+def test_missing_previous_close_is_reported_as_na():
+    result = _format_stock_data("NVDA", {"regularMarketPrice": 110.0, "marketState": "CLOSED"})
+
+    assert "Previous Close: $N/A" in result
@@ -0,0 +1,85 @@
+import pytest
+
+from src.utils import tool_cache
+from src.utils.metrics import metrics
+from src.utils.tool_cache import MISSING, TTLCache, market_state, quote_ttl
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(tool_cache)
+
+
+def test_get_set_and_falsy_values(clock):
+    cache = TTLCache("test", max_entries=10)
+
+    assert cache.get("a") is MISSING
+    cache.set("a", None, ttl=10)
+    cache.set("b", [], ttl=10)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == []
+    assert metrics.counter("tool_cache.test.hit") == 2
+    assert metrics.counter("tool_cache.test.miss") == 1
+
+
+def test_entry_expires_after_its_own_ttl(clock):
+    cache = TTLCache("test", max_entries=10)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2, ttl=60)
+
+    clock.now += 5
+
+    assert cache.get("short") is MISSING
+    assert cache.get("long") == 2
+    assert metrics.counter("tool_cache.test.expired") == 1
+    assert len(cache) == 1
+
+
+def test_non_positive_ttl_is_not_stored(clock):
+    cache = TTLCache("test", max_entries=10)
+    cache.set("a", 1, ttl=0)
+
+    assert cache.get("a") is MISSING
+
+
+def test_lru_eviction_keeps_recently_used(clock):
+    cache = TTLCache("test", max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert metrics.counter("tool_cache.test.eviction") == 1
+    assert metrics.snapshot("tool_cache.test.")["gauges"]["tool_cache.test.size"] == 2
+
+
+def test_invalidate_and_clear(clock):
+    cache = TTLCache("test", max_entries=10)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+
+    cache.invalidate("a")
+    assert cache.get("a") is MISSING
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_market_state_from_meta_or_trading_period(clock):
+    period = {"regular": {"start": clock.now - 10, "end": clock.now + 10}}
+
+    assert market_state({"marketState": "POST"}) == "POST"
+    assert market_state({"currentTradingPeriod": period}) == "REGULAR"
+    clock.now += 20
+    assert market_state({"currentTradingPeriod": period}) == "CLOSED"
+    assert market_state({}) == "Unknown"
+
+
+def test_quote_ttl_depends_on_market_state(clock):
+    assert quote_ttl({"marketState": "REGULAR"}) == tool_cache.settings.QUOTE_TTL_OPEN
+    assert quote_ttl({"marketState": "CLOSED"}) == tool_cache.settings.QUOTE_TTL_CLOSED
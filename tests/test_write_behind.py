@@ -0,0 +1,102 @@
+from src.repository.write_behind import EPISODE, MEMORY_EVENT, WriteBehindJournal, WriteBehindPipeline
+
+
+class FakeMemory:
+    def __init__(self):
+        self.events = []
+
+    def create_event(self, actor_id, session_id, payload, event_timestamp=None, client_token=None):
+        self.events.append({
+            "session_id": session_id,
+            "payload": payload,
+            "timestamp": event_timestamp,
+            "token": client_token,
+        })
+
+
+    def build_turn_payload(self, state):
+        return [
+            {"conversational": {"role": "USER", "content": {"text": state["input"]}}},
+            {"conversational": {"role": "ASSISTANT", "content": {"text": state["final_response"]}}},
+        ]
+
+    def build_episode_payload(self, state):
+        return [{"conversational": {"role": "ASSISTANT", "content": {"text": '{"goal": "g"}'}}}]
+
+
+class FakeStore:
+    def save_episodes(self, items):
+        pass
+
+
+def memory_record(record_id: str, session_id: str, text: str, timestamp: float) -> dict:
+    return {
+        "id": record_id,
+        "kind": MEMORY_EVENT,
+        "enqueued_at": timestamp,
+        "actor_id": "actor",
+        "session_id": session_id,
+        "payload": [{"conversational": {"role": "USER", "content": {"text": text}}}],
+        "timestamp": timestamp,
+    }
+
+
+def test_each_turn_keeps_its_own_timestamp():
+    memory = FakeMemory()
+    pipeline = WriteBehindPipeline(memory=memory, store=FakeStore())
+    batch = [
+        memory_record("a", "s1", "primeiro", 1_700_000_000.0),
+        memory_record("b", "s1", "segundo", 1_700_000_030.0),
+        memory_record("c", "s2", "outra sessão", 1_700_000_010.0),
+    ]
+    for record in batch:
+        pipeline._queue.put(record)
+
+    pipeline._flush([pipeline._queue.get() for _ in batch])
+
+    assert [e["payload"][0]["conversational"]["content"]["text"] for e in memory.events] == [
+        "primeiro", "segundo", "outra sessão",
+    ]
+    timestamps = [e["timestamp"].timestamp() for e in memory.events if e["session_id"] == "s1"]
+    assert timestamps == sorted(timestamps)
+    assert timestamps[1] - timestamps[0] == 30
+    assert len({e["token"] for e in memory.events}) == 3
+
+
+def test_retry_reuses_client_token():
+    memory = FakeMemory()
+    pipeline = WriteBehindPipeline(memory=memory, store=FakeStore())
+    record = memory_record("a", "s1", "turno", 1_700_000_000.0)
+
+    pipeline._create_event(record)
+    pipeline._create_event(record)
+
+    assert memory.events[0]["token"] == memory.events[1]["token"]
+
+
+def test_turn_and_episode_are_separate_events(monkeypatch):
+    monkeypatch.setattr("src.repository.write_behind.settings.WRITE_BEHIND_FLUSH_INTERVAL", 0.01)
+    memory = FakeMemory()
+    pipeline = WriteBehindPipeline(memory=memory, store=FakeStore())
+
+    pipeline.submit({"actor_id": "actor", "session_id": "s1", "input": "oi", "final_response": "olá"})
+
+    assert pipeline.flush()
+    assert [[m["conversational"]["role"] for m in e["payload"]] for e in memory.events] == [
+        ["USER", "ASSISTANT"], ["ASSISTANT"],
+    ]
+    pipeline.close()
+
+
+def test_replayed_episodes_without_store_stay_journaled(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.repository.write_behind.settings.EPISODE_LOOKUP_ENABLED", False)
+    journal = WriteBehindJournal(str(tmp_path / "journal.jsonl"))
+    record = {"id": "e1", "kind": EPISODE, "enqueued_at": 0.0, "item": {"goal": "g"}}
+    journal.append(record)
+    pipeline = WriteBehindPipeline(memory=FakeMemory(), journal=journal)
+    pipeline._queue.put(record)
+
+    pipeline._flush([pipeline._queue.get()])
+
+    assert pipeline.store is None
+    assert [r["id"] for r in WriteBehindJournal(journal.path).recover()] == ["e1"]